@@ -0,0 +1,173 @@
+"""
+Check enigma.py against a build of main.cpp
+Compiles main.cpp (string literals left outside the wiring arrays are
+blanked first, see wiring_check.parse_cpp), then runs main.exe and
+enigma.main() on the same random esetup and plain files and compares the
+encrypt and decrypt files byte for byte.
+
+The setups put rotors in any order: numbers 0..m in any position, repeats
+allowed, so the cases where SetRotorPositions indexes window[] and RotPos[]
+by rotor number rather than by position are covered (see
+Enigma.from_setup). Setups that send main.exe to a NULL RotWiring (a rotor
+numbered above 3 pointing at an empty position) are not generated.
+
+Usage:
+  python check_engine.py                   (300 random setups)
+  python check_engine.py -n 1000 --seed 7 --cxx clang++
+  python check_engine.py --exe ./main.exe  (an existing build)
+Exit status: 0 if every setup matches, 1 otherwise.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import enigma
+from wiring_check import DEFAULT_SOURCE, c_tokens
+
+SETUPS = 300       # Random setups checked by default
+LINES = 4          # Lines of plain per setup
+LINE_LENGTH = 120  # Longest plain line (main.cpp reads lines of up to 255)
+
+
+def compilable_source(text):
+    """main.cpp with the lines holding stray string literals or an
+    unmatched '}' blanked (kept as empty lines, so compiler messages keep
+    their line numbers)"""
+    stray = set()
+    depth = 0
+    previous = None
+    for kind, _, line, _ in c_tokens(text):
+        if kind == '{':
+            depth += 1
+        elif kind == '}':
+            if depth == 0:
+                stray.add(line)
+            else:
+                depth -= 1
+        elif kind in ('str', 'char') and depth == 0 and previous != '=':
+            stray.add(line)
+        previous = kind
+    lines = text.split('\n')
+    return '\n'.join('' if number in stray else line
+                     for number, line in enumerate(lines, 1))
+
+
+def build(source, folder, cxx="g++"):
+    """Compile main.cpp into folder; returns the executable's path"""
+    with open(source, encoding='latin-1') as f:
+        text = compilable_source(f.read())
+    cpp = os.path.join(folder, "main.cpp")
+    exe = os.path.join(folder, "main.exe")
+    with open(cpp, 'w', encoding='latin-1') as f:
+        f.write(text)
+    result = subprocess.run([cxx, "-w", "-fpermissive", "-o", exe, cpp],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"{cxx} failed:\n{result.stderr}")
+    return exe
+
+
+def random_setup(rng, chars):
+    """esetup lines for a random machine main.exe can run"""
+    count = rng.randint(1, 4)
+    pairs = rng.sample(chars[:36], 2 * rng.randint(0, 6))
+    # RotWiring[0..3] are set by InitEnigma, 1..count by the setup
+    numbers = [rng.randint(0, max(3, count)) for _ in range(count)]
+    codes = {9: 'b', 10: 'g'}
+    lines = ["".join(pairs), str(count)]
+    for position in rng.sample(range(1, count + 1), count):
+        rotor = numbers[position - 1]
+        lines.append(codes.get(rotor, str(rotor)) + str(position) + rng.choice(chars))
+    lines.append(rng.choice("tbcBCx"))
+    return lines
+
+
+def random_plain(rng, chars):
+    """Lines of plain text from the alphabet"""
+    return ["".join(rng.choice(chars) for _ in range(rng.randint(0, LINE_LENGTH)))
+            for _ in range(LINES)]
+
+
+def run_exe(exe, folder):
+    """Run main.exe in folder (it reads esetup and plain from there)"""
+    result = subprocess.run([exe], cwd=folder, capture_output=True)
+    if result.returncode != 0:
+        raise ValueError(f"main.exe exited with status {result.returncode}")
+
+
+def run_python(folder):
+    """enigma.main() on folder's esetup and plain"""
+    names = {name: os.path.join(folder, name)
+             for name in ("esetup", "plain", "pencrypt", "pdecrypt")}
+    with contextlib.redirect_stdout(io.StringIO()):
+        status = enigma.main(["--setup", names["esetup"], "-i", names["plain"],
+                              "-o", names["pencrypt"], "-d", names["pdecrypt"]])
+    if status != 0:
+        raise ValueError("enigma.py failed")
+
+
+def read(folder, name):
+    with open(os.path.join(folder, name), 'rb') as f:
+        return f.read()
+
+
+def check(exe, folder, setups, seed):
+    """Compare main.exe and enigma.py on random setups; returns the number
+    of setups that differ (the first few are printed)"""
+    rng = random.Random(seed)
+    chars = enigma.ALPHABET
+    failures = 0
+    reordered = 0
+    for number in range(setups):
+        setup = random_setup(rng, chars)
+        with open(os.path.join(folder, "esetup"), 'w', encoding='latin-1', newline='\n') as f:
+            f.write("\n".join(setup) + "\n")
+        with open(os.path.join(folder, "plain"), 'w', encoding='latin-1', newline='\n') as f:
+            f.write("\n".join(random_plain(rng, chars)) + "\n")
+        run_exe(exe, folder)
+        run_python(folder)
+        machine = enigma.Enigma.from_setup(setup)
+        if machine.rotor_numbers != tuple(range(1, len(machine.rotors) + 1)):
+            reordered += 1
+        if (read(folder, "encrypt") != read(folder, "pencrypt")
+                or read(folder, "decrypt") != read(folder, "pdecrypt")):
+            failures += 1
+            if failures <= 5:
+                print(f"Setup {number} differs: {setup!r}")
+    print(f"{setups - failures} of {setups} setups match main.exe "
+          f"({reordered} with rotors outside their own position)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check enigma.py against a build of main.cpp")
+    parser.add_argument("-n", "--setups", type=int, default=SETUPS,
+                        help=f"random setups to check (default: {SETUPS})")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    parser.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="main.cpp to build (default: the one next to this file)")
+    parser.add_argument("--cxx", default="g++", help="C++ compiler (default: g++)")
+    parser.add_argument("--exe", help="use this main.exe instead of building one")
+    args = parser.parse_args(argv)
+
+    folder = tempfile.mkdtemp(prefix="enigma-check-")
+    try:
+        exe = os.path.abspath(args.exe) if args.exe else build(args.source, folder, args.cxx)
+        failures = check(exe, folder, args.setups, args.seed)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
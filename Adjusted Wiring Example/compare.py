@@ -1,20 +1,244 @@
-with open('plain', 'r') as f:
-    plain = f.read()
-
-with open('decrypt', 'r') as f:
-    decrypt = f.read()
-
-print("Plain length:", len(plain))
-print("Decrypt length:", len(decrypt))
-
-# Find differences
-print("\nDifferences (first 50):")
-count = 0
-for i, (p, d) in enumerate(zip(plain, decrypt)):
-    if p != d:
-        print(f"  Position {i}: '{p}' != '{d}'")
-        count += 1
-        if count >= 50:
-            break
-
-print(f"\nTotal differences: {sum(1 for p, d in zip(plain, decrypt) if p != d)}")
+"""
+Round-trip checker: compares plain with decrypt byte by byte
+Both files are memory-mapped and walked once, CHUNK bytes at a time, so a
+multi-GB round trip needs no more memory than one chunk. Equal chunks are
+skipped with a single memcmp. Chunks that differ are compared as whole
+NumPy arrays when NumPy is installed, otherwise BLOCK bytes at a time
+with only the differing blocks walked in Python.
+
+One pass gives the first mismatch, the total number of mismatched bytes,
+the length difference (bytes past the end of the shorter file are not
+compared), the first few differences with line and column, and a
+histogram of mismatches per line (lines of the first file).
+
+Usage:
+  python compare.py                              (plain vs decrypt)
+  python compare.py big.txt big.dec --show 10 --ignore-case
+Exit status: 0 if the files are identical, 1 if they differ.
+"""
+
+import argparse
+import bisect
+import collections
+import contextlib
+import mmap
+import os
+import sys
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # Differing chunks are walked block by block
+
+CHUNK = 16 << 20  # Bytes compared per step (16 MB)
+BLOCK = 4096      # Pure-Python path: blocks checked with == before walking bytes
+SHOW = 50         # Differences listed by default
+
+# main.exe folds capitals to lower case, so a round trip never restores them
+FOLD_CASE = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+
+
+@contextlib.contextmanager
+def mapped(path):
+    """Read-only map of a file (b'' for an empty one, which mmap refuses)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                m.madvise(mmap.MADV_SEQUENTIAL)
+            yield m
+
+
+def release(m, start, end):
+    """Unmap pages that have been compared, so the process keeps about one
+    chunk of each file resident (the data stays in the page cache)"""
+    if isinstance(m, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+        start -= start % mmap.PAGESIZE
+        m.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def bucket_label(bucket):
+    """Histogram bucket k holds lines with 2**(k-1) .. 2**k - 1 mismatches"""
+    if bucket <= 1:
+        return str(bucket)
+    low, high = 1 << (bucket - 1), (1 << bucket) - 1
+    return f"{low}-{high}"
+
+
+class Comparison:
+    """Running totals of one comparison, fed chunk by chunk
+    Lines are counted in the first file; the line still open at the end of
+    a chunk carries its mismatch count over to the next one."""
+
+    def __init__(self, show=SHOW, use_numpy=NUMPY_AVAILABLE):
+        self.show = show
+        self.use_numpy = use_numpy and NUMPY_AVAILABLE
+        self.compared = 0
+        self.mismatches = 0
+        self.first = None
+        self.shown = []   # (offset, line, column, byte a, byte b)
+        self.histogram = collections.Counter()  # bucket -> lines
+        self.lines = 0         # Lines finished so far
+        self.line_start = 0    # Offset of the open line
+        self.line_count = 0    # Mismatches on the open line so far
+
+    def add(self, a, b):
+        """Compare the next two equally long chunks"""
+        base = self.compared
+        self.compared += len(a)
+        if a == b:
+            newlines = a.count(b'\n')
+            if newlines:
+                self._close_lines([self.line_count], newlines - 1)
+                self.line_count = 0
+                self.line_start = base + a.rindex(b'\n') + 1
+            return
+        if self.use_numpy:
+            self._add_numpy(a, b, base)
+        else:
+            self._add_python(a, b, base)
+
+    def _add_numpy(self, a, b, base):
+        av = np.frombuffer(a, dtype=np.uint8)
+        diffs = np.flatnonzero(av != np.frombuffer(b, dtype=np.uint8))
+        newlines = np.flatnonzero(av == 10)
+        self._note(diffs, newlines, a, b, base)
+        # Mismatches per line: the line of position p is the number of
+        # newlines before it
+        per_line = np.bincount(np.searchsorted(newlines, diffs),
+                               minlength=len(newlines) + 1)
+        per_line[0] += self.line_count
+        if len(newlines):
+            # np.frexp's exponent is the bit length, i.e. the bucket
+            buckets = np.bincount(np.frexp(per_line[:-1])[1])
+            self.histogram.update({k: int(n) for k, n in enumerate(buckets) if n})
+            self.lines += len(newlines)
+            self.line_start = base + int(newlines[-1]) + 1
+        self.line_count = int(per_line[-1])
+
+    def _add_python(self, a, b, base):
+        diffs = []
+        for start in range(0, len(a), BLOCK):
+            end = start + BLOCK
+            if a[start:end] != b[start:end]:
+                diffs.extend(i for i in range(start, min(end, len(a))) if a[i] != b[i])
+        newlines = []
+        i = a.find(b'\n')
+        while i >= 0:
+            newlines.append(i)
+            i = a.find(b'\n', i + 1)
+        self._note(diffs, newlines, a, b, base)
+        per_line = collections.Counter(bisect.bisect_left(newlines, p) for p in diffs)
+        per_line[0] += self.line_count
+        last = len(newlines)
+        if last:
+            counted = [n for k, n in per_line.items() if k < last and n]
+            self._close_lines(counted, last - len(counted))
+            self.line_start = base + newlines[-1] + 1
+        self.line_count = per_line[last]
+
+    def _close_lines(self, counts, clean):
+        """Record finished lines: one per entry of counts (its mismatches),
+        plus clean lines without any"""
+        for n in counts:
+            self.histogram[n.bit_length()] += 1
+        self.histogram[0] += clean
+        self.lines += len(counts) + clean
+
+    def _note(self, diffs, newlines, a, b, base):
+        """Count a chunk's mismatches and list the first ones"""
+        if not len(diffs):
+            return
+        self.mismatches += len(diffs)
+        if self.first is None:
+            self.first = base + int(diffs[0])
+        for p in diffs[:max(self.show - len(self.shown), 0)]:
+            p = int(p)
+            k = bisect.bisect_left(newlines, p)
+            start = base + int(newlines[k - 1]) + 1 if k else self.line_start
+            self.shown.append((base + p, self.lines + k + 1, base + p - start + 1, a[p], b[p]))
+
+    def finish(self):
+        """Close the last line (if the file does not end with a newline)"""
+        if self.line_count or self.line_start < self.compared:
+            self._close_lines([self.line_count], 0)
+            self.line_count = 0
+            self.line_start = self.compared
+
+
+def compare_files(path_a, path_b, chunk_size=CHUNK, show=SHOW,
+                  ignore_case=False, use_numpy=NUMPY_AVAILABLE):
+    """Compare two files in one pass; returns (Comparison, len a, len b)"""
+    result = Comparison(show, use_numpy)
+    with mapped(path_a) as a, mapped(path_b) as b:
+        common = min(len(a), len(b))
+        for start in range(0, common, chunk_size):
+            end = min(start + chunk_size, common)
+            chunk_a, chunk_b = a[start:end], b[start:end]
+            if ignore_case:
+                chunk_a, chunk_b = chunk_a.translate(FOLD_CASE), chunk_b.translate(FOLD_CASE)
+            result.add(chunk_a, chunk_b)
+            release(a, start, end)
+            release(b, start, end)
+        result.finish()
+        return result, len(a), len(b)
+
+
+def print_report(result, name_a, name_b, len_a, len_b):
+    print(f"{name_a} length: {len_a:,}")
+    print(f"{name_b} length: {len_b:,}")
+    if len_a != len_b:
+        longer = name_a if len_a > len_b else name_b
+        print(f"Length difference: {abs(len_a - len_b):,} bytes "
+              f"({longer} is longer, the extra bytes are not compared)")
+
+    if result.shown:
+        print(f"\nDifferences (first {len(result.shown)}):")
+        for offset, line, column, p, d in result.shown:
+            print(f"  Position {offset} (line {line}, column {column}): "
+                  f"{chr(p)!r} != {chr(d)!r}")
+
+    print(f"\nTotal differences: {result.mismatches:,} of {result.compared:,} bytes")
+    if result.first is not None:
+        print(f"First mismatch at offset {result.first:,}")
+    elif len_a != len_b:
+        print(f"First difference at offset {result.compared:,} (end of the shorter file)")
+
+    if result.mismatches:
+        print(f"\nMismatches per line ({result.lines:,} lines of {name_a}):")
+        for bucket in sorted(result.histogram):
+            print(f"  {bucket_label(bucket):>11}: {result.histogram[bucket]:,} lines")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare a plaintext with its decryption, byte by byte")
+    parser.add_argument("a", nargs="?", default="plain", help="first file (default: plain)")
+    parser.add_argument("b", nargs="?", default="decrypt", help="second file (default: decrypt)")
+    parser.add_argument("--show", type=int, default=SHOW, metavar="N",
+                        help=f"list the first N differences (default: {SHOW})")
+    parser.add_argument("-i", "--ignore-case", action="store_true",
+                        help="treat capitals as lower case, as main.exe encrypts them")
+    parser.add_argument("--chunk", type=int, default=CHUNK, metavar="BYTES",
+                        help=f"bytes compared per step (default: {CHUNK:,})")
+    parser.add_argument("--no-numpy", action="store_true",
+                        help="use the pure-Python path even if NumPy is installed")
+    args = parser.parse_args(argv)
+    if args.chunk < 1:
+        parser.error("--chunk must be at least 1")
+
+    try:
+        result, len_a, len_b = compare_files(args.a, args.b, args.chunk, args.show,
+                                             args.ignore_case, not args.no_numpy)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print_report(result, args.a, args.b, len_a, len_b)
+    return 0 if result.mismatches == 0 and len_a == len_b else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
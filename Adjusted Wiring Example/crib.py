@@ -0,0 +1,637 @@
+"""
+Known-plaintext (crib) solver for the ENIGMA machine, the way a bombe does it
+Given a crib, a piece of plaintext known to sit at some offset of the
+ciphertext, finds the rotor orders, reflectors and start positions that can
+produce it, with the plugboard pairs the crib pins down, without trying
+plugboards at all.
+
+With P the plugboard and S_t the rotors and reflector at the state of
+character t (the scrambler), each character is P(S_t(P(x))). Both P and the
+reflector are involutions (the symmetry check_symmetry.py tests), so S_t
+is too and every crib letter p over cipher letter c gives P(c) = S_t(P(p))
+and P(p) = S_t(P(c)). The crib's letter pairs form the menu, a graph over
+letters; guessing P of one letter fixes P of every letter joined to it, and
+a loop in the menu or a letter getting two partners rejects the guess. The
+plugboard's symmetry adds more (P(a) = x means P(x) = a, Welchman's diagonal
+board). A rotor state is rejected when all N guesses for the menu's root
+are. With 69 characters every reflector has exactly one fixed point, so
+each state enciphers exactly one letter to itself (unlike the 26-letter
+machine, which never does): a crib letter over itself is a loop that pins
+its plug to the scrambler's fixed point.
+
+- The search runs over the rotor state the crib starts from, so one pass
+  serves every --offset tried; survivors are walked back to the message's
+  start windows, their plugboards completed from the set's and the crib
+  decrypted with the result.
+- Scramblers are cached per rotor state: with NumPy all N**3 of them are
+  one table per rotor order (a fourth rotor falls back to composing the
+  tables of keysearch.inner_table), without it Scrambler keeps them in
+  CachedEnigma's LRU.
+- With NumPy a block of states is tested against all N root guesses at
+  once, on the menu's largest piece; the few that survive go through the
+  full propagation above.
+
+Longer cribs give more loops and fewer false stops. --bench times the
+three methods on the same sample of states of the first rotor order:
+naive trial decryption, the pure-Python bombe and the NumPy bombe. Per
+position tested the bombe is not faster. The NumPy one rejects about as
+many positions per second as trial decryption, and the pure-Python one
+about a tenth as many. But trial decryption only gets that rate because
+it is handed the plugboard. With the plugboard unknown it would have to
+try every plugboard at every position (plugboard_count(N) of them, about
+7 * 10**51 for 69 characters), and the bench prints that cost too. The bombe
+finds the plugboard pairs as it goes.
+
+Usage:
+  python crib.py encrypt --crib "the enigma machine"             (crib at the start)
+  python crib.py encrypt --crib "the enigma machine" --offset 0-200 --rotor-set 1-5
+  python crib.py encrypt --crib "the enigma machine" --bench
+"""
+
+import argparse
+import collections
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from enigma import (DEFAULT_WIRING, NCHARS, CachedEnigma, Enigma, load_machine, next_state,
+                    plug_table, walk_states)
+from keysearch import (esetup_text, format_duration, inner_table, parse_numbers,
+                       plugboard_pairs, read_codes)
+from wiring_check import check_plugboard
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # Every state and guess goes through propagate()
+
+BLOCK = 4096          # Crib start states tested together (NumPy)
+VERIFY_LIMIT = 1000   # Stops walked back and decrypted
+BENCH_SAMPLE = 20000  # States timed per method by --bench
+TOP = 10              # Keys reported
+
+
+# ===========================
+# MENU
+# ===========================
+
+class Menu:
+    """The letter pairs of a crib at one offset of the ciphertext
+    links maps a letter to its (other letter, crib position) pairs. program
+    is the NumPy test of the largest piece of the menu, in the order that
+    closes loops soonest:
+      ("assign", a, b, i, earlier)  P(b) = S_i(P(a)); earlier letters must
+                                    keep P one-to-one and symmetrical
+      ("check", a, b, i)            P(b) == S_i(P(a)) or the guess fails"""
+
+    def __init__(self, crib, cipher, offset):
+        self.offset = offset
+        self.crib = crib
+        self.cipher = cipher
+        self.links = collections.defaultdict(list)
+        for i, (a, b) in enumerate(zip(crib, cipher)):
+            self.links[a].append((b, i))
+            self.links[b].append((a, i))
+
+        # Pieces of the menu; the one with the most pairs is searched
+        pieces = []
+        seen = set()
+        for letter in self.links:
+            if letter in seen:
+                continue
+            piece, todo = {letter}, [letter]
+            while todo:
+                for b, _ in self.links[todo.pop()]:
+                    if b not in piece:
+                        piece.add(b)
+                        todo.append(b)
+            seen |= piece
+            pieces.append(piece)
+        self.pieces = len(pieces)
+        piece = max(pieces, key=lambda p: sum(a in p for a in crib))
+        self.root = max(sorted(piece), key=lambda a: len(self.links[a]))
+        self.letters = len(piece)
+        self.program = self._compile(piece)
+        self.loops = sum(op[0] == "check" for op in self.program)
+
+    def _compile(self, piece):
+        program = []
+        assigned = [self.root]
+        pending = [i for i, a in enumerate(self.crib) if a in piece]
+        while pending:
+            for i in list(pending):
+                a, b = self.crib[i], self.cipher[i]
+                if a in assigned and b in assigned:
+                    program.append(("check", a, b, i))
+                    pending.remove(i)
+            if not pending:
+                break
+
+            # The new letter with the most pairs into the assigned ones
+            def closes(i):
+                a, b = self.crib[i], self.cipher[i]
+                new = b if a in assigned else a
+                return sum(c in assigned for c, _ in self.links[new])
+
+            i = max((i for i in pending
+                     if (self.crib[i] in assigned) != (self.cipher[i] in assigned)), key=closes)
+            a, b = self.crib[i], self.cipher[i]
+            known, new = (a, b) if a in assigned else (b, a)
+            program.append(("assign", known, new, i, tuple(assigned)))
+            assigned.append(new)
+            pending.remove(i)
+        return program
+
+
+def propagate(menu, tables, letter, partner):
+    """Plugboard implied by P(letter) = partner, or None if it contradicts itself
+    tables[i] is the scrambler at crib position i. Returns {letter: partner}
+    holding both directions of every pair found."""
+    plug = {letter: partner, partner: letter}
+    # Diagonal board: partner is plugged to letter, so its own pairs follow too
+    todo = [letter, partner]
+    links = menu.links
+    while todo:
+        a = todo.pop()
+        x = plug[a]
+        for b, i in links.get(a, ()):
+            y = tables[i][x]
+            if b in plug:
+                if plug[b] != y:
+                    return None
+            elif y in plug:
+                return None  # y already has another partner
+            else:
+                plug[b] = y
+                plug[y] = b
+                todo.append(b)
+                todo.append(y)
+    return plug
+
+
+def previous_states(state, notches, n=NCHARS):
+    """Rotor states one turn() before state: none, one or (double stepping) two"""
+    if not state:
+        return [state]
+    options = [((state[0] - 1) % n,)] + [(p, (p - 1) % n) for p in state[1:]]
+    return [s for s in itertools.product(*options) if next_state(s, notches, n) == state]
+
+
+def rewind(state, notches, k, n=NCHARS):
+    """Start states that reach state after k turn()s"""
+    states = {tuple(state)}
+    for _ in range(k):
+        states = {p for s in states for p in previous_states(s, notches, n)}
+    return sorted(states)
+
+
+# ===========================
+# SCRAMBLERS
+# ===========================
+
+class Scrambler(CachedEnigma):
+    """CachedEnigma over alphabet indices with the plugboard left out
+    state_table(state) is the scrambler at that rotor state, cached in the
+    same LRU as CachedEnigma's tables."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.entry = self.exit = bytes(range(256))
+
+
+def scrambler_table(machine, inner):
+    """Scrambler of every state of up to three rotors as one flat table
+    Entry ((key * N) + p1) * N + x, key being the inner position of inner
+    (keysearch.inner_table); None for four rotors (N**5 bytes)."""
+    m = len(machine.rotors)
+    if m > 3:
+        return None
+    N = machine.alphabet.size
+    W = N + 1
+    first = np.array(machine.rotors[0].forward, dtype=np.uint8)[:, :N]    # [p1, x]
+    back = np.array(machine.rotors[0].backward, dtype=np.uint8)           # [p1, n]
+    inner = inner.reshape(-1, W)
+    keys = np.arange(N ** (m - 1), dtype=np.intp)
+    n = inner[keys[:, None, None], first[None, :, :]]                     # [key, p1, x]
+    return back[np.arange(N)[:, None], n].ravel()
+
+
+# ===========================
+# SEARCH TASKS
+# ===========================
+
+class CribJob:
+    """Everything a worker needs: wiring set, ciphertext, crib and its menus"""
+
+    def __init__(self, wiring, codes, crib, offsets, top=TOP):
+        self.wiring = wiring
+        self.codes = codes
+        self.crib = list(crib)
+        self.offsets = sorted(set(offsets))
+        self.top = top
+        self.size = wiring.alphabet.size
+        if len(self.crib) < 2:
+            raise ValueError("The crib needs at least two characters in the alphabet")
+        end = self.offsets[-1] + len(self.crib)
+        if self.offsets[0] < 0 or end > len(codes):
+            raise ValueError(f"The crib at offset {self.offsets[-1]} runs past the "
+                             f"{len(codes)} ciphertext characters")
+        menus = [Menu(self.crib, list(codes[k:k + len(self.crib)]), k) for k in self.offsets]
+        # Without a loop every guess holds and every position stops
+        self.menus = [menu for menu in menus if menu.loops]
+        self.skipped = [menu.offset for menu in menus if not menu.loops]
+        if not self.menus:
+            raise ValueError("The crib's menu has no loops at any offset; use a longer crib")
+        self.offsets = [menu.offset for menu in self.menus]
+
+    def machine(self, order, reflector, cls=Enigma, positions=None, plugboard=None):
+        """Machine with this rotor order and reflector"""
+        rotors = [self.wiring.get_rotor(n) for n in order]
+        positions = positions or [0] * len(order)
+        windows = "".join(r.wiring[p] for r, p in zip(rotors, positions))
+        return cls(order, windows, reflector, plugboard=plugboard, wiring=self.wiring)
+
+    def ciphertext(self):
+        """The ciphertext as characters, ready for _encrypt_run"""
+        return self.codes.translate(self.wiring.alphabet.output.ljust(256, b'\0'))
+
+
+def state_of(k, m, n):
+    """Rotor state number k (rotor 1 fastest, as the NumPy blocks count)"""
+    return tuple(k // n ** j % n for j in range(m))
+
+
+_job = None  # Set once per worker process
+
+
+def _init_worker(job):
+    """Pool initializer: install the crib job in the worker"""
+    global _job
+    _job = job
+
+
+def _solve_task(task):
+    """Worker task: test every crib start state of one order and reflector
+    Returns (task, states tested, stops [(offset, state, root partner)])."""
+    order, reflector = task
+    if NUMPY_AVAILABLE:
+        tested, stops = _solve_numpy(_job, order, reflector)
+    else:
+        tested, stops = _solve_python(_job, order, reflector)
+    return task, tested, stops
+
+
+def _solve_python(job, order, reflector, states=None):
+    """Every state and root guess through propagate()"""
+    machine = job.machine(order, reflector, Scrambler)
+    N = job.size
+    m = len(order)
+    L = len(job.crib)
+    if states is None:
+        states = (state_of(k, m, N) for k in range(N ** m))
+    tested = 0
+    stops = []
+    for state in states:
+        tested += 1
+        walk = itertools.islice(walk_states(state, machine.notches, N), L)
+        tables = [machine.state_table(s) for s in walk]
+        for menu in job.menus:
+            for x in range(N):
+                if propagate(menu, tables, menu.root, x) is not None:
+                    stops.append((menu.offset, state, x))
+    return tested * len(job.menus), stops
+
+
+def _solve_numpy(job, order, reflector, limit=None):
+    """Blocks of states against every root guess at once; survivors are
+    confirmed by propagate()"""
+    machine = job.machine(order, reflector)
+    scrambler = None
+    N = job.size
+    W = N + 1
+    m = len(order)
+    L = len(job.crib)
+    rotors = machine.rotors
+    first = np.array(rotors[0].forward, dtype=np.uint8).ravel()
+    back = np.array(rotors[0].backward, dtype=np.uint8).ravel()
+    inner = inner_table(machine)
+    table = scrambler_table(machine, inner)
+    notch = [-1 if n is None else n for n in machine.notches]
+    total = N ** m if limit is None else min(limit, N ** m)
+
+    def scramble(p1, key, x):
+        if table is not None:
+            return table[(key * N + p1) * N + x]
+        return back[p1 * W + inner[key * W + first[p1 * W + x]]]
+
+    stops = []
+    for begin in range(0, total, BLOCK):
+        ids = np.arange(begin, min(begin + BLOCK, total), dtype=np.intp)
+        pos = [ids // N ** j % N for j in range(m)]
+        # Rotor 1 and inner positions at each crib character
+        p1s, keys = [], []
+        for _ in range(L):
+            # turn(): every test looks at the positions before anything moves
+            at = [p == n for p, n in zip(pos, notch)]
+            if m > 3:
+                pos[3] = (pos[3] + at[2]) % N
+            if m > 2:
+                pos[2] = (pos[2] + at[1]) % N
+            if m > 1:
+                pos[1] = (pos[1] + (at[0] | at[1])) % N
+            pos[0] = (pos[0] + 1) % N
+            key = 0
+            for p in pos[1:]:
+                key = key * N + p
+            p1s.append(pos[0])
+            keys.append(np.broadcast_to(key, ids.shape))
+
+        for menu in job.menus:
+            s = np.repeat(np.arange(len(ids), dtype=np.intp), N)
+            values = {menu.root: np.tile(np.arange(N, dtype=np.intp), len(ids))}
+            for op in menu.program:
+                kind, a, b, i = op[:4]
+                out = scramble(p1s[i][s], keys[i][s], values[a])
+                if kind == "check":
+                    keep = out == values[b]
+                else:
+                    # P stays one-to-one, and P(b) = c exactly when P(c) = b
+                    keep = np.ones(len(s), dtype=bool)
+                    for c in op[4]:
+                        keep &= (out != values[c]) & ((out == c) == (values[c] == b))
+                    values[b] = out
+                s = s[keep]
+                values = {c: v[keep] for c, v in values.items()}
+                if not len(s):
+                    break
+            if not len(s):
+                continue
+            # The rest of the menu and the diagonal board, one guess at a time
+            if scrambler is None:
+                scrambler = job.machine(order, reflector, Scrambler)
+            for j, x in zip(s.tolist(), values[menu.root].tolist()):
+                state = state_of(int(ids[j]), m, N)
+                walk = itertools.islice(walk_states(state, machine.notches, N), L)
+                tables = [scrambler.state_table(st) for st in walk]
+                if propagate(menu, tables, menu.root, x) is not None:
+                    stops.append((menu.offset, state, x))
+    return total * len(job.menus), stops
+
+
+def _trial_decrypt(job, order, reflector, states):
+    """Naive baseline: decrypt the crib's ciphertext from each state with
+    the set's plugboard and compare"""
+    machine = job.machine(order, reflector)
+    text = job.ciphertext()
+    crib = bytes(job.wiring.alphabet.output[c] for c in job.crib)
+    tested = 0
+    stops = []
+    for state in states:
+        for k in job.offsets:
+            tested += 1
+            machine.positions = list(state)
+            if machine._encrypt_run(text[k:k + len(crib)]) == crib:
+                stops.append((k, state, None))
+    return tested, stops
+
+
+# ===========================
+# STOPS TO KEYS
+# ===========================
+
+def complete_plugboard(plug, base, size):
+    """Plugboard with the pairs found, the set's plugboard elsewhere
+    Partners of newly plugged letters are left unplugged."""
+    board = list(base[:size])
+    for a, x in plug.items():
+        if board[a] == x:
+            continue
+        board[board[a]] = board[a]
+        board[board[x]] = board[x]
+        board[a], board[x] = x, a
+    return board
+
+
+def stop_keys(job, order, reflector, offset, state, partner):
+    """Keys for one stop: [(crib characters matched, pairs found, order,
+    reflector, windows, plugboard, offset)], one per start state"""
+    alphabet = job.wiring.alphabet
+    N = job.size
+    menu = job.menus[job.offsets.index(offset)]
+    scrambler = job.machine(order, reflector, Scrambler)
+    walk = itertools.islice(walk_states(state, scrambler.notches, N), len(job.crib))
+    plug = propagate(menu, [scrambler.state_table(s) for s in walk], menu.root, partner)
+    if plug is None:
+        return []
+    base = plug_table(job.wiring.plugboard, alphabet)
+    board = "".join(alphabet.chars[n] for n in complete_plugboard(plug, base, N))
+    crib = bytes(alphabet.output[c] for c in job.crib)
+    text = job.ciphertext()[offset:offset + len(job.crib)]
+    keys = []
+    for start in rewind(state, scrambler.notches, offset, N):
+        machine = job.machine(order, reflector, positions=list(start), plugboard=board)
+        machine.seek(offset)
+        matched = sum(a == b for a, b in zip(machine._encrypt_run(text), crib))
+        keys.append((matched, len(plug) // 2, list(order), reflector,
+                     "".join(machine.start_windows), board, offset))
+    return keys
+
+
+def print_results(job, keys):
+    """Ranked keys with their esetup file and the start of the decryption"""
+    alphabet = job.wiring.alphabet
+    base = "".join(job.wiring.plugboard)
+    for rank, (matched, pairs, order, reflector, windows, board, offset) in enumerate(keys, 1):
+        machine = Enigma(order, windows, reflector, plugboard=board, wiring=job.wiring)
+        preview = machine._encrypt_run(job.ciphertext()[:60]).decode('latin-1')
+        setup = esetup_text(order, windows, reflector, plugboard_pairs(board, base, alphabet))
+        print(f"#{rank}  crib {matched}/{len(job.crib)} at offset {offset}  rotors {order}  "
+              f"windows {windows!r}  reflector {reflector}  ({pairs} plugs found)")
+        print(f"    {preview!r}")
+        if setup is None:
+            print(f"    plugboard {board!r}")
+        else:
+            print("    esetup: " + "\n    ".join(setup.splitlines()))
+
+
+# ===========================
+# DRIVER
+# ===========================
+
+def solve(job, tasks, workers=1, progress=None):
+    """Run the tasks (over a pool if workers > 1); returns (states tested,
+    stops [(order, reflector, offset, state, root partner)]).
+    progress(tasks done, states tested) is called after each task."""
+    tested = 0
+    stops = []
+
+    def finish(result):
+        nonlocal tested
+        (order, reflector), count, found = result
+        tested += count
+        stops.extend((order, reflector) + stop for stop in found)
+        if progress:
+            progress(done, tested)
+
+    done = 0
+    if workers <= 1:
+        _init_worker(job)
+        for task in tasks:
+            done += 1
+            finish(_solve_task(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(job,)) as pool:
+            futures = [pool.submit(_solve_task, task) for task in tasks]
+            try:
+                for future in as_completed(futures):
+                    done += 1
+                    finish(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    return tested, stops
+
+
+def plugboard_count(n):
+    """Plugboards of n letters, any number of pairs (involutions of n)"""
+    a, b = 1, 1
+    for k in range(2, n + 1):
+        a, b = b, b + (k - 1) * a
+    return b if n else 1
+
+
+def bench(job, order, reflector, sample=BENCH_SAMPLE):
+    """Positions rejected per second by each method, on the same first
+    sample states of one order and reflector"""
+    m = len(order)
+    N = job.size
+    states = [state_of(k, m, N) for k in range(min(sample, N ** m))]
+    methods = [("naive trial decryption (plugboard known)",
+                lambda: _trial_decrypt(job, order, reflector, states)),
+               ("bombe, pure Python", lambda: _solve_python(job, order, reflector, states))]
+    if NUMPY_AVAILABLE:
+        methods.append(("bombe, NumPy",
+                        lambda: _solve_numpy(job, order, reflector, len(states))))
+    rates = []
+    for name, run in methods:
+        start = time.perf_counter()
+        tested, stops = run()
+        elapsed = time.perf_counter() - start
+        stopped = len({(k, s) for k, s, _ in stops})
+        rates.append((tested - stopped) / elapsed)
+        print(f"{name:>42}: {rates[-1]:>12,.0f} positions rejected/s  "
+              f"({tested:,} tested, {stopped:,} stops, {elapsed:.2f} s)")
+    boards = plugboard_count(N)
+    print(f"{'naive trial decryption (plugboard unknown)':>42}: {rates[0] / boards:>12.1e} "
+          f"positions rejected/s  ({boards:.1e} plugboards to try per position)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Known-plaintext (crib) solver: rotor order, reflector, start "
+                    "positions and plugboard pairs")
+    parser.add_argument("ciphertext", nargs="?", default="encrypt",
+                        help="ciphertext file (default: encrypt)")
+    parser.add_argument("--crib", required=True, help="known plaintext")
+    parser.add_argument("--offset", default="0",
+                        help="offsets to try, in alphabet characters (default: 0)")
+    parser.add_argument("--machine", metavar="FILE",
+                        help="wirings from a machine file instead of main.cpp's")
+    parser.add_argument("-m", "--rotors", type=int, default=3, choices=(1, 2, 3, 4),
+                        help="rotors in the machine (default: 3)")
+    parser.add_argument("--rotor-set", default="1-10",
+                        help="rotor numbers to choose from (default: 1-10)")
+    parser.add_argument("--reflectors", default="1-4",
+                        help="reflector numbers to try (default: 1-4)")
+    parser.add_argument("--top", type=int, default=TOP,
+                        help=f"keys to report (default: {TOP})")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--bench", action="store_true",
+                        help="time the solver against trial decryption on the first "
+                             "rotor order and stop")
+    args = parser.parse_args(argv)
+
+    try:
+        wiring = load_machine(args.machine) if args.machine else DEFAULT_WIRING
+        alphabet = wiring.alphabet
+        codes = read_codes(args.ciphertext, alphabet)
+        crib = [alphabet.input_index.get(c, alphabet.size) for c in args.crib]
+        if alphabet.size in crib:
+            bad = args.crib[crib.index(alphabet.size)]
+            raise ValueError(f"Crib character {bad!r} is not in the alphabet")
+        # The menu only holds if the plugboard and reflectors are involutions
+        errors = check_plugboard(wiring.plugboard, alphabet.chars)
+        if errors:
+            raise ValueError("The plugboard is not symmetrical: " + errors[0])
+        reflectors = parse_numbers(args.reflectors)
+        if any(not 0 <= r < len(wiring.reflectors) for r in reflectors):
+            raise ValueError(f"{wiring.name} has reflectors 0-{len(wiring.reflectors) - 1}")
+        for r in reflectors:
+            errors = check_plugboard(wiring.reflectors[r], alphabet.chars)
+            if errors:
+                raise ValueError(f"Reflector {r} is not symmetrical: {errors[0]}")
+        rotor_set = parse_numbers(args.rotor_set)
+        for n in rotor_set:
+            wiring.get_rotor(n)  # ValueError for numbers the set does not have
+        job = CribJob(wiring, codes, crib, parse_numbers(args.offset), args.top)
+        tasks = [(order, r) for order in itertools.permutations(rotor_set, args.rotors)
+                 for r in reflectors]
+        if not tasks:
+            raise ValueError(f"--rotor-set needs at least {args.rotors} rotors "
+                             f"and --reflectors at least one reflector")
+
+        menu = job.menus[0]
+        print(f"Crib of {len(crib)} characters, menu at offset {menu.offset}: "
+              f"{menu.letters} letters and {menu.loops} loops in its largest piece "
+              f"(of {menu.pieces})", file=sys.stderr)
+        if job.skipped:
+            print(f"Skipping {len(job.skipped):,} offsets where the menu has no loops",
+                  file=sys.stderr)
+        if args.bench:
+            bench(job, *tasks[0])
+            return 0
+
+        per_task = alphabet.size ** args.rotors * len(job.offsets)
+        print(f"Testing {len(tasks):,} rotor orders/reflectors x {per_task:,} crib "
+              f"positions ({'NumPy' if NUMPY_AVAILABLE else 'pure Python'})", file=sys.stderr)
+        start = time.perf_counter()
+        rate = 0
+
+        def progress(done, tested):
+            nonlocal rate
+            rate = tested / (time.perf_counter() - start)
+            left = (len(tasks) - done) * per_task / rate
+            print(f"\r{done:,} of {len(tasks):,} tasks, {rate:,.0f} positions/s, "
+                  f"{format_duration(left)} left ", end="", file=sys.stderr)
+
+        tested, stops = solve(job, tasks, args.workers, progress)
+        stopped = len({stop[:4] for stop in stops})
+        print(file=sys.stderr)
+        print(f"{tested - stopped:,} of {tested:,} positions rejected "
+              f"({rate:,.0f}/s), {stopped:,} stops", file=sys.stderr)
+        if len(stops) > VERIFY_LIMIT:
+            print(f"Only the first {VERIFY_LIMIT:,} stops are checked; a longer crib "
+                  f"gives fewer", file=sys.stderr)
+
+        keys = []
+        for stop in stops[:VERIFY_LIMIT]:
+            keys.extend(stop_keys(job, *stop))
+        keys.sort(key=lambda key: (-key[0], -key[1]))
+        print_results(job, keys[:args.top])
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1477 @@
+"""
+ENIGMA engine for Python
+Same machine as main.cpp: wirings, turn() double stepping, NOTCH handling,
+esetup format and plain -> encrypt -> decrypt output are reproduced byte
+for byte, so the helper scripts can encrypt without compiling main.exe.
+
+Instead of main.cpp's linear index() scans, characters are looked up in
+an Alphabet (a 256-entry byte table, or a dict for wider alphabets), and
+every rotor gets forward (RtoLpath) and inverse (LtoRpath) substitution
+tables for all offsets up front, so one character costs a few list
+lookups per rotor. Characters outside the alphabet are enciphered the way
+main.cpp does by default; --unknown passthrough copies them unchanged.
+
+Usage:
+  python enigma.py                       (like main.exe: plain -> encrypt -> decrypt)
+  python enigma.py -i notes.txt -o notes.enc --setup esetup
+  python enigma.py --cached -i big.txt   (per-state tables, for long messages)
+  python enigma.py --stream -i - -o - < big.txt > big.enc --trace elog --trace-every 1000
+  python enigma.py --stream -w 4 -i big.txt -o big.enc   (shards over 4 processes)
+  python enigma.py --machine spare.machine              (other wirings, no recompiling)
+  python enigma.py --unknown passthrough -i notes.txt   (tabs, UTF-8 etc. left alone)
+
+  from enigma import Enigma
+  machine = Enigma(rotors=(1, 2, 3), windows="aaa", reflector=1)
+  ciphertext = machine.encrypt_text("hello world")
+"""
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from operator import getitem
+
+from wiring_check import check_machine, decode_text, parse_config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # encrypt_batch falls back to one message at a time
+
+# ===========================
+# MACHINE DEFINITION (from main.cpp)
+# ===========================
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789.,:; ()[]'\"-+/*&~`!@#$%^_={}|\\<>?"
+NCHARS = len(ALPHABET)  # 69
+NLINE = 255             # fgets() buffer in ProcessPlainText
+MAX_ROTORS = 4
+
+ROTOR = [
+    # input alphabet ("rotor" 0, not used)
+    ALPHABET,
+    # rotor 1
+    "(etazr'=in/%_m?b!c<#s42&{y;u\"80[7`k]d@j.)}o+-:3w lh>x9pf~qv5g|^6,*\\1$",
+    # rotor 2
+    "w\"on,&`9hs$gu[=k3'p0:q!5;.*{/fiex+]~ya>|d%7b#\\_t}vm)r@2-l8<z6c(?4j 1^",
+    # rotor 3
+    ">t\"6+8/eu@;}yi&m*24#_n5-%`,?a(h:!rzb[jk l7w'pd9]^sv3q{).cf$gx=0<o\\|~1",
+    # rotor 4
+    "ae7o(yk-^}*5u)di8']fqb,~r063[m`$1!/l9wvhg{js:#n2z>tc@|=_+.;&<% \"\\?p4x",
+    # rotor 5
+    "$t<l4&r`7wk-]} %y,o!iq.9^*e0jvzs_:b8{mx5+|f()[1'c=?/h>63au~\"#g\\;2d@pn",
+    # rotor 6
+    "@ckmv=,wy(i`rz5+?]~>\\$)1![-n^u}0tq8_'9h/dj%ep:4gx2 7.|a<&6fo*b\";#sl{3",
+    # rotor 7
+    "d]_ifj~u@rkax>1v-!{\"6* .}:b;)8'(c\\0zgo^,/4&=hq3w<m$#n9y[%52et?l+s|p`7",
+    # rotor 8
+    "|#p4h.x}e9i~tvc,{'<w*:]-0>^b2`l\\on@$)&57au8+(yrqs;m1z3\"g!=jd6k[f% /?_",
+    # rotor 9 (beta)
+    "v.wze\" `ml'{qc;u-81:#s2h3f*)?%a,&=g+7]kb_r$}^i/(!\\p@o>d<~9j[0t5nx|4y6",
+    # rotor 10 (gamma)
+    "u\\={.!)z4?cg/pxi,;ad2#1[t(wv:5<h6@l>&`9f$38q%\"s*mok}bnr|~7] ^_ey+-j0'",
+]
+
+# Position in which each rotor causes its left neighbor to turn
+NOTCH = ['z', 'm', 'r', 'f', 'w', 'k', 'p', 'l', 'n', 'd', 'g']
+
+REFLECTOR = [
+    # input alphabet ("reflector" 0, not used)
+    ALPHABET,
+    # reflector B, thick
+    "q8ercj}ltfnh&k2;aduisy 'v\"{4o#1%9=b6$~^pw]@\\(xz`+?<m,-|)3.5:>70g![*_/",
+    # reflector C, thick
+    "~$g7&4c3;xyq'[6tl vp|s.jk1%z?hf)od>_w\\/ir^5n\"m]#+:!ea{*=-b0(9@`<u,}82",
+    # reflector B, dunn
+    "l]n?58v*my+aic<0-.z|9g@>jsp/ `)e\"=fur{&$2^4'b[6qk1h:}3#w!;\\(_7,~t%oxd",
+    # reflector C, dunn
+    "^_1@%m6p/0*{fu<h) x\"n3:s5+jc}v[yg-|(]&w#r9q4.'t7zik,!?~d;=eab$l28>o\\`",
+]
+
+# esetup reflector letters (anything else selects 0, as in main.cpp)
+REFLECTOR_CODES = {'t': 0, 'b': 1, 'c': 2, 'B': 3, 'C': 4}
+
+PLUGBOARD = "badcfehgjilknmporqtsvuxwzy1032546789.,:; ()[]'\"-+/*&~`!@#$%^_={}|\\<>?"
+
+
+# ===========================
+# LOOKUP TABLES
+# ===========================
+# Index size (69 for main.cpp's alphabet) stands for every character
+# outside the alphabet, like the value main.cpp's index() returns for them.
+# In main.cpp that index reads the '\0' terminator of plugboard/reflector,
+# so the tables carry one extra entry and output maps it back to '\0'.
+
+UNKNOWN_POLICIES = ("cpp", "passthrough", "reject")
+KNOWN_RUN = re.compile(rb'\x01+')
+
+
+class Alphabet:
+    """The characters a machine enciphers, with O(1) lookups both ways
+    char_index maps each character to its index. input_index adds the
+    capitals of lower-case letters that are not in the alphabet themselves,
+    folded the way ProcessPlainText folds them before encrypting. For
+    single-byte alphabets (every code point below 256, bytes read as
+    Latin-1) byte_index is input_index as a 256-entry list, which the hot
+    loops use, and output turns indices back into bytes; both are None for
+    wider alphabets, which only encrypt_text handles.
+
+    unknown says what happens to characters that are still not in it:
+      cpp          enciphered as index size, as main.cpp does (the default)
+      passthrough  copied unchanged; the rotors do not step for them
+      reject       ValueError naming the first one"""
+
+    def __init__(self, chars, unknown="cpp"):
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError("Unknown-character policy must be one of "
+                             + ", ".join(UNKNOWN_POLICIES))
+        if len(set(chars)) != len(chars) or not chars:
+            raise ValueError(f"Alphabet characters must be distinct: {chars!r}")
+        self.chars = chars
+        self.size = len(chars)
+        self.unknown = unknown
+        self.char_index = {c: i for i, c in enumerate(chars)}
+        self.input_index = dict(self.char_index)
+        for c, i in self.char_index.items():
+            upper = c.upper()
+            if len(upper) == 1 and upper != c and upper not in self.char_index:
+                self.input_index[upper] = i
+        self.text_output = chars + '\0'
+        self.ascii = chars.isascii()
+        self.byte_index = self.output = None
+        if max(map(ord, chars)) < 256:
+            self.byte_index = [self.input_index.get(chr(b), self.size) for b in range(256)]
+            self.output = chars.encode('latin-1') + b'\0'
+            # known -> 1, unknown -> 0, and the unknown bytes, for screen()
+            self._mask = bytes(int(n < self.size) for n in self.byte_index)
+            self._unknown_bytes = bytes(b for b in range(256) if self.byte_index[b] == self.size)
+
+    def __repr__(self):
+        return f"Alphabet({self.chars!r}, unknown={self.unknown!r})"
+
+    def __reduce__(self):
+        return (Alphabet, (self.chars, self.unknown))
+
+    def with_unknown(self, unknown):
+        """The same alphabet under another unknown policy"""
+        return self if unknown == self.unknown else Alphabet(self.chars, unknown)
+
+    def index(self, c):
+        """Index of c, size if it is not in the alphabet"""
+        return self.char_index.get(c, self.size)
+
+    def screen(self, data):
+        """Apply the unknown policy to bytes before they reach the rotors
+        Returns (run, spans): run is what gets enciphered and spans the
+        (start, end) slices of data it was taken from, None if run is all
+        of data. Costs two translate()s when data holds unknown bytes and
+        one otherwise, nothing at all under cpp."""
+        if self.byte_index is None:
+            raise ValueError("Bytes need a single-byte alphabet; use encrypt_text")
+        if self.unknown == "cpp" or not data:
+            return data, None
+        data = bytes(data)
+        mask = data.translate(self._mask)
+        bad = mask.find(0)
+        if bad < 0:
+            return data, None
+        if self.unknown == "reject":
+            raise ValueError(f"Character {chr(data[bad])!r} at offset {bad} "
+                             f"is not in the alphabet")
+        spans = [match.span() for match in KNOWN_RUN.finditer(mask)]
+        return data.translate(None, self._unknown_bytes), spans
+
+    @staticmethod
+    def restore(data, enc, spans):
+        """Put the enciphered run back around the passed-through bytes"""
+        if spans is None:
+            return enc
+        out = bytearray(data)
+        k = 0
+        for start, end in spans:
+            out[start:end] = enc[k:k + end - start]
+            k += end - start
+        return bytes(out)
+
+
+DEFAULT_ALPHABET = Alphabet(ALPHABET)
+CHAR_INDEX = DEFAULT_ALPHABET.char_index
+OUTPUT = DEFAULT_ALPHABET.output
+
+
+def index(c):
+    """Alphabet index of c, NCHARS if it is not in the alphabet"""
+    return CHAR_INDEX.get(c, NCHARS)
+
+
+# byte -> alphabet index, with ASCII capitals folded to lower case the
+# way ProcessPlainText does before encrypting
+BYTE_INDEX = DEFAULT_ALPHABET.byte_index
+
+
+class Rotor:
+    """One rotor wiring with substitution tables for all offsets
+    forward[p] and backward[p] are RtoLpath and LtoRpath for a rotor at
+    wiring position p (main.cpp's RotPos), as lists indexed by input."""
+
+    def __init__(self, wiring, notch, alphabet=DEFAULT_ALPHABET):
+        if sorted(wiring) != sorted(alphabet.chars):
+            raise ValueError(f"Rotor wiring is not a permutation of the alphabet: {wiring!r}")
+        self.wiring = wiring
+        self.notch = notch
+        N = alphabet.size
+        wired = [alphabet.char_index[c] for c in wiring]
+        inverse = [0] * N
+        for k, n in enumerate(wired):
+            inverse[n] = k
+
+        by_offset_fwd = []
+        by_offset_bwd = []
+        for offset in range(N):
+            fwd = [(wired[(n + offset) % N] - offset) % N for n in range(N)]
+            bwd = [(inverse[(n + offset) % N] - offset) % N for n in range(N)]
+            # Index N wraps round to 0, as mod(n + offset) does in main.cpp
+            by_offset_fwd.append(fwd + fwd[:1])
+            by_offset_bwd.append(bwd + bwd[:1])
+
+        # The offset at wiring position p is the alphabet index of wiring[p]
+        self.forward = [by_offset_fwd[n] for n in wired]
+        self.backward = [by_offset_bwd[n] for n in wired]
+        # The same tables as bytes.translate() tables, for CachedEnigma
+        # (None when the indices do not fit in a byte)
+        self.forward_bytes = self.backward_bytes = None
+        if N < 256:
+            self.forward_bytes = [bytes(t).ljust(256, b'\0') for t in self.forward]
+            self.backward_bytes = [bytes(t).ljust(256, b'\0') for t in self.backward]
+        # Wiring position showing the notch character (None: never turns over)
+        self.notch_pos = wiring.index(notch) if notch and notch in wiring else None
+
+    def position_of(self, window):
+        """Wiring position that shows window, as SetRotorPositions finds it"""
+        if window not in self.wiring:
+            raise ValueError(f"Window character {window!r} is not on the rotor")
+        return self.wiring.index(window)
+
+
+class WiringSet:
+    """One set of rotors (with notches), reflectors and plugboard
+    Entry 0 of rotors and reflectors is the input alphabet, as in main.cpp,
+    so esetup's rotor and reflector numbers index them directly. Rotor
+    tables are built on first use and kept with the set; digest identifies
+    the set's content (see load_machine). alphabet is the character string
+    all of them permute; the set keeps it as an Alphabet."""
+
+    def __init__(self, rotors, notches, reflectors, plugboard=PLUGBOARD,
+                 alphabet=ALPHABET, name="main.cpp"):
+        if len(notches) != len(rotors):
+            raise ValueError(f"{len(notches)} notches for {len(rotors)} rotors")
+        self.rotor_wirings = tuple(rotors)
+        self.notch_chars = tuple(notches)
+        self.reflectors = tuple(reflectors)
+        self.plugboard = plugboard
+        self.alphabet = DEFAULT_ALPHABET if alphabet == ALPHABET else Alphabet(alphabet)
+        self.name = name
+        self.digest = hashlib.sha256(json.dumps(self.fields(), sort_keys=True)
+                                     .encode()).hexdigest()
+        self.compiled = {}  # rotor number -> Rotor
+
+    def fields(self):
+        """The set as plain data (what a machine file describes)"""
+        return {"rotors": list(self.rotor_wirings), "notches": list(self.notch_chars),
+                "reflectors": list(self.reflectors), "plugboard": self.plugboard,
+                "alphabet": self.alphabet.chars}
+
+    def get_rotor(self, number):
+        """Rotor by number, with its tables built once per process"""
+        if number not in self.compiled:
+            if not 0 <= number < len(self.rotor_wirings):
+                raise ValueError(f"No rotor {number} in {self.name}")
+            self.compiled[number] = Rotor(self.rotor_wirings[number], self.notch_chars[number],
+                                          self.alphabet)
+        return self.compiled[number]
+
+    def __reduce__(self):
+        # Send the wirings only; workers share one compiled copy per digest
+        return (_wiring_from_fields, (self.fields(), self.name))
+
+
+WIRING_SETS = {}  # digest -> WiringSet, so each set is compiled once per process
+
+
+def _wiring_from_fields(fields, name):
+    """WiringSet for plain data, reusing this process's copy if there is one"""
+    wiring = WiringSet(fields["rotors"], fields["notches"], fields["reflectors"],
+                       fields["plugboard"], fields["alphabet"], name)
+    return WIRING_SETS.setdefault(wiring.digest, wiring)
+
+
+DEFAULT_WIRING = _wiring_from_fields(
+    {"rotors": ROTOR, "notches": NOTCH, "reflectors": REFLECTOR,
+     "plugboard": PLUGBOARD, "alphabet": ALPHABET}, "main.cpp")
+ROTORS = DEFAULT_WIRING.compiled  # rotor number -> Rotor, built on first use
+
+
+def get_rotor(number):
+    """Rotor 0-10 from ROTOR/NOTCH, with its tables built once per process"""
+    return DEFAULT_WIRING.get_rotor(number)
+
+
+# ===========================
+# MACHINE FILES
+# ===========================
+# A machine file (format: wiring_check.py) swaps in other wirings without
+# touching main.cpp. Checking a file is paid once per content: the parsed,
+# validated wirings are stored under the SHA-256 of the file's bytes in
+# MACHINE_CACHE, and later loads of the same bytes (in any process) use
+# them directly. A changed file has a new hash, so reloading it is enough.
+
+MACHINE_CACHE = os.environ.get(
+    "ENIGMA_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "enigma"))
+
+
+def _cached_fields(digest):
+    """Validated wirings stored for a file hash, or None"""
+    try:
+        with open(os.path.join(MACHINE_CACHE, digest + ".json")) as f:
+            fields = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(fields, dict) or set(fields) != set(DEFAULT_WIRING.fields()):
+        return None  # Not ours, or from an older layout: check the file again
+    return fields
+
+
+def _store_fields(digest, fields):
+    """Remember validated wirings (best effort: the cache is only a shortcut)"""
+    path = os.path.join(MACHINE_CACHE, digest + ".json")
+    try:
+        os.makedirs(MACHINE_CACHE, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            json.dump(fields, f)
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+def load_machine(path, use_cache=True):
+    """WiringSet from a machine file, validated once per file content
+    Raises ValueError listing everything wrong with an invalid file."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    fields = _cached_fields(digest) if use_cache else None
+    if fields is None:
+        definition = parse_config(decode_text(raw))
+        problems = [f"{name}: {error}" for name, errors in check_machine(definition)
+                    for error in errors]
+        if len(definition["rotors"]) < 2 or len(definition["reflectors"]) < 2:
+            problems.append("A machine file needs at least one rotor and one reflector")
+        if problems:
+            raise ValueError(f"Invalid machine file {path}:\n  " + "\n  ".join(problems))
+        alphabet = definition["alphabet"]
+        # Without a plugboard line other alphabets are left unplugged
+        plugboard = definition["plugboard"] or (PLUGBOARD if alphabet == ALPHABET else alphabet)
+        fields = {"rotors": definition["rotors"], "notches": definition["notches"],
+                  "reflectors": definition["reflectors"], "plugboard": plugboard,
+                  "alphabet": alphabet}
+        if use_cache:
+            _store_fields(digest, fields)
+    return _wiring_from_fields(fields, os.path.basename(path))
+
+
+def next_state(state, notches, n=NCHARS):
+    """Rotor positions after one turn(), with main.cpp's double stepping
+    state and notches are tuples by position, rightmost rotor first;
+    notches holds each rotor's notch position (None if it has none) and
+    n is the alphabet size."""
+    m = len(state)
+    if not m:
+        return state
+    # Every test looks at the positions before anything moves
+    new = list(state)
+    at2 = m > 1 and state[1] == notches[1]
+    if m > 1 and (at2 or state[0] == notches[0]):
+        new[1] = (state[1] + 1) % n
+    if m > 2 and at2:
+        new[2] = (state[2] + 1) % n
+    if m > 3 and state[2] == notches[2]:
+        new[3] = (state[3] + 1) % n
+    new[0] = (state[0] + 1) % n
+    return tuple(new)
+
+
+def walk_states(state, notches, n=NCHARS):
+    """Yield the states after 1, 2, 3, ... turn()s from state
+    Same stepping as next_state, inlined for long walks."""
+    m = len(state)
+    p1, p2, p3, p4 = (tuple(state) + (0, 0, 0, 0))[:4]
+    # Padding rotors never sit at a notch, so stepping them is harmless
+    n1, n2, n3 = (tuple(notches) + (None, None, None))[:3]
+    N = n
+    while True:
+        at2 = p2 == n2
+        step4 = p3 == n3
+        if at2 or p1 == n1:
+            p2 = (p2 + 1) % N
+        if at2:
+            p3 = (p3 + 1) % N
+        if step4:
+            p4 = (p4 + 1) % N
+        p1 = (p1 + 1) % N
+        yield (p1, p2, p3, p4)[:m]
+
+
+def seek_state(state, notches, k, n=NCHARS):
+    """Rotor positions after k turn()s from state, without walking them
+    Rotor 1 steps every turn and meets its notch once every n turns (n is
+    the alphabet size). Rotor 2 steps on those turns and again on the turn
+    after it lands on its own notch (double stepping), so it comes round
+    every n - 1 notch hits, and rotor 3 steps on exactly those double
+    steps, one every (n - 1) * n turns. Rotor 4 steps on every turn that rotor 3
+    spends at its notch. Each count is a little arithmetic, so the cost
+    does not depend on k."""
+    if k < 0:
+        raise ValueError("Cannot seek backwards")
+    state = tuple(state)
+    m = len(state)
+    if not m or not k:
+        return state
+    n1, n2, n3 = (tuple(notches) + (None, None, None))[:3]
+    if m > 1 and state[1] == n2:
+        # A double step is due on the first turn; take it the slow way
+        state = next_state(state, notches, n)
+        k -= 1
+    p1, p2, p3, p4 = (state + (0, 0, 0))[:4]
+    N = n
+
+    # Rotor 1 meets its notch on turns d1, d1 + N, ... (counting from 0)
+    hits = 0
+    if n1 is not None:
+        d1 = (n1 - p1) % N
+        if k > d1:
+            hits = (k - 1 - d1) // N + 1
+    p1 = (p1 + k) % N
+    if m == 1:
+        return (p1,)
+
+    if n1 is None or n2 is None:
+        doubles = None  # Rotor 2 never double steps, rotor 3 never moves
+        p2 = (p2 + hits) % N
+    else:
+        # Notch hits since rotor 2 last left its notch, out of N - 1
+        behind = (p2 - n2 - 1) % N
+        first = d1 + (N - 2 - behind) * N + 1  # Turn of the first double step
+        period = (N - 1) * N
+        doubles = (k - 1 - first) // period + 1 if k > first else 0
+        if (behind + hits) // (N - 1) > doubles:
+            p2 = n2  # Landed on the notch on the last turn, step still due
+        else:
+            p2 = (n2 + 1 + (behind + hits) % (N - 1)) % N
+    if m == 2:
+        return (p1, p2)
+
+    steps4 = 0
+    if m > 3 and n3 is not None:
+        # Rotor 3 shows p3 + j from the turn after double step j
+        c = (n3 - p3) % N
+        if doubles is None:
+            steps4 = k if c == 0 else 0
+        else:
+            if c == 0:
+                steps4 = min(first + 1, k)
+            start = first + 1 + ((c or N) - 1) * period
+            if k > start:
+                # One stretch of period turns every N double steps
+                started = (k - start - 1) // (N * period) + 1
+                steps4 += ((started - 1) * period
+                           + min(period, k - start - (started - 1) * N * period))
+    p3 = (p3 + (doubles or 0)) % N
+    if m == 3:
+        return (p1, p2, p3)
+    return (p1, p2, p3, (p4 + steps4) % N)
+
+
+def plug_table(wiring, alphabet=DEFAULT_ALPHABET):
+    """Index table for a plugboard/reflector string ('\\0' terminator included)"""
+    chars = list(wiring) + ['\0'] * (alphabet.size + 1 - len(wiring))
+    return [alphabet.index(c) for c in chars]
+
+
+def set_plugboard(pairs, plugboard=PLUGBOARD, alphabet=DEFAULT_ALPHABET):
+    """Apply esetup plugboard pairs exactly as SetPlugboard does
+    Returns the plugboard as a list of alphabet.size + 1 characters."""
+    index = alphabet.index
+    board = list(plugboard) + ['\0']
+    for i in range(0, len(pairs), 2):
+        p1 = pairs[i]
+        p2 = pairs[i + 1] if i + 1 < len(pairs) else '\0'
+        x = index(p1)
+        ch = board[x]
+        if ch != p1:
+            board[index(ch)] = ch
+            board[x] = p1
+        board[x] = p2
+        x = index(p2)
+        ch = board[x]
+        if ch != p2:
+            board[index(ch)] = ch
+            board[x] = p1
+        board[x] = p1
+    return board
+
+
+# ===========================
+# MACHINE
+# ===========================
+
+class Enigma:
+    """A configured ENIGMA machine
+    rotors and windows list rotor numbers and window characters by
+    position, rightmost (position 1, the fast rotor) first. The defaults
+    are InitEnigma's: rotors 1, 2, 3 at 'a', reflector 1, PLUGBOARD.
+    wiring is the WiringSet the numbers refer to (default: main.cpp's, see
+    load_machine for others); plugboard defaults to the set's. unknown
+    overrides the policy of the set's alphabet for characters outside it
+    (see Alphabet).
+    Encrypting and decrypting are the same operation from the same start
+    state; reset() returns to it."""
+
+    def __init__(self, rotors=(1, 2, 3), windows="aaa", reflector=1,
+                 plugboard_pairs="", plugboard=None, wiring=None, unknown=None):
+        wiring = wiring or DEFAULT_WIRING
+        if not 0 <= len(rotors) <= MAX_ROTORS:
+            raise ValueError(f"A machine holds 0 to {MAX_ROTORS} rotors")
+        if len(windows) != len(rotors):
+            raise ValueError("Need one window character per rotor")
+        if not 0 <= reflector < len(wiring.reflectors):
+            raise ValueError(f"No reflector {reflector} in {wiring.name}")
+        self.wiring = wiring
+        self.alphabet = wiring.alphabet.with_unknown(unknown or wiring.alphabet.unknown)
+        self.rotor_numbers = tuple(rotors)
+        self.start_windows = tuple(windows)
+        self.reflector_number = reflector
+        self.plugboard = set_plugboard(plugboard_pairs, plugboard or wiring.plugboard,
+                                       self.alphabet)
+
+        self.rotors = [wiring.get_rotor(n) for n in rotors]
+        self.notches = tuple(r.notch_pos for r in self.rotors)
+        self.start = tuple(r.position_of(w) for r, w in zip(self.rotors, windows))
+        self.positions = list(self.start)
+        self.unset = ()  # Positions SetRotorPositions leaves alone (see from_setup)
+        self.plug = plug_table(self.plugboard, self.alphabet)
+        self.reflect = plug_table(wiring.reflectors[reflector], self.alphabet)
+
+    @classmethod
+    def from_setup(cls, lines, wiring=None, unknown=None):
+        """Machine described by esetup lines, read as TryUserSetup does
+        Line 1: plugboard pairs; line 2: number of rotors; then one
+        '<rotor><position><window>' line per rotor (rotor b = 9, g = 10);
+        then the reflector letter (t, b, c, B or C)."""
+        lines = [line.rstrip('\r\n') for line in lines]
+        if len(lines) < 2 or not lines[1][:1].isdigit():
+            raise ValueError("esetup needs a plugboard line and a rotor count")
+        count = min(int(lines[1][0]), MAX_ROTORS)
+
+        # Positions keep InitEnigma's rotor and window unless a line sets them
+        placed = {i: (i, 'a') for i in range(1, 4)}
+        for line in lines[2:2 + count]:
+            if len(line) < 3 or not line[1].isdigit():
+                raise ValueError(f"Bad rotor line in esetup: {line!r}")
+            ch = line[0]
+            if ch.isdigit():
+                rotor = int(ch)
+            else:
+                rotor = {'b': 9, 'g': 10}.get(ch.lower(), 0)
+            placed[int(line[1])] = (rotor, line[2])
+        missing = [i for i in range(1, count + 1) if i not in placed]
+        if missing:
+            raise ValueError(f"esetup leaves position {missing[0]} without a rotor")
+
+        # At EOF fgets leaves inLine alone, so the last line read is reused
+        refl_line = lines[min(2 + count, len(lines) - 1)]
+        reflector = REFLECTOR_CODES.get(refl_line[:1], 0)
+        rotors = [placed[i][0] for i in range(1, count + 1)]
+        windows = "".join(placed[i][1] for i in range(1, count + 1))
+        machine = cls(rotors, windows, reflector, plugboard_pairs=lines[0], wiring=wiring,
+                      unknown=unknown)
+
+        # SetRotorPositions indexes by rotor number, not by position:
+        # j = RotNumber[i]; RotPos[j] = (window[j] on RotWiring[j]). So only
+        # a position whose number is also the number of some placed rotor
+        # gets its window; the others stay at RotPos 0 (wiring[0]) whatever
+        # esetup says, and keep their RotPos from the encryption pass when
+        # main() decrypts (see rewind). With rotors 1..m in any order every
+        # position is set. A rotor numbered above 3 that points at an empty
+        # position makes main.exe read a NULL RotWiring and crash.
+        machine.unset = tuple(i for i in range(count) if i + 1 not in rotors)
+        machine.start = tuple(0 if i in machine.unset else p
+                              for i, p in enumerate(machine.start))
+        machine.positions = list(machine.start)
+        return machine
+
+    @classmethod
+    def from_setup_file(cls, path, wiring=None, unknown=None):
+        """Machine from an esetup file"""
+        with open(path, newline='') as f:
+            return cls.from_setup(f.read().splitlines(), wiring, unknown)
+
+    def reset(self):
+        """Return the rotors to their start windows"""
+        self.positions = list(self.start)
+
+    def rewind(self):
+        """main()'s reset() between its two passes: positions that
+        SetRotorPositions sets go back to their windows, the unset ones
+        start the next pass where this one stopped"""
+        self.start = tuple(p if i in self.unset else s
+                           for i, (s, p) in enumerate(zip(self.start, self.positions)))
+        self.reset()
+
+    def window(self):
+        """Window characters, leftmost rotor first (as ShowWindow prints them)"""
+        return "".join(r.wiring[p] for r, p in
+                       zip(reversed(self.rotors), reversed(self.positions)))
+
+    def turn(self):
+        """Step the rotors once, with main.cpp's double stepping"""
+        self.positions = list(next_state(tuple(self.positions), self.notches,
+                                         self.alphabet.size))
+
+    def seek(self, k):
+        """Jump k characters ahead, as if k characters had been encrypted"""
+        self.positions = list(seek_state(self.positions, self.notches, k, self.alphabet.size))
+
+    def __reduce__(self):
+        # Pickle the settings, not the tables: process-pool workers build
+        # those themselves (once per process, see get_rotor)
+        return (_rebuild_machine, (type(self), self.rotor_numbers,
+                                   "".join(self.start_windows), self.reflector_number,
+                                   "".join(self.plugboard[:self.alphabet.size]),
+                                   self.positions, self.wiring, self.alphabet.unknown,
+                                   self.start, self.unset))
+
+    def encrypt_index(self, n):
+        """Step, then send alphabet index n through the machine (encrypt())"""
+        self.turn()
+        pos = self.positions
+        n = self.plug[n]
+        for rotor, p in zip(self.rotors, pos):
+            n = rotor.forward[p][n]
+        n = self.reflect[n]
+        for rotor, p in zip(reversed(self.rotors), reversed(pos)):
+            n = rotor.backward[p][n]
+        return self.plug[n]
+
+    def trace_index(self, n):
+        """encrypt_index that also returns main.cpp's step[] chain
+        The alphabet indices after the plugboard, each rotor, the reflector,
+        each rotor on the way back and the plugboard again; the last one is
+        the output."""
+        self.turn()
+        pos = self.positions
+        steps = [self.plug[n]]
+        for rotor, p in zip(self.rotors, pos):
+            steps.append(rotor.forward[p][steps[-1]])
+        steps.append(self.reflect[steps[-1]])
+        for rotor, p in zip(reversed(self.rotors), reversed(pos)):
+            steps.append(rotor.backward[p][steps[-1]])
+        steps.append(self.plug[steps[-1]])
+        return steps
+
+    def report(self):
+        """The machine description ReportMachine writes at the top of elog"""
+        plugboard = "".join(self.plugboard).split('\0')[0]  # printed with %s
+        lines = ["Plugboard mappings:", self.alphabet.chars, plugboard, "",
+                 "Rotor wirings:", "position rotor ring setting notch sequence"]
+        for i in range(len(self.rotors), 0, -1):
+            lines.append("%8d %5d %12c %5c %s" % (
+                i, self.rotor_numbers[i - 1], self.start_windows[i - 1],
+                self.rotors[i - 1].notch, self.rotors[i - 1].wiring))
+        lines += ["", f"reflector {self.reflector_number} "
+                      f"{self.wiring.reflectors[self.reflector_number]}",
+                  "", "rotors:"]
+        # ShowRotors: each wiring with '->' at the current position
+        for i in range(len(self.rotors), 0, -1):
+            wiring, k = self.rotors[i - 1].wiring, self.positions[i - 1]
+            lines.append(f"{i}: {wiring[:k]}->{wiring[k:]}")
+        return "\n".join(lines) + "\n"
+
+    def encrypt_char(self, c):
+        """encrypt() for one character (no case folding, no unknown policy)"""
+        return self.alphabet.text_output[self.encrypt_index(self.alphabet.index(c))]
+
+    def encrypt_bytes(self, data):
+        """Encrypt a run of bytes with no line handling
+        Capitals are folded to lower case first (see Alphabet); bytes
+        outside the alphabet go by its unknown policy, by default enciphered
+        as main.cpp does (index 69)."""
+        run, spans = self.alphabet.screen(data)
+        return self.alphabet.restore(data, self._encrypt_run(run), spans)
+
+    def _encrypt_run(self, data):
+        """encrypt_bytes for bytes already screened by the alphabet"""
+        alphabet = self.alphabet
+        return bytes(self._encrypt_codes(data, alphabet.byte_index, alphabet.output,
+                                         bytearray(len(data))))
+
+    def _encrypt_codes(self, data, lookup, output, out):
+        """Encrypt data into out: lookup[x] is the alphabet index of item x
+        and output[n] what index n is written as."""
+        rotors = self.rotors
+        m = len(rotors)
+        if not 1 <= m <= 4:
+            for i, b in enumerate(data):
+                out[i] = output[self.encrypt_index(lookup[b])]
+            return out
+
+        # Hot loop: turn() and encrypt() inlined over local tables
+        plug, reflect = self.plug, self.reflect
+        fwd = [r.forward for r in rotors] + [None] * (4 - m)
+        bwd = [r.backward for r in rotors] + [None] * (4 - m)
+        notch = list(self.notches) + [None] * (4 - m)
+        p1, p2, p3, p4 = self.positions + [0] * (4 - m)
+        f1, f2, f3, f4 = fwd
+        b1, b2, b3, b4 = bwd
+        n1, n2, n3, n4 = notch
+        N = self.alphabet.size
+        for i, b in enumerate(data):
+            at2 = p2 == n2
+            step3 = m > 2 and at2
+            step4 = m > 3 and p3 == n3
+            if m > 1 and (at2 or p1 == n1):
+                p2 = (p2 + 1) % N
+            if step3:
+                p3 = (p3 + 1) % N
+            if step4:
+                p4 = (p4 + 1) % N
+            p1 = (p1 + 1) % N
+
+            n = f1[p1][plug[lookup[b]]]
+            if m == 1:
+                n = b1[p1][reflect[n]]
+            elif m == 2:
+                n = b1[p1][b2[p2][reflect[f2[p2][n]]]]
+            elif m == 3:
+                n = b1[p1][b2[p2][b3[p3][reflect[f3[p3][f2[p2][n]]]]]]
+            else:
+                n = b1[p1][b2[p2][b3[p3][b4[p4][reflect[f4[p4][f3[p3][f2[p2][n]]]]]]]]
+            out[i] = output[plug[n]]
+        self.positions = [p1, p2, p3, p4][:m]
+        return out
+
+    def process(self, data, line_limit=NLINE):
+        """Encrypt bytes the way ProcessPlainText encrypts a file
+        Lines are read as fgets(inLine, line_limit) reads them: at most
+        line_limit - 1 bytes at a time (so longer lines come out split),
+        a trailing newline is dropped and each output line ends in '\\n'.
+        Newlines never reach the rotors, so all lines are enciphered as one
+        run and split again afterwards."""
+        lines = []
+        start = 0
+        end = len(data)
+        while start < end:
+            stop = min(start + line_limit - 1, end)
+            newline = data.find(b'\n', start, stop)
+            if newline >= 0:
+                line, start = data[start:newline], newline + 1
+            else:
+                line, start = data[start:stop], stop
+            nul = line.find(b'\0')  # strlen() stops at the first NUL
+            if nul >= 0:
+                line = line[:nul]
+            lines.append(line)
+
+        run = self.encrypt_bytes(b''.join(lines))
+        out = []
+        start = 0
+        for line in lines:
+            out.append(run[start:start + len(line)])
+            out.append(b'\n')
+            start += len(line)
+        return b''.join(out)
+
+    def encrypt_text(self, text):
+        """Encrypt a string
+        With an ASCII alphabet it is UTF-8 encoded and processed like a
+        plain file. Other alphabets go character by character through the
+        alphabet's dict: '\\n' line ends are kept without stepping the
+        rotors, characters outside it go by its unknown policy, and there
+        is no line limit."""
+        if self.alphabet.ascii:
+            # Only passed-through bytes are not ASCII, so the UTF-8 survives
+            return self.process(text.encode()).decode('utf-8', 'surrogateescape')
+        alphabet = self.alphabet
+        keep = alphabet.size + 1  # Code of the characters copied as they are
+        codes = dict(alphabet.input_index)
+        codes['\n'] = keep
+        if alphabet.unknown == "reject":
+            bad = next((i for i, c in enumerate(text) if c not in codes), None)
+            if bad is not None:
+                raise ValueError(f"Character {text[bad]!r} at offset {bad} "
+                                 f"is not in the alphabet")
+        get = codes.get
+        default = alphabet.size if alphabet.unknown == "cpp" else keep
+        codes = [get(c, default) for c in text]
+        run = [n for n in codes if n != keep]
+        identity = range(alphabet.size + 1)
+        enc = iter(self._encrypt_codes(run, identity, identity, [0] * len(run)))
+        out = alphabet.text_output
+        return "".join(c if n == keep else out[next(enc)] for c, n in zip(text, codes))
+
+    decrypt_text = encrypt_text
+
+
+def _rebuild_machine(cls, rotors, windows, reflector, plugboard, positions, wiring,
+                     unknown="cpp", start=None, unset=()):
+    """Unpickle an Enigma (see Enigma.__reduce__)"""
+    machine = cls(rotors, windows, reflector, plugboard=plugboard, wiring=wiring,
+                  unknown=unknown)
+    machine.start = tuple(start) if start is not None else machine.start
+    machine.unset = tuple(unset)
+    machine.positions = list(positions)
+    return machine
+
+
+# ===========================
+# PER-STATE TABLE CACHE
+# ===========================
+# With plugboard, reflector and rotor order fixed, the whole encrypt()
+# chain (plugboard -> rotors -> reflector -> rotors -> plugboard) is one
+# permutation that depends only on the rotor positions. CachedEnigma
+# compiles it into a 256-byte bytes.translate() table per state (input
+# byte -> output byte, case folding included), so a character costs one
+# lookup once its state has been seen.
+
+STATE_CACHE_GROUPS = 1024  # Cached inner states, each with 69 tables (~20 MB)
+STRIDE_MIN_REPEATS = 8     # Stepping periods a run needs for the strided path
+
+
+class CachedEnigma(Enigma):
+    """Enigma that runs on compiled per-state substitution tables
+    Tables are cached by RotPos tuple in a bounded LRU. Rotor 1 moves on
+    every character and the rest only now and then, so the LRU is keyed
+    by the positions of rotors 2..m and each entry holds the tables for
+    all 69 positions of rotor 1, filled in as they are used; the hot loop
+    only goes back to the LRU when an inner rotor steps. Repeated messages
+    under one key, or text longer than the stepping period, reuse tables.
+    Runs of at least STRIDE_MIN_REPEATS periods walk the periodic state
+    sequence instead: every character at the same place in the period
+    shares one state, so each state is one strided translate(). Tables are
+    bytes, so the alphabet must be single-byte with at most 255 characters."""
+
+    def __init__(self, *args, cache_size=STATE_CACHE_GROUPS, **kwargs):
+        super().__init__(*args, **kwargs)
+        alphabet = self.alphabet
+        if alphabet.byte_index is None or alphabet.size > 255:
+            raise ValueError("Cached tables need a single-byte alphabet of "
+                             "at most 255 characters")
+        self.entry = bytes(self.plug[n] for n in alphabet.byte_index)
+        self.exit = bytes(alphabet.output[n] for n in self.plug).ljust(256, b'\0')
+        self.reflect_bytes = bytes(self.reflect).ljust(256, b'\0')
+        self._group = functools.lru_cache(maxsize=cache_size)(self._new_group)
+        self._periods = {}  # first state -> (period or None, steps searched)
+
+    def _new_group(self, inner):
+        """Table slots for rotor 1's positions (inner is the LRU key)
+        The slots are stored twice over, so a run that wraps past the last
+        position is still one slice, followed by a count of tables built."""
+        return [None] * (2 * self.alphabet.size) + [0]
+
+    def _inner_table(self, inner):
+        """Rotors 2..m -> reflector -> rotors m..2 at positions inner"""
+        table = bytes(range(256))
+        rotors = self.rotors[1:]
+        for rotor, p in zip(rotors, inner):
+            table = table.translate(rotor.forward_bytes[p])
+        table = table.translate(self.reflect_bytes)
+        for rotor, p in zip(reversed(rotors), reversed(inner)):
+            table = table.translate(rotor.backward_bytes[p])
+        return table
+
+    def build_state_table(self, state, inner_table=None):
+        """Compile the full encrypt() chain at rotor positions state"""
+        if not state:
+            return self.entry.translate(self.reflect_bytes).translate(self.exit)
+        if inner_table is None:
+            inner_table = self._inner_table(state[1:])
+        first = self.rotors[0]
+        p = state[0]
+        return (self.entry.translate(first.forward_bytes[p])
+                .translate(inner_table)
+                .translate(first.backward_bytes[p])
+                .translate(self.exit))
+
+    def state_table(self, state):
+        """Cached table for rotor positions state"""
+        if not state:
+            return self.build_state_table(state)
+        group = self._group(tuple(state[1:]))
+        p = state[0]
+        if group[p] is None:
+            group[p] = group[p + self.alphabet.size] = self.build_state_table(tuple(state))
+            group[-1] += 1
+        return group[p]
+
+    def cache_info(self):
+        """functools statistics of the LRU (one entry per inner state)"""
+        return self._group.cache_info()
+
+    def _encrypt_run(self, data):
+        """Encrypt screened bytes (same result as Enigma._encrypt_run)"""
+        m = len(self.rotors)
+        N = self.alphabet.size
+        if not m:
+            return bytes(data).translate(self.state_table(()))
+        if len(data) >= STRIDE_MIN_REPEATS * N:
+            out = self._encrypt_strided(data)
+            if out is not None:
+                return out
+
+        # Between inner steps rotor 1 just counts up, so each such run is
+        # one map() over the run's tables and bytes
+        groups = self._group
+        n1, n2, n3 = (self.notches + (None, None, None))[:3]
+        p1, p2, p3, p4 = (tuple(self.positions) + (0, 0, 0))[:4]
+        inner = (p2, p3, p4)[:m - 1]
+        group = groups(inner)
+        out = bytearray()
+        i = 0
+        while i < len(data):
+            at2 = p2 == n2
+            step4 = p3 == n3
+            if at2 or p1 == n1 or step4:  # This turn moves an inner rotor
+                if at2 or p1 == n1:
+                    p2 = (p2 + 1) % N
+                if at2:
+                    p3 = (p3 + 1) % N
+                if step4:
+                    p4 = (p4 + 1) % N
+                inner = (p2, p3, p4)[:m - 1]
+                group = groups(inner)
+            first = (p1 + 1) % N
+            if p2 == n2 or p3 == n3:
+                length = 1  # The next turn moves an inner rotor again
+            else:
+                length = (n1 - first) % N + 1 if n1 is not None else N
+            length = min(length, len(data) - i)
+
+            if group[-1] < N:  # Build the tables this run is missing
+                inner_table = None
+                for p in range(first, first + length):
+                    p %= N
+                    if group[p] is None:
+                        if inner_table is None:
+                            inner_table = self._inner_table(inner)
+                        group[p] = group[p + N] = self.build_state_table(
+                            (p,) + inner, inner_table)
+                        group[-1] += 1
+            out += bytes(map(getitem, group[first:first + length], data[i:i + length]))
+            i += length
+            p1 = (first + length - 1) % N
+        self.positions = [p1, p2, p3, p4][:m]
+        return bytes(out)
+
+    def _encrypt_strided(self, data):
+        """Encrypt data one stepping-period offset at a time
+        Character i uses the state after i + 1 turns. The walk starts from
+        the state of character 0, so character i shares its state with
+        i + period. (After one turn every state is on the stepping cycle
+        except when rotors 1 and 2 started on their notches together, see
+        stepping.py; that walk never comes back and counts as too long.)
+        Returns None, leaving the machine untouched, if the period is
+        longer than len(data) / STRIDE_MIN_REPEATS."""
+        walk = walk_states(tuple(self.positions), self.notches, self.alphabet.size)
+        first = next(walk)
+        limit = len(data) // STRIDE_MIN_REPEATS
+        period, searched = self._periods.get(first, (None, 0))
+        if period is None:
+            if searched >= limit:
+                return None
+            for steps, state in enumerate(walk, 1):
+                if state == first:
+                    period = steps
+                    break
+                if steps >= limit:
+                    break
+            self._periods[first] = (period, steps)
+        if period is None or period > limit:
+            return None
+
+        # Each state is used once here, so tables are built without the LRU
+        out = bytearray(len(data))
+        build = self.build_state_table
+        last = (len(data) - 1) % period
+        inner = inner_table = None
+        state = first
+        walk = walk_states(first, self.notches, self.alphabet.size)
+        for k in range(period):
+            if state[1:] != inner:
+                inner = state[1:]
+                inner_table = self._inner_table(inner)
+            out[k::period] = data[k::period].translate(build(state, inner_table))
+            if k == last:
+                self.positions = list(state)
+            state = next(walk)
+        return bytes(out)
+
+
+# ===========================
+# NUMPY BATCH MODE
+# ===========================
+# Many short messages, each under its own key: machines with the same
+# number of rotors step together as one (N, rotors) position array, and
+# every substitution is a gather from flat tables. The Python loop runs
+# once per character column, so the cost grows with message length, not
+# with the number of messages.
+
+@functools.lru_cache(maxsize=8)
+def batch_tables(wiring=DEFAULT_WIRING):
+    """Flat forward/backward tables of all rotors of a set for NumPy gathers
+    Entry (rotor * N + position) * (N + 1) + input, with N the alphabet
+    size, is the output index, as in Rotor.forward/backward."""
+    rotors = [wiring.get_rotor(n) for n in range(len(wiring.rotor_wirings))]
+    forward = np.array([r.forward for r in rotors], dtype=np.intp)
+    backward = np.array([r.backward for r in rotors], dtype=np.intp)
+    return forward.ravel(), backward.ravel()
+
+
+def encrypt_batch(machines, messages, lengths=None):
+    """Encrypt messages[i] on machines[i] for all i at once
+    messages is a list of byte strings, or an (N, L) uint8 array of
+    messages padded to L, with lengths giving each row's real length
+    (default: all L). Every machine steps once per real character and ends
+    where encrypt_bytes would leave it, and the output is the same.
+    Returns a list of bytes, or for array input an (N, L) uint8 array with
+    zeroed padding. Characters outside a machine's alphabet go by its
+    unknown policy, as in encrypt_bytes. Without NumPy the messages go one
+    by one through encrypt_bytes, and so do runs on alphabets too wide for
+    byte tables."""
+    if len(machines) != len(messages):
+        raise ValueError("Need one machine per message")
+    if not NUMPY_AVAILABLE:
+        return [m.encrypt_bytes(bytes(msg)) for m, msg in zip(machines, messages)]
+    narrow = all(mc.alphabet.byte_index is not None and mc.alphabet.size < 256
+                 for mc in machines)
+    if narrow and all(mc.alphabet.unknown == "cpp" for mc in machines):
+        return _encrypt_batch(machines, messages, lengths)
+
+    # Batch the runs each machine's policy lets through the rotors, then
+    # put the passed-through characters back
+    as_array = isinstance(messages, np.ndarray)
+    if as_array:
+        data, lengths = _batch_array(messages, lengths)
+        messages = [row[:n].tobytes() for row, n in zip(data, lengths)]
+    screened = [mc.alphabet.screen(msg) for mc, msg in zip(machines, messages)]
+    runs = [run for run, _ in screened]
+    if narrow:
+        runs = _encrypt_batch(machines, runs)
+    else:
+        runs = [mc._encrypt_run(run) for mc, run in zip(machines, runs)]
+    out = [Alphabet.restore(msg, run, spans)
+           for msg, run, (_, spans) in zip(messages, runs, screened)]
+    if not as_array:
+        return out
+    result = np.zeros_like(data)
+    for row, msg in zip(result, out):
+        row[:len(msg)] = np.frombuffer(msg, dtype=np.uint8)
+    return result
+
+
+def _batch_array(messages, lengths):
+    """Check an encrypt_batch message array, filling in default lengths"""
+    data = np.asarray(messages, dtype=np.uint8)
+    if data.ndim != 2:
+        raise ValueError("Message array must be 2-D (messages, characters)")
+    lengths = np.full(len(data), data.shape[1]) if lengths is None else np.asarray(lengths)
+    if len(lengths) != len(data) or (lengths < 0).any() or (lengths > data.shape[1]).any():
+        raise ValueError("Lengths must be between 0 and the padded length")
+    return data, lengths
+
+
+def _encrypt_batch(machines, messages, lengths=None):
+    """encrypt_batch with NumPy for byte-table alphabets, no unknown policy"""
+    as_array = isinstance(messages, np.ndarray)
+    if as_array:
+        data, lengths = _batch_array(messages, lengths)
+    else:
+        lengths = np.array([len(msg) for msg in messages], dtype=np.intp)
+        width = lengths.max(initial=0)
+        if (lengths == width).all():
+            data = np.frombuffer(b''.join(messages), dtype=np.uint8).reshape(-1, width)
+        else:
+            data = np.zeros((len(messages), width), dtype=np.uint8)
+            for row, msg in zip(data, messages):
+                row[:len(msg)] = np.frombuffer(bytes(msg), dtype=np.uint8)
+
+    out = np.zeros_like(data)
+    by_count = {}
+    for i, machine in enumerate(machines):
+        by_count.setdefault((machine.wiring.digest, len(machine.rotors)), []).append(i)
+    for rows in by_count.values():
+        rows = np.array(rows)
+        out[rows] = _encrypt_group([machines[i] for i in rows], data[rows], lengths[rows])
+
+    if as_array:
+        return out
+    return [out[i, :n].tobytes() for i, n in enumerate(lengths)]
+
+
+def _encrypt_group(machines, data, lengths):
+    """encrypt_batch for machines with the same wiring set and rotor count"""
+    forward, backward = batch_tables(machines[0].wiring)
+    alphabet = machines[0].alphabet
+    count, width = data.shape
+    m = len(machines[0].rotors)
+    N = alphabet.size
+    W = N + 1  # Table row width (index N included)
+
+    # Each rotor's state is its row offset into the flat tables,
+    # (rotor * N + position) * W, so stepping is adding W
+    rotor = np.array([mc.rotor_numbers for mc in machines], dtype=np.intp).reshape(count, m).T
+    pos = np.array([mc.positions for mc in machines], dtype=np.intp).reshape(count, m).T
+    notch = np.array([[-1 if n is None else n for n in mc.notches] for mc in machines],
+                     dtype=np.intp).reshape(count, m).T
+    offsets = [(r * N + p) * W for r, p in zip(rotor, pos)]
+    notch_at = [np.where(n < 0, -1, (r * N + n) * W) for r, n in zip(rotor, notch)]
+    wrap_at = [(r + 1) * N * W for r in rotor]
+    ragged = (lengths != width).any()
+
+    # Table entries are below 256, so bytes are the quickest way in
+    rows = np.arange(count)[:, None] * W
+    plug = np.frombuffer(b''.join(map(bytes, (mc.plug for mc in machines))),
+                         dtype=np.uint8).astype(np.intp)
+    reflect = np.frombuffer(b''.join(map(bytes, (mc.reflect for mc in machines))),
+                            dtype=np.uint8).astype(np.intp)
+    # Plugboard in for every character at once, one contiguous row per column
+    entry = np.ascontiguousarray(
+        plug[rows + np.array(alphabet.byte_index, dtype=np.intp)[data]].T)
+    result = np.empty((width, count), dtype=np.intp)
+    rows = rows[:, 0]
+
+    for t in range(width):
+        if m:
+            # turn(): every test looks at the positions before anything moves
+            at = [o == n for o, n in zip(offsets, notch_at)]
+            steps = [np.ones(count, dtype=bool)]
+            if m > 1:
+                steps.append(at[0] | at[1])
+            if m > 2:
+                steps.append(at[1])
+            if m > 3:
+                steps.append(at[2])
+            if ragged:
+                active = t < lengths
+                steps = [step & active for step in steps]
+            for o, step, end in zip(offsets, steps, wrap_at):
+                o += step * W
+                np.subtract(o, N * W, out=o, where=o == end)
+
+        n = entry[t]
+        for o in offsets:
+            n = forward[o + n]
+        n = reflect[rows + n]
+        for o in reversed(offsets):
+            n = backward[o + n]
+        result[t] = n
+
+    for i, mc in enumerate(machines):
+        mc.positions = [int(o[i] // W) % N for o in offsets]
+    out = np.frombuffer(alphabet.output, dtype=np.uint8)[plug[rows[:, None] + result.T]]
+    out[np.arange(width) >= lengths[:, None]] = 0
+    return out
+
+
+# ===========================
+# PARALLEL MODE
+# ===========================
+# seek_state() gives the rotor positions at any offset directly, so a long
+# run can be cut into shards that are encrypted independently and joined.
+
+PARALLEL_SHARD = 256 * 1024  # Characters per task
+
+_worker_machine = None  # Set once per worker process
+
+
+def _init_worker(machine):
+    """Pool initializer: install a copy of the machine in the worker"""
+    global _worker_machine
+    _worker_machine = machine
+
+
+def _encrypt_shard(task):
+    """Worker task: encrypt one (screened) shard from the given rotor positions"""
+    shard, positions = task
+    _worker_machine.positions = list(positions)
+    return _worker_machine._encrypt_run(shard)
+
+
+class ParallelEnigma:
+    """Process-pool encryption for long runs under one key
+    encrypt_bytes() splits the run into shards, seeks each to its start
+    positions and encrypts them in worker processes, with the same result
+    as machine.encrypt_bytes(); the machine's positions move on as if it
+    had done the work. Runs of one shard or less stay in this process.
+    Other attributes (reset, window, trace_index, ...) are the machine's.
+    Use as a context manager (or call close()) to shut the pool down."""
+
+    def __init__(self, machine, workers=None, shard_size=PARALLEL_SHARD):
+        if shard_size <= 0:
+            raise ValueError("Shard size must be positive")
+        self.machine = machine
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(machine,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self.machine, name)
+
+    def close(self):
+        """Shut the worker pool down"""
+        self._pool.shutdown()
+
+    def encrypt_bytes(self, data):
+        """Encrypt a run of bytes in parallel (same result as serial)"""
+        run, spans = self.machine.alphabet.screen(data)
+        return self.machine.alphabet.restore(data, self._encrypt_run(run), spans)
+
+    def _encrypt_run(self, data):
+        """Shard a screened run over the pool"""
+        machine = self.machine
+        if len(data) <= self.shard_size:
+            return machine._encrypt_run(data)
+        view = memoryview(data)
+        start = tuple(machine.positions)
+        size = machine.alphabet.size
+        tasks = [(bytes(view[i:i + self.shard_size]),
+                  seek_state(start, machine.notches, i, size))
+                 for i in range(0, len(view), self.shard_size)]
+        out = b''.join(self._pool.map(_encrypt_shard, tasks))
+        machine.seek(len(data))
+        return out
+
+    # Line handling around the parallel encrypt_bytes
+    process = Enigma.process
+    encrypt_text = decrypt_text = Enigma.encrypt_text
+
+
+# ===========================
+# STREAMING
+# ===========================
+# ProcessPlainText reads 254-byte lines and writes a full elog line for
+# every character, so long lines come out split and the log is many times
+# the size of the input. crypt_stream reads big chunks instead, passes line
+# ends through untouched and only logs every trace_every-th character.
+
+STREAM_CHUNK = 1 << 20  # Bytes read per chunk (1 MB)
+TRACE_EVERY = 1000      # Default sampling rate of the step trace
+
+
+def trace_line(machine, byte, steps):
+    """One elog line (ShowWindow, input character, ShowSteps) as bytes"""
+    alphabet = machine.alphabet
+    n = alphabet.byte_index[byte]
+    if n < alphabet.size:
+        byte = alphabet.output[n]  # ProcessPlainText logs the lowered character
+    window = "".join(c + " " for c in machine.window())
+    return (window.encode('latin-1') + b"   " + bytes((byte,))
+            + b"".join(b" -> " + alphabet.output[n:n + 1] for n in steps) + b"\n")
+
+
+def _encrypt_traced(machine, run, done, trace, every):
+    """Encrypt a screened run, tracing the characters whose count is a
+    multiple of every (done characters came before this run)"""
+    output = machine.alphabet.output
+    out = []
+    start = 0
+    for i in range(-done % every, len(run), every):
+        out.append(machine._encrypt_run(run[start:i]))
+        steps = machine.trace_index(machine.alphabet.byte_index[run[i]])
+        out.append(output[steps[-1]:steps[-1] + 1])
+        trace.write(trace_line(machine, run[i], steps))
+        start = i + 1
+    out.append(machine._encrypt_run(run[start:]))
+    return b"".join(out)
+
+
+def crypt_stream(machine, src, dst, chunk_size=STREAM_CHUNK,
+                 trace=None, trace_every=TRACE_EVERY):
+    """Encrypt/decrypt binary stream src into dst, chunk by chunk
+    Unlike process() there is no line limit: '\n' and '\r\n' line ends
+    are copied as they are and never reach the rotors, everything else is
+    enciphered (NUL bytes too) or handled by the alphabet's unknown policy
+    and nothing is added at the end. For input with short lines the
+    enciphered characters match main.exe's.
+    trace, a binary file, gets ReportMachine's header and the elog line
+    of every trace_every-th character. The machine continues from its
+    current positions. Returns the number of characters enciphered."""
+    if trace is not None:
+        if trace_every < 1:
+            raise ValueError("trace_every must be at least 1")
+        trace.write(machine.report().encode('latin-1'))
+        trace.write(f"\n\nEncryption (every {trace_every} characters)\n".encode())
+    done = 0
+    carry = b''
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            if not carry:
+                break
+            chunk, carry = carry, b''  # A lone '\r' at the very end
+        else:
+            chunk = carry + chunk
+            # A '\r' at the end may be half of a '\r\n' split over chunks
+            carry = b'\r' if chunk.endswith(b'\r') else b''
+            if carry:
+                chunk = chunk[:-1]
+
+        parts = chunk.split(b'\n')
+        ends = []
+        for k in range(len(parts) - 1):
+            if parts[k].endswith(b'\r'):
+                parts[k] = parts[k][:-1]
+                ends.append(b'\r\n')
+            else:
+                ends.append(b'\n')
+        line = b''.join(parts)
+        run, spans = machine.alphabet.screen(line)
+        if trace is None:
+            enc = machine._encrypt_run(run)
+        else:
+            enc = _encrypt_traced(machine, run, done, trace, trace_every)
+        enc = machine.alphabet.restore(line, enc, spans)
+        done += len(run)
+
+        if not ends:
+            dst.write(enc)
+            continue
+        out = []
+        start = 0
+        for part, end in zip(parts, ends):
+            out.append(enc[start:start + len(part)])
+            out.append(end)
+            start += len(part)
+        out.append(enc[start:])
+        dst.write(b''.join(out))
+    return done
+
+
+# ===========================
+# FILE PROCESSING
+# ===========================
+
+def process_file(machine, in_path, out_path):
+    """Encrypt/decrypt one file like ProcessFile (without the log)
+    The input is read like main.exe's text mode, so CRLF line ends count
+    as newlines. With an alphabet beyond ASCII the files are UTF-8 text
+    and go through encrypt_text."""
+    if not machine.alphabet.ascii:
+        with open(in_path, encoding='utf-8') as f:
+            text = f.read()
+        machine.reset()
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(machine.encrypt_text(text))
+        return
+    with open(in_path, 'rb') as f:
+        data = f.read().replace(b'\r\n', b'\n')
+    machine.reset()
+    with open(out_path, 'wb') as f:
+        f.write(machine.process(data))
+
+
+def stream_file(machine, in_path, out_path, trace_path=None,
+                trace_every=TRACE_EVERY, chunk_size=STREAM_CHUNK):
+    """crypt_stream() between files from the start state ('-' is stdin/stdout)"""
+    machine.reset()
+    with contextlib.ExitStack() as stack:
+        src = (sys.stdin.buffer if in_path == '-'
+               else stack.enter_context(open(in_path, 'rb')))
+        dst = (sys.stdout.buffer if out_path == '-'
+               else stack.enter_context(open(out_path, 'wb')))
+        trace = (stack.enter_context(open(trace_path, 'wb'))
+                 if trace_path else None)
+        count = crypt_stream(machine, src, dst, chunk_size, trace, trace_every)
+        dst.flush()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="ENIGMA simulator (same machine as main.cpp)")
+    parser.add_argument("-i", "--input", default="plain",
+                        help="plaintext file (default: plain)")
+    parser.add_argument("-o", "--output", default="encrypt",
+                        help="ciphertext file (default: encrypt)")
+    parser.add_argument("-d", "--decrypted", default="decrypt",
+                        help="round-trip file (default: decrypt)")
+    parser.add_argument("--setup", default="esetup",
+                        help="machine setup file, used if it exists (default: esetup)")
+    parser.add_argument("--machine", metavar="FILE",
+                        help="rotor/reflector wirings from a machine file "
+                             "instead of main.cpp's (see wiring_check.py)")
+    parser.add_argument("--unknown", choices=UNKNOWN_POLICIES,
+                        help="characters outside the alphabet: cpp enciphers "
+                             "them like main.exe (default), passthrough copies "
+                             "them unchanged, reject stops with an error")
+    parser.add_argument("--cached", action="store_true",
+                        help="compile each rotor state into one table "
+                             "(faster for long messages under one key)")
+    parser.add_argument("--stream", action="store_true",
+                        help="one pass from -i to -o in large chunks ('-' for "
+                             "stdin/stdout): no line limit, no decrypt file")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="with --stream: write a sampled step log to FILE")
+    parser.add_argument("--trace-every", type=int, default=TRACE_EVERY, metavar="N",
+                        help=f"log every Nth character (default: {TRACE_EVERY})")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="encrypt long runs in this many processes (default: 1)")
+    args = parser.parse_args(argv)
+    machine_class = CachedEnigma if args.cached else Enigma
+
+    if not args.stream:
+        print("ENIGMA Simulator - Starting...")
+    try:
+        wiring = load_machine(args.machine) if args.machine else None
+        if os.path.exists(args.setup):
+            machine = machine_class.from_setup_file(args.setup, wiring, args.unknown)
+        else:
+            machine = machine_class(wiring=wiring, unknown=args.unknown)
+        with contextlib.ExitStack() as stack:
+            if args.workers > 1:
+                machine = stack.enter_context(ParallelEnigma(machine, args.workers))
+            if args.stream:
+                # Progress goes to stderr, stdout may be the ciphertext
+                count = stream_file(machine, args.input, args.output,
+                                    args.trace, args.trace_every)
+            else:
+                print(f"Encrypting '{args.input}' -> '{args.output}'...")
+                process_file(machine, args.input, args.output)
+                machine.rewind()
+                print(f"Decrypting '{args.output}' -> '{args.decrypted}'...")
+                process_file(machine, args.output, args.decrypted)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.stream:
+        print(f"Processed {count:,} characters: '{args.input}' -> '{args.output}'",
+              file=sys.stderr)
+    else:
+        print(f"Done! Check output files: {args.output}, {args.decrypted}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,7 @@
-import random
-
-alph = "abcdefghijklmnopqrstuvwxyz0123456789.,:; ()[]'\"-+/*&~`!@#$%^_={}|\\<>?"
-
-print(f"// All {len(alph)} chars")
-for i in range(1, 11):
-    chars = list(alph)
-    random.shuffle(chars)
-    rotor = ''.join(chars)
-    print(f'    // rotor {i} - New')
-    print(f'    "{rotor}",')
+# Print a fresh set of 10 rotors (plus notches) ready to paste into main.cpp
+# (generation, scoring and duplicate checks live in wiring_gen.py)
+import sys
+
+from wiring_gen import main
+
+sys.exit(main(["--kind", "rotor", "--keep", "10"] + sys.argv[1:]))
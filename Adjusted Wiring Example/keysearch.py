@@ -0,0 +1,560 @@
+"""
+Ciphertext-only key search for the ENIGMA machine
+Audits how much a ciphertext gives away about its key. Every rotor order
+(from rotors 1-10, beta and gamma included), reflector and start position
+is tried on the ciphertext and the decryption is scored, by index of
+coincidence or, given a corpus, by bigram fitness. The best keys then get
+their plugboard hill-climbed.
+
+- One task is one rotor order with one reflector. With NumPy all N**m start
+  positions of a task (N**3 = 328,509 for three rotors) are decrypted
+  together. Rotors 2..m and the reflector are folded into one table per
+  inner position (as CachedEnigma does), so a character costs three
+  gathers per key.
+- Early pruning: once PRUNE_AT of the text is read, only the best
+  KEEP_FRACTION of a task's positions carry on.
+- Tasks are spread over a process pool. Each finished task is written to
+  the --checkpoint file, so an interrupted search resumes where it stopped.
+- The search runs on the set's plugboard without esetup pairs. The best
+  keys then have pairs swapped in and out while the score improves.
+
+Progress reports keys tried per second and how long the whole keyspace
+(orders x reflectors x start positions) takes at that rate.
+
+Usage:
+  python keysearch.py encrypt                        (3 of rotors 1-10, reflectors 1-4)
+  python keysearch.py encrypt --rotor-set 1-5 --reflectors 1,2 -w 8
+  python keysearch.py encrypt --corpus plain --checkpoint search.json
+"""
+
+import argparse
+import collections
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from enigma import DEFAULT_WIRING, REFLECTOR_CODES, Enigma, load_machine, plug_table, set_plugboard
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # Start positions are tried one machine at a time
+
+LENGTH = 250          # Ciphertext characters scored
+PRUNE_AT = 0.5        # Share of them read before pruning
+KEEP_FRACTION = 0.02  # Share of a task's start positions that survive pruning
+TOP = 10              # Keys kept, hill-climbed and reported
+SCORES = ("ioc", "bigram")
+
+# esetup codes for rotors and reflectors (see Enigma.from_setup)
+ROTOR_CODES = {9: 'b', 10: 'g'}
+REFLECTOR_LETTERS = {n: c for c, n in REFLECTOR_CODES.items()}
+
+
+# ===========================
+# SCORING
+# ===========================
+# Decryptions are scored as alphabet indices; higher is always better.
+# IoC is sum c(c - 1) / (L(L - 1)) over the letter counts c (about 1/69 for
+# random text, several times that for a natural language). Bigram fitness
+# is the mean log10 P(b | a) over consecutive pairs, learned from a corpus.
+
+def read_codes(path, alphabet):
+    """Alphabet indices of a file, dropping everything outside the alphabet
+    (line ends never step the rotors, so they are not part of the key
+    stream) and folding capitals"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    size = alphabet.size
+    if alphabet.byte_index is None or size > 255:
+        raise ValueError("Key search needs a single-byte alphabet of at most 255 characters")
+    codes = data.translate(bytes(alphabet.byte_index))
+    return codes.translate(None, bytes((size,)))
+
+
+def bigram_table(codes, size):
+    """Flat log10 P(b | a) table, entry a * (size + 1) + b, with add-one
+    smoothing so unseen pairs are unlikely rather than impossible"""
+    W = size + 1
+    counts = collections.Counter(a * W + b for a, b in zip(codes, codes[1:]))
+    table = []
+    for a in range(W):
+        row = [counts[a * W + b] + 1 for b in range(W)]
+        total = sum(row)
+        table.extend(math.log10(n / total) for n in row)
+    return table
+
+
+class Scorer:
+    """Score of a decryption given as bytes of alphabet indices"""
+
+    def __init__(self, kind, size, bigrams=None):
+        if kind == "bigram" and bigrams is None:
+            raise ValueError("Bigram scoring needs a corpus")
+        self.kind = kind
+        self.width = size + 1
+        self.bigrams = bigrams
+
+    def __call__(self, codes):
+        n = len(codes)
+        if n < 2:
+            return 0.0
+        if self.kind == "ioc":
+            return sum(c * (c - 1) for c in collections.Counter(codes).values()) / (n * (n - 1))
+        logp, W = self.bigrams, self.width
+        return sum(logp[a * W + b] for a, b in zip(codes, codes[1:])) / (n - 1)
+
+
+# ===========================
+# SEARCH TASKS
+# ===========================
+
+class SearchJob:
+    """Everything a worker needs: wiring set, ciphertext and scoring settings"""
+
+    def __init__(self, wiring, codes, score="ioc", bigrams=None, length=LENGTH,
+                 prune_at=PRUNE_AT, keep_fraction=KEEP_FRACTION, top=TOP):
+        self.wiring = wiring
+        self.codes = codes[:length]
+        self.score = score
+        self.bigrams = bigrams
+        self.prune_at = prune_at
+        self.keep_fraction = keep_fraction
+        self.top = top
+        self.size = wiring.alphabet.size
+        if len(self.codes) < 2:
+            raise ValueError("Need at least two ciphertext characters in the alphabet")
+
+    def signature(self, rotors, reflectors):
+        """Hash of the settings a checkpoint is only valid for"""
+        settings = [self.wiring.digest, self.codes.hex(), self.score, self.prune_at,
+                    self.keep_fraction, self.top, list(rotors), list(reflectors),
+                    hashlib.sha256(json.dumps(self.bigrams).encode()).hexdigest()]
+        return hashlib.sha256(json.dumps(settings).encode()).hexdigest()
+
+    def machine(self, order, reflector, positions=None):
+        """Machine with this rotor order and reflector (set's plugboard, no pairs)"""
+        rotors = [self.wiring.get_rotor(n) for n in order]
+        positions = positions or [0] * len(order)
+        windows = "".join(r.wiring[p] for r, p in zip(rotors, positions))
+        return Enigma(order, windows, reflector, wiring=self.wiring)
+
+    def ciphertext(self):
+        """The scored ciphertext as characters, ready for _encrypt_run"""
+        return self.codes.translate(self.wiring.alphabet.output.ljust(256, b'\0'))
+
+
+def task_id(task):
+    order, reflector = task
+    return f"{'-'.join(map(str, order))}/{reflector}"
+
+
+_job = None  # Set once per worker process
+
+
+def _init_worker(job):
+    """Pool initializer: install the search job in the worker"""
+    global _job
+    _job = job
+
+
+def _search_task(task):
+    """Worker task: try every start position of one order and reflector
+    Returns (task, keys tried, best [(score, order, reflector, positions)])."""
+    order, reflector = task
+    if NUMPY_AVAILABLE:
+        tried, best = _search_numpy(_job, order, reflector)
+    else:
+        tried, best = _search_python(_job, order, reflector)
+    return task, tried, [(score, list(order), reflector, list(p)) for score, p in best]
+
+
+def _search_python(job, order, reflector):
+    """Start positions one at a time through Enigma._encrypt_run"""
+    machine = job.machine(order, reflector)
+    scorer = Scorer(job.score, job.size, job.bigrams)
+    text = job.ciphertext()
+    head = text[:max(2, int(len(text) * job.prune_at))]
+    to_codes = bytes(job.wiring.alphabet.byte_index)
+    N = job.size
+    states = list(itertools.product(range(N), repeat=len(order)))
+    partial = []
+    for state in states:
+        machine.positions = list(state)
+        partial.append((scorer(machine._encrypt_run(head).translate(to_codes)), state))
+    keep = max(job.top, int(len(states) * job.keep_fraction))
+    best = []
+    for _, state in heapq.nlargest(keep, partial):
+        machine.positions = list(state)
+        best.append((scorer(machine._encrypt_run(text).translate(to_codes)), state))
+    return len(states), heapq.nlargest(job.top, best)
+
+
+def _search_numpy(job, order, reflector):
+    """All start positions at once; a fourth rotor's start is one slice at a time"""
+    machine = job.machine(order, reflector)
+    N = job.size
+    W = N + 1
+    m = len(order)
+    rotors = machine.rotors
+    plug = np.array(machine.plug, dtype=np.intp)
+    first = np.array(rotors[0].forward, dtype=np.intp)                # (N, W)
+    last = plug[np.array(rotors[0].backward, dtype=np.intp)].ravel()  # plugboard folded in
+    inner = inner_table(machine)
+    notch = [-1 if n is None else n for n in machine.notches]
+    codes = np.frombuffer(job.codes, dtype=np.uint8)
+    entry = plug[codes]
+    L = len(codes)
+    cut = max(2, int(L * job.prune_at))
+    logp = np.array(job.bigrams) if job.score == "bigram" else None
+
+    best = []
+    tried = 0
+    for slow in (range(N) if m == 4 else (0,)):
+        ids = np.arange(N ** min(m, 3), dtype=np.intp)
+        pos = [ids % N, ids // N % N, ids // (N * N), np.full(len(ids), slow)][:m]
+        tried += len(ids)
+        rows = np.arange(len(ids), dtype=np.intp) * W
+        counts = None
+        if logp is None:
+            counts = np.zeros(len(ids) * W, dtype=np.uint8 if L < 256 else np.uint16)
+        score = np.zeros(len(ids))
+        prev = None
+        for t in range(L):
+            # turn(): every test looks at the positions before anything moves
+            at = [p == n for p, n in zip(pos, notch)]
+            if m > 3:
+                pos[3] = (pos[3] + at[2]) % N
+            if m > 2:
+                pos[2] = (pos[2] + at[1]) % N
+            if m > 1:
+                pos[1] = (pos[1] + (at[0] | at[1])) % N
+            pos[0] = (pos[0] + 1) % N
+
+            key = 0
+            for p in pos[1:]:
+                key = key * N + p
+            n = first[pos[0], entry[t]]
+            n = inner[key * W + n]
+            out = last[pos[0] * W + n]
+
+            if logp is None:
+                where = rows + out
+                score += counts[where]
+                counts[where] += 1
+            elif prev is not None:
+                score += logp[prev * W + out]
+            prev = out
+
+            if t == cut - 1:
+                # Early pruning: only the best part of the positions go on
+                keep = max(job.top, int(len(ids) * job.keep_fraction))
+                if keep < len(ids):
+                    chosen = np.argpartition(-score, keep - 1)[:keep]
+                    ids, score, prev = ids[chosen], score[chosen], prev[chosen]
+                    pos = [p[chosen] for p in pos]
+                    if counts is not None:
+                        counts = counts.reshape(-1, W)[chosen].ravel()
+                    rows = np.arange(keep, dtype=np.intp) * W
+
+        score = score * 2 / (L * (L - 1)) if logp is None else score / (L - 1)
+        for i in np.argsort(-score)[:job.top]:
+            k = int(ids[i])
+            start = (k % N, k // N % N, k // (N * N), slow)[:m]
+            best.append((float(score[i]), start))
+    return tried, heapq.nlargest(job.top, best)
+
+
+def inner_table(machine):
+    """Rotors 2..m -> reflector -> rotors m..2 for every inner position
+    Flat table: entry (((p2 * N) + p3) * N + p4) * (N + 1) + input."""
+    N = machine.alphabet.size
+    W = N + 1
+    inner = machine.rotors[1:]
+    k = len(inner)
+    grid = np.indices((N,) * k).reshape(k, N ** k)
+    n = np.broadcast_to(np.arange(W, dtype=np.intp), (N ** k, W))
+    forward = [np.array(r.forward, dtype=np.uint8) for r in inner]
+    backward = [np.array(r.backward, dtype=np.uint8) for r in inner]
+    for j in range(k):
+        n = forward[j][grid[j][:, None], n]
+    n = np.array(machine.reflect, dtype=np.uint8)[n]
+    for j in reversed(range(k)):
+        n = backward[j][grid[j][:, None], n]
+    return np.ascontiguousarray(n, dtype=np.uint8).ravel()
+
+
+# ===========================
+# PLUGBOARD HILL-CLIMB
+# ===========================
+
+def climb_plugboard(job, candidate):
+    """Swap plugboard pairs while the score improves (best swap per round)
+    A swap plugs x to y and leaves their old partners unplugged, or
+    unplugs x and y if they were plugged together.
+    Returns (score, order, reflector, positions, plugboard)."""
+    _, order, reflector, positions = candidate
+    machine = job.machine(order, reflector, positions)
+    scorer = Scorer(job.score, job.size, job.bigrams)
+    text = job.ciphertext()
+    to_codes = bytes(job.wiring.alphabet.byte_index)
+    N = job.size
+
+    def evaluate(plug):
+        machine.plug = plug
+        machine.reset()
+        return scorer(machine._encrypt_run(text).translate(to_codes))
+
+    plug = list(machine.plug)
+    best = evaluate(plug)
+    while True:
+        move = None
+        for x, y in itertools.combinations(range(N), 2):
+            trial = list(plug)
+            if plug[x] == y:
+                trial[x], trial[y] = x, y
+            else:
+                trial[plug[x]], trial[plug[y]] = plug[x], plug[y]
+                trial[x], trial[y] = y, x
+            score = evaluate(trial)
+            if score > best:
+                best, move = score, trial
+        if move is None:
+            break
+        plug = move
+    chars = job.wiring.alphabet.chars
+    return best, order, reflector, positions, "".join(chars[n] for n in plug[:N])
+
+
+def plugboard_pairs(board, base, alphabet):
+    """esetup plugboard line turning base into board, or None if there is none
+    Unplugging c is the pair "cc"; set_plugboard checks the result."""
+    chars = alphabet.chars
+    unplug = [c for c, b, t in zip(chars, base, board) if t == c and b != c]
+    pairs = [c + t for c, b, t in zip(chars, base, board)
+             if t != c and b != t and alphabet.index(c) < alphabet.index(t)]
+    line = "".join(c + c for c in unplug) + "".join(pairs)
+    if "".join(set_plugboard(line, base, alphabet)[:alphabet.size]) != board:
+        return None
+    return line
+
+
+def esetup_text(order, windows, reflector, pairs):
+    """esetup file contents for a key (None if esetup cannot express it)"""
+    if pairs is None or reflector not in REFLECTOR_LETTERS or any(
+            not 0 <= n <= 10 for n in order):
+        return None
+    lines = [pairs, str(len(order))]
+    for i, (n, w) in enumerate(zip(order, windows), 1):
+        lines.append(f"{ROTOR_CODES.get(n, n)}{i}{w}")
+    lines.append(REFLECTOR_LETTERS[reflector])
+    return "\n".join(lines) + "\n"
+
+
+# ===========================
+# DRIVER
+# ===========================
+
+def load_checkpoint(path, signature):
+    """(done task ids, best keys, keys tried) saved for this search"""
+    if not path or not os.path.exists(path):
+        return set(), [], 0
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("signature") != signature:
+        raise ValueError(f"{path} is the checkpoint of a different search")
+    best = [(s, o, r, p) for s, o, r, p in state["best"]]
+    return set(state["done"]), best, state["tried"]
+
+
+def save_checkpoint(path, signature, done, best, tried):
+    """Write the checkpoint atomically, so an interrupt never leaves half a file"""
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "w") as f:
+        json.dump({"signature": signature, "done": sorted(done), "best": best,
+                   "tried": tried}, f)
+    os.replace(temp, path)
+
+
+def search(job, tasks, workers=1, checkpoint=None, progress=None):
+    """Run the tasks (over a pool if workers > 1) and return the best keys
+    [(score, order, reflector, positions)], resuming from checkpoint.
+    progress(tasks done, keys tried this run) is called after each task."""
+    orders = sorted({tuple(order) for order, _ in tasks})
+    reflectors = sorted({reflector for _, reflector in tasks})
+    signature = job.signature(orders, reflectors)
+    done, best, tried = load_checkpoint(checkpoint, signature)
+    pending = [task for task in tasks if task_id(task) not in done]
+    run = 0
+
+    def finish(result):
+        nonlocal best, tried, run
+        task, count, found = result
+        done.add(task_id(task))
+        best = heapq.nlargest(job.top, best + found)
+        tried += count
+        run += count
+        if checkpoint:
+            save_checkpoint(checkpoint, signature, done, best, tried)
+        if progress:
+            progress(len(done), run)
+
+    if workers <= 1:
+        _init_worker(job)
+        for task in pending:
+            finish(_search_task(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(job,)) as pool:
+            futures = [pool.submit(_search_task, task) for task in pending]
+            try:
+                for future in as_completed(futures):
+                    finish(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    return best
+
+
+def parse_numbers(text):
+    """'1-5,9' -> [1, 2, 3, 4, 5, 9]"""
+    numbers = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        numbers.extend(range(int(low), int(high or low) + 1))
+    return numbers
+
+
+def format_duration(seconds):
+    for unit, size in (("days", 86400), ("hours", 3600), ("minutes", 60)):
+        if seconds >= size:
+            return f"{seconds / size:,.1f} {unit}"
+    return f"{seconds:.1f} seconds"
+
+
+def print_results(job, results):
+    """Ranked keys with their esetup file and the start of the decryption"""
+    alphabet = job.wiring.alphabet
+    base = "".join(job.wiring.plugboard)
+    for rank, (score, order, reflector, positions, board) in enumerate(results, 1):
+        machine = job.machine(order, reflector, positions)
+        machine.plug = plug_table(board, alphabet)
+        windows = "".join(machine.start_windows)
+        preview = machine._encrypt_run(job.ciphertext()[:60]).decode('latin-1')
+        setup = esetup_text(order, windows, reflector,
+                            plugboard_pairs(board, base, alphabet))
+        print(f"#{rank}  score {score:.5f}  rotors {order}  windows {windows!r}  "
+              f"reflector {reflector}")
+        print(f"    {preview!r}")
+        if setup is None:
+            print(f"    plugboard {board!r}")
+        else:
+            print("    esetup: " + "\n    ".join(setup.splitlines()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ciphertext-only key search (rotor order, reflector, start positions, plugboard)")
+    parser.add_argument("ciphertext", nargs="?", default="encrypt",
+                        help="ciphertext file (default: encrypt)")
+    parser.add_argument("--machine", metavar="FILE",
+                        help="wirings from a machine file instead of main.cpp's")
+    parser.add_argument("-m", "--rotors", type=int, default=3, choices=(1, 2, 3, 4),
+                        help="rotors in the machine (default: 3)")
+    parser.add_argument("--rotor-set", default="1-10",
+                        help="rotor numbers to choose from (default: 1-10)")
+    parser.add_argument("--reflectors", default="1-4",
+                        help="reflector numbers to try (default: 1-4)")
+    parser.add_argument("--score", choices=SCORES,
+                        help="ioc, or bigram with --corpus (default: bigram if "
+                             "there is a corpus)")
+    parser.add_argument("--corpus", metavar="FILE",
+                        help="sample text in the plaintext's language, for bigram scoring")
+    parser.add_argument("--length", type=int, default=LENGTH,
+                        help=f"ciphertext characters scored (default: {LENGTH})")
+    parser.add_argument("--keep-fraction", type=float, default=KEEP_FRACTION,
+                        help=f"start positions kept after pruning (default: {KEEP_FRACTION})")
+    parser.add_argument("--top", type=int, default=TOP,
+                        help=f"keys to hill-climb and report (default: {TOP})")
+    parser.add_argument("--no-plugboard", action="store_true",
+                        help="skip the plugboard hill-climb")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="save progress here after every task and resume from it")
+    args = parser.parse_args(argv)
+
+    try:
+        wiring = load_machine(args.machine) if args.machine else DEFAULT_WIRING
+        alphabet = wiring.alphabet
+        codes = read_codes(args.ciphertext, alphabet)
+        score = args.score or ("bigram" if args.corpus else "ioc")
+        bigrams = None
+        if args.corpus:
+            bigrams = bigram_table(read_codes(args.corpus, alphabet), alphabet.size)
+        if score == "bigram" and bigrams is None:
+            raise ValueError("--score bigram needs --corpus")
+        job = SearchJob(wiring, codes, score, bigrams, args.length,
+                        keep_fraction=args.keep_fraction, top=args.top)
+        rotor_set = parse_numbers(args.rotor_set)
+        reflectors = parse_numbers(args.reflectors)
+        for n in rotor_set:
+            wiring.get_rotor(n)  # ValueError for numbers the set does not have
+        if any(not 0 <= r < len(wiring.reflectors) for r in reflectors):
+            raise ValueError(f"{wiring.name} has reflectors 0-{len(wiring.reflectors) - 1}")
+        tasks = [(order, r) for order in itertools.permutations(rotor_set, args.rotors)
+                 for r in reflectors]
+        if not tasks:
+            raise ValueError(f"--rotor-set needs at least {args.rotors} rotors "
+                             f"and --reflectors at least one reflector")
+        per_task = alphabet.size ** args.rotors
+        keyspace = len(tasks) * per_task
+        print(f"Searching {len(tasks):,} rotor orders/reflectors x {per_task:,} start "
+              f"positions = {keyspace:,} keys ({len(job.codes)} characters, {score}, "
+              f"{'NumPy' if NUMPY_AVAILABLE else 'pure Python'})", file=sys.stderr)
+
+        start = time.perf_counter()
+        rate = 0
+
+        def progress(done, tried):
+            nonlocal rate
+            rate = tried / (time.perf_counter() - start)
+            left = (len(tasks) - done) * per_task / rate
+            print(f"\r{done:,} of {len(tasks):,} tasks, {rate:,.0f} keys/s, "
+                  f"{format_duration(left)} left ", end="", file=sys.stderr)
+
+        best = search(job, tasks, args.workers, args.checkpoint, progress)
+        print(file=sys.stderr)
+        if rate:
+            print(f"{rate:,.0f} keys/s: the whole keyspace takes "
+                  f"{format_duration(keyspace / rate)} here", file=sys.stderr)
+
+        if args.no_plugboard:
+            results = [(s, o, r, p, "".join(wiring.plugboard)) for s, o, r, p in best]
+        elif args.workers > 1 and len(best) > 1:
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(best))) as pool:
+                results = list(pool.map(climb_plugboard, [job] * len(best), best))
+        else:
+            results = [climb_plugboard(job, candidate) for candidate in best]
+        results.sort(key=lambda result: -result[0])
+        print_results(job, results)
+    except KeyboardInterrupt:
+        print("\nInterrupted" + (f"; rerun with --checkpoint {args.checkpoint} to resume"
+                                 if args.checkpoint else ""), file=sys.stderr)
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
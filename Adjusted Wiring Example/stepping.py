@@ -0,0 +1,485 @@
+"""
+Stepping period and state-space analyzer for the ENIGMA machine
+turn() in main.cpp double steps on each rotor's NOTCH character; this works
+out what that does over all N**m rotor states (N = 69): which states the
+rotors can still reach after a turn, the cycles they then go round, and
+so the longest message before the rotor states, and with them the key
+stream, repeat.
+
+States are integers, p1 + N * p2 + N**2 * p3 + N**3 * p4 (rotor 1 fastest,
+as crib.py counts them), never tuples:
+- orbit() runs Brent's cycle detection from one state, holding two codes.
+- analyze() builds the stepping table of every state (next code by code,
+  int32 with NumPy) and from it the reachable (recurrent) states, the
+  cycles and each state's distance to its cycle. The result seeks k turns
+  ahead with one table lookup once on the cycle, and can be saved and
+  loaded again (StateSpace.save / load).
+
+turn() only ever compares a position with its rotor's notch and adds one,
+so shifting every position by its notch gives the same stepping for any
+rotor order. The analysis is therefore done once per "which rotors have a
+notch" signature and shared by all orders with it (a process pool runs the
+distinct signatures side by side); each order's start windows are shifted
+the same way to look up their own tail and period.
+
+Usage:
+  python stepping.py                                 (3 of rotors 1-10, all 720 orders)
+  python stepping.py -m 4 --windows aaaa --list
+  python stepping.py --order 3,7,9 --windows "k(x"   (one configuration, Brent's check too)
+  python stepping.py --order 3,7,9 --save stepping.npz   (stepping tables for fast seeking)
+"""
+
+import argparse
+import collections
+import functools
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from enigma import DEFAULT_WIRING, NCHARS, load_machine
+from keysearch import format_duration, parse_numbers
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # Tables are lists; four rotors are out of reach
+
+# How many notches (rotor 1 first) turn() looks at, by number of rotors: the
+# last rotor's only counts with two rotors, where it double steps rotor 2 itself
+USED_NOTCHES = {0: 0, 1: 0, 2: 2, 3: 2, 4: 3}
+
+
+# ===========================
+# ENCODED STATES
+# ===========================
+
+def encode(state, n=NCHARS):
+    """Rotor positions (rotor 1 first) as one integer"""
+    code = 0
+    for p in reversed(state):
+        code = code * n + p
+    return code
+
+
+def decode(code, m, n=NCHARS):
+    """encode() undone: the positions of m rotors"""
+    return tuple(code // n ** j % n for j in range(m))
+
+
+def next_code(code, notches, m, n=NCHARS):
+    """next_state() on an encoded state"""
+    p1 = code % n
+    if m == 1:
+        return (p1 + 1) % n
+    p2 = code // n % n
+    rest = code // (n * n)   # Rotors 3 and 4
+    at2 = p2 == notches[1]
+    if at2 or p1 == notches[0]:
+        if m > 2 and at2:
+            p3 = rest % n
+            rest += ((p3 + 1) % n) - p3
+        p2 = (p2 + 1) % n
+    if m > 3 and code // (n * n) % n == notches[2]:
+        p4 = rest // n
+        rest += (((p4 + 1) % n) - p4) * n
+    return ((rest * n) + p2) * n + (p1 + 1) % n
+
+
+def orbit(code, step):
+    """(tail, period) of the walk from code, by Brent's cycle detection
+    step maps a code to the next one; tail counts the turns before the
+    walk first reaches its cycle."""
+    # Find the period: the hare runs ahead in powers of two
+    power = period = 1
+    tortoise, hare = code, step(code)
+    while tortoise != hare:
+        if power == period:
+            tortoise = hare
+            power *= 2
+            period = 0
+        hare = step(hare)
+        period += 1
+    # Find the tail: two walkers period apart meet where the cycle starts
+    tortoise = hare = code
+    for _ in range(period):
+        hare = step(hare)
+    tail = 0
+    while tortoise != hare:
+        tortoise, hare = step(tortoise), step(hare)
+        tail += 1
+    return tail, period
+
+
+def reachable(code, step, size):
+    """Bitmap (one bit per state) of the states the walk from code visits"""
+    seen = bytearray((size + 7) // 8)
+    while not seen[code >> 3] & (1 << (code & 7)):
+        seen[code >> 3] |= 1 << (code & 7)
+        code = step(code)
+    return seen
+
+
+def canonical(notches, m):
+    """Notches with every notched rotor's notch at 0 (see relative)"""
+    used = USED_NOTCHES[m]
+    return tuple(None if k >= used or c is None else 0 for k, c in enumerate(notches[:m]))
+
+
+def relative(state, notches, n=NCHARS):
+    """state shifted so each used notch is at 0, for canonical(notches)"""
+    used = USED_NOTCHES[len(state)]
+    return tuple(p if k >= used or c is None else (p - c) % n
+                 for k, (p, c) in enumerate(zip(state, notches)))
+
+
+def absolute(state, notches, n=NCHARS):
+    """relative() undone"""
+    used = USED_NOTCHES[len(state)]
+    return tuple(p if k >= used or c is None else (p + c) % n
+                 for k, (p, c) in enumerate(zip(state, notches)))
+
+
+# ===========================
+# WHOLE STATE SPACE
+# ===========================
+
+class StateSpace:
+    """Stepping of every state for one notch signature (see analyze)
+    States are in the relative frame of canonical(notches). next[code] is
+    the code after one turn(), tail[code] the turns before the walk from
+    code reaches its cycle and label[code] the smallest code on that cycle;
+    cycles maps each label to its cycle's length. order lists the recurrent
+    states in walking order, cycle by cycle, and where[code] is a recurrent
+    state's index in it, so seeking along a cycle is one lookup."""
+
+    def __init__(self, notches, m, n, next_codes, tail, label, cycles, order, where):
+        self.notches = notches
+        self.m = m
+        self.n = n
+        self.size = n ** m
+        self.next = next_codes
+        self.tail = tail
+        self.label = label
+        self.cycles = cycles
+        self.order = order
+        self.where = where
+        self.starts = {}  # label -> index of its cycle in order
+        k = 0
+        for low in sorted(cycles):
+            self.starts[low] = k
+            k += cycles[low]
+
+    def save(self, path):
+        """Write the tables (NumPy .npz) for load()"""
+        np.savez_compressed(path, m=self.m, n=self.n,
+                            notches=[-1 if c is None else c for c in self.notches],
+                            next=self.next, tail=self.tail, label=self.label,
+                            order=self.order, where=self.where)
+
+    @classmethod
+    def load(cls, path):
+        """StateSpace saved by save(), ready to seek without analyzing again"""
+        with np.load(path) as f:
+            notches = tuple(None if c < 0 else int(c) for c in f["notches"])
+            labels, counts = np.unique(f["label"][f["order"]], return_counts=True)
+            return cls(notches, int(f["m"]), int(f["n"]), f["next"], f["tail"], f["label"],
+                       dict(zip(labels.tolist(), counts.tolist())), f["order"], f["where"])
+
+    def stats(self):
+        """Summary: states, recurrent states, deepest tail, cycle lengths and
+        the longest message before the rotor states repeat"""
+        # Character i uses the state after i + 1 turns, so count from there
+        if NUMPY_AVAILABLE:
+            lengths = np.zeros(self.size, dtype=np.int64)
+            lengths[list(self.cycles)] = list(self.cycles.values())
+            longest = int((self.tail[self.next] + lengths[self.label[self.next]]).max())
+        else:
+            longest = max(self.tail[c] + self.cycles[self.label[c]] for c in self.next)
+        return {"states": self.size, "recurrent": len(self.order),
+                "depth": int(self.tail.max() if NUMPY_AVAILABLE else max(self.tail)),
+                "cycles": dict(sorted(collections.Counter(self.cycles.values()).items())),
+                "longest": longest}
+
+    def period(self, state, notches):
+        """(tail, period, longest message) from a start state with these notches"""
+        code = encode(relative(state, notches, self.n), self.n)
+        first = int(self.next[code])
+        period = self.cycles[int(self.label[first])]
+        return int(self.tail[code]), period, int(self.tail[first]) + period
+
+    def seek(self, state, notches, k):
+        """Rotor positions after k turn()s from state, as seek_state"""
+        code = encode(relative(state, notches, self.n), self.n)
+        while k and self.tail[code]:
+            code = int(self.next[code])
+            k -= 1
+        low = int(self.label[code])
+        base = self.starts[low]
+        index = (int(self.where[code]) - base + k) % self.cycles[low]
+        return absolute(decode(int(self.order[base + index]), self.m, self.n), notches, self.n)
+
+
+def _step_table(notches, m, n):
+    """next_code of every state"""
+    size = n ** m
+    if not NUMPY_AVAILABLE:
+        return [next_code(code, notches, m, n) for code in range(size)]
+    ids = np.arange(size, dtype=np.int32)
+    pos = [ids // n ** j % n for j in range(m)]
+    del ids
+    notch = [-1 if c is None else c for c in notches]
+    # turn(): every test looks at the positions before anything moves
+    at = [p == c for p, c in zip(pos, notch)]
+    if m > 3:
+        pos[3] = (pos[3] + at[2]) % n
+    if m > 2:
+        pos[2] = (pos[2] + at[1]) % n
+    if m > 1:
+        pos[1] = (pos[1] + (at[0] | at[1])) % n
+    pos[0] = (pos[0] + 1) % n
+    code = np.zeros(size, dtype=np.int32)
+    for p in reversed(pos):
+        code *= n
+        code += p
+    return code
+
+
+def analyze(notches, m, n=NCHARS):
+    """StateSpace of m rotors with notch positions notches (None: no notch)"""
+    notches = canonical(notches, m)
+    size = n ** m
+    if not NUMPY_AVAILABLE and m > 3:
+        raise ValueError("Four rotors need NumPy")
+    nxt = _step_table(notches, m, n)
+
+    if NUMPY_AVAILABLE:
+        # Drop states nothing steps into until the rest map onto themselves
+        alive = np.ones(size, dtype=bool)
+        while True:
+            image = np.zeros(size, dtype=bool)
+            image[nxt[alive]] = True
+            if image.sum() == alive.sum():
+                break
+            alive = image
+        tail = np.zeros(size, dtype=np.int32)
+        entry = np.arange(size, dtype=np.int32)  # First recurrent state of each walk
+        while not alive[entry].all():
+            tail += ~alive[entry]
+            entry = nxt[entry]
+        # Pointer doubling: the smallest code within 2**k turns. Once a round
+        # changes no recurrent state, every one holds its cycle's minimum.
+        low = np.arange(size, dtype=np.int32)
+        jump = nxt
+        span = 1
+        while span < size:
+            lower = np.minimum(low, low[jump])
+            if np.array_equal(lower[alive], low[alive]):
+                break
+            low = lower
+            jump = jump[jump]
+            span *= 2
+        label = low[entry]
+        del low, jump, entry
+        labels, counts = np.unique(label[alive], return_counts=True)
+        cycles = dict(zip(labels.tolist(), counts.tolist()))
+
+        # Recurrent states in walking order, one cycle after another: all
+        # cycles are walked together, longest first so the ones still going
+        # are a prefix
+        lows = sorted(cycles, key=lambda low: -cycles[low])
+        lengths = np.array([cycles[low] for low in lows])
+        starts = np.cumsum([0] + [cycles[low] for low in sorted(cycles)])[:-1]
+        base = starts[np.searchsorted(sorted(cycles), lows)]
+        order = np.empty(int(lengths.sum()), dtype=np.int32)
+        current = np.array(lows, dtype=np.int32)
+        active = len(lows)
+        for t in range(int(lengths[0]) if len(lows) else 0):
+            while lengths[active - 1] <= t:
+                active -= 1
+            order[base[:active] + t] = current[:active]
+            current[:active] = nxt[current[:active]]
+        where = np.full(size, -1, dtype=np.int32)
+        where[order] = np.arange(len(order), dtype=np.int32)
+    else:
+        alive = [True] * size
+        while True:
+            image = [False] * size
+            for code in range(size):
+                if alive[code]:
+                    image[nxt[code]] = True
+            if sum(image) == sum(alive):
+                break
+            alive = image
+        label = [-1] * size
+        cycles = {}
+        for code in range(size):
+            if alive[code] and label[code] < 0:
+                members = [code]
+                c = nxt[code]
+                while c != code:
+                    members.append(c)
+                    c = nxt[c]
+                low = min(members)
+                for c in members:
+                    label[c] = low
+                cycles[low] = len(members)
+        tail = [0] * size
+        for code in range(size):
+            c = code
+            while not alive[c]:
+                c = nxt[c]
+                tail[code] += 1
+            label[code] = label[c]
+        order = []
+        where = [-1] * size
+        for low in sorted(cycles):
+            c = low
+            for _ in range(cycles[low]):
+                where[c] = len(order)
+                order.append(c)
+                c = nxt[c]
+    return StateSpace(notches, m, n, nxt, tail, label, cycles, order, where)
+
+
+# ===========================
+# DRIVER
+# ===========================
+
+def describe(notches):
+    """Human name of a canonical notch signature"""
+    missing = [str(k) for k, c in enumerate(notches, 1) if c is None
+               and k <= USED_NOTCHES[len(notches)]]
+    if not missing:
+        return "every notch turn() looks at is on the rotor"
+    return f"no notch on rotor {', '.join(missing)}"
+
+
+def _analyze_group(task):
+    """Worker task: one signature's state space, then each order's start
+    Returns (signature, stats, [(order, tail, period, longest)])."""
+    signature, m, n, starts = task
+    space = analyze(signature, m, n)
+    return signature, space.stats(), [(order,) + space.period(state, notches)
+                                      for order, state, notches in starts]
+
+
+def single(task, windows, save=None):
+    """One order: its state space, Brent's check from the windows on the
+    real notches, and the stepping tables if save names a file"""
+    signature, m, n, [(order, state, notches)] = task
+    start = time.perf_counter()
+    space = analyze(signature, m, n)
+    print(f"Rotors {','.join(map(str, order))} over {n} characters, {describe(signature)} "
+          f"({format_duration(time.perf_counter() - start)})")
+    print_stats(space.stats())
+
+    tail, period, longest = space.period(state, notches)
+    print(f"  from windows {windows!r}: tail {tail}, period {period:,}, "
+          f"{longest:,} characters before repeating")
+    step = functools.partial(next_code, notches=notches, m=m, n=n)
+    code = encode(state, n)
+    start = time.perf_counter()
+    brent = orbit(code, step)
+    seen = sum(bin(b).count("1") for b in reachable(code, step, n ** m))
+    print(f"  Brent's cycle detection from there: tail {brent[0]}, period {brent[1]:,}, "
+          f"{seen:,} states reachable ({format_duration(time.perf_counter() - start)})")
+    if brent != (tail, period):
+        raise ValueError("Brent's cycle detection disagrees with the stepping table")
+
+    if save:
+        space.save(save)
+        print(f"Stepping tables written to {save} (StateSpace.load, then seek)")
+
+
+def print_stats(stats):
+    share = stats["recurrent"] / stats["states"]
+    cycles = ", ".join(f"{count:,} of {length:,} turns"
+                       for length, count in stats["cycles"].items())
+    print(f"  {stats['states']:,} states, {stats['recurrent']:,} ({share:.2%}) still "
+          f"reachable after {stats['depth']} turns")
+    print(f"  cycles: {cycles}")
+    print(f"  longest message before the rotor states repeat: {stats['longest']:,} characters")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Stepping period and reachable rotor states for every rotor order")
+    parser.add_argument("--machine", metavar="FILE",
+                        help="wirings from a machine file instead of main.cpp's")
+    parser.add_argument("-m", "--rotors", type=int, default=3, choices=(1, 2, 3, 4),
+                        help="rotors in the machine (default: 3)")
+    parser.add_argument("--rotor-set", default="1-10",
+                        help="rotor numbers to choose from (default: 1-10)")
+    parser.add_argument("--order", help="one rotor order, rotor 1 first (e.g. 3,7,9)")
+    parser.add_argument("--windows",
+                        help="start window characters, rotor 1 first (default: all 'a')")
+    parser.add_argument("--list", action="store_true", help="print every order's result")
+    parser.add_argument("--save", metavar="FILE",
+                        help="with --order: write the stepping tables (.npz) for seeking")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    try:
+        wiring = load_machine(args.machine) if args.machine else DEFAULT_WIRING
+        n = wiring.alphabet.size
+        if args.order:
+            orders = [tuple(parse_numbers(args.order))]
+            if not 1 <= len(orders[0]) <= 4:
+                raise ValueError("--order takes 1 to 4 rotors")
+        else:
+            orders = list(itertools.permutations(parse_numbers(args.rotor_set), args.rotors))
+            if not orders:
+                raise ValueError(f"--rotor-set needs at least {args.rotors} rotors")
+        m = len(orders[0])
+        windows = args.windows or wiring.alphabet.chars[0] * m
+        if len(windows) != m:
+            raise ValueError(f"Need {m} window characters")
+        if args.save and not (args.order and NUMPY_AVAILABLE):
+            raise ValueError("--save needs --order and NumPy")
+
+        groups = collections.defaultdict(list)
+        for order in orders:
+            rotors = [wiring.get_rotor(r) for r in order]
+            notches = tuple(r.notch_pos for r in rotors)
+            state = tuple(r.position_of(w) for r, w in zip(rotors, windows))
+            groups[canonical(notches, m)].append((order, state, notches))
+        tasks = [(signature, m, n, starts) for signature, starts in groups.items()]
+        if args.order:
+            single(tasks[0], windows, args.save)
+            return 0
+
+        start = time.perf_counter()
+        if args.workers <= 1 or len(tasks) == 1:
+            results = [_analyze_group(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(tasks))) as pool:
+                results = list(pool.map(_analyze_group, tasks))
+        print(f"{len(orders):,} orders of {m} rotors over {n} characters, "
+              f"{len(tasks)} stepping signature{'s' * (len(tasks) != 1)} "
+              f"({format_duration(time.perf_counter() - start)})")
+
+        for signature, stats, periods in results:
+            print(f"\n{describe(signature)} ({len(periods):,} orders):")
+            print_stats(stats)
+            print(f"  from windows {windows!r}:")
+            if args.list:
+                for order, tail, period, longest in periods:
+                    print(f"    {','.join(map(str, order)):>11}: tail {tail}, period "
+                          f"{period:,}, {longest:,} characters before repeating")
+            else:
+                seen = collections.Counter(result[1:] for result in periods)
+                for (tail, period, longest), count in sorted(seen.items()):
+                    print(f"    {count:,} orders: tail {tail}, period {period:,}, "
+                          f"{longest:,} characters before repeating")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+"""
+Wiring checker for the ENIGMA machine
+Validates rotors, reflectors, notches and the plugboard, read straight from
+main.cpp's ROTOR / NOTCH / REFLECTOR / PLUGBOARD arrays (or a config file),
+so there is no second copy of the wirings to keep in sync.
+
+Every check is one pass over the wiring with a precomputed character ->
+index map (no alph.index() inside loops), and valid wirings take a fast
+path, so candidate lists from the rotor generators go through at many
+thousands of wirings per second.
+
+Usage:
+  python wiring_check.py                          (checks main.cpp next to this file)
+  python wiring_check.py --source main.cpp --only reflectors
+  python wiring_check.py --config machine.cfg
+  python wiring_check.py --candidates new_rotors.txt --kind rotor
+
+Machine file (--config; enigma.py --machine runs on the same files): one
+entry per line, lines starting with '#' are comments, strings in C syntax.
+Rotors and reflectors are numbered from 1 in file order, like main.cpp's;
+the notch is optional, alphabet and plugboard default to main.cpp's:
+  alphabet  "abc...?"
+  rotor     "(etazr'=in/..."  'z'
+  reflector "q8ercj}ltf..."
+  plugboard "badcfehgji..."
+  python wiring_check.py --export default.machine   (main.cpp's wirings as a machine file)
+
+Candidate file: one raw wiring per line (only the line end is stripped).
+"""
+
+import argparse
+import functools
+import os
+import re
+import sys
+import time
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.cpp")
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789.,:; ()[]'\"-+/*&~`!@#$%^_={}|\\<>?"
+KINDS = ("rotor", "reflector", "plugboard")
+MAX_LISTED = 10  # Errors of one kind listed before the rest are summarized
+
+
+# ===========================
+# CHECKS
+# ===========================
+# Each check returns a list of error messages; an empty list means valid.
+
+@functools.lru_cache(maxsize=None)
+def alphabet_index(alphabet):
+    """char -> index map of an alphabet, built once per alphabet"""
+    return {c: i for i, c in enumerate(alphabet)}
+
+
+def _listed(items):
+    """Show at most MAX_LISTED items of a list in a message"""
+    shown = ", ".join(repr(c) for c in items[:MAX_LISTED])
+    if len(items) > MAX_LISTED:
+        shown += f", ... ({len(items)} in all)"
+    return shown
+
+
+def check_permutation(wiring, alphabet=ALPHABET):
+    """wiring must use every alphabet character exactly once"""
+    if len(wiring) == len(alphabet) and set(wiring) == set(alphabet):
+        return []
+    index = alphabet_index(alphabet)
+    errors = []
+    if len(wiring) != len(alphabet):
+        errors.append(f"Length {len(wiring)}, expected {len(alphabet)}")
+    seen = set()
+    duplicates = []
+    foreign = []
+    for c in wiring:
+        if c not in index:
+            foreign.append(c)
+        elif c in seen:
+            duplicates.append(c)
+        seen.add(c)
+    if duplicates:
+        errors.append(f"Duplicates: {_listed(duplicates)}")
+    if foreign:
+        errors.append(f"Not in the alphabet: {_listed(foreign)}")
+    missing = [c for c in alphabet if c not in seen]
+    if missing:
+        errors.append(f"Missing characters: {_listed(missing)}")
+    return errors
+
+
+def check_involution(wiring, alphabet=ALPHABET):
+    """Every pair must be symmetrical: a -> b needs b -> a
+    (wiring must already be a permutation)"""
+    index = alphabet_index(alphabet)
+    if all(wiring[index[c]] == a for a, c in zip(alphabet, wiring)):
+        return []
+    errors = [f"{a}->{c} but {c}->{wiring[index[c]]} (should be {a})"
+              for a, c in zip(alphabet, wiring) if wiring[index[c]] != a]
+    shown = errors[:MAX_LISTED]
+    if len(errors) > MAX_LISTED:
+        shown.append(f"... {len(errors)} symmetry errors in all")
+    return shown
+
+
+def fixed_points(wiring, alphabet=ALPHABET):
+    """Characters the wiring maps to themselves"""
+    return [c for a, c in zip(alphabet, wiring) if a == c]
+
+
+def check_rotor(wiring, notch=None, alphabet=ALPHABET):
+    """A rotor is any permutation; its notch must be one of its characters"""
+    errors = check_permutation(wiring, alphabet)
+    if notch is not None and notch not in alphabet_index(alphabet):
+        errors.append(f"Notch {notch!r} is not in the alphabet, the rotor never turns over")
+    return errors
+
+
+def check_reflector(wiring, alphabet=ALPHABET):
+    """A reflector is an involution with as few fixed points as possible
+    (none for an even alphabet, exactly one for an odd one like main.cpp's
+    69 characters)"""
+    errors = check_permutation(wiring, alphabet)
+    if errors:
+        return errors
+    errors = check_involution(wiring, alphabet)
+    fixed = fixed_points(wiring, alphabet)
+    if len(fixed) > len(alphabet) % 2:
+        errors.append(f"{len(fixed)} characters reflect to themselves "
+                      f"(at most {len(alphabet) % 2}): {_listed(fixed)}")
+    return errors
+
+
+def check_plugboard(wiring, alphabet=ALPHABET):
+    """A plugboard is an involution; unplugged characters map to themselves"""
+    errors = check_permutation(wiring, alphabet)
+    return errors or check_involution(wiring, alphabet)
+
+
+CHECKS = {"rotor": check_rotor, "reflector": check_reflector,
+          "plugboard": check_plugboard}
+
+
+def check_machine(definition):
+    """Check a parsed machine definition (see parse_cpp)
+    Returns a list of (name, errors) for every part, in order."""
+    alphabet = definition["alphabet"]
+    results = []
+    rotors = definition["rotors"]
+    notches = definition["notches"]
+    if len(notches) != len(rotors):
+        results.append(("NOTCH", [f"{len(notches)} notches for {len(rotors)} rotors"]))
+    for i, wiring in enumerate(rotors):
+        notch = notches[i] if i < len(notches) else None
+        if i == 0:  # "rotor" 0 is the input alphabet, not used
+            errors = [] if wiring == alphabet else ["Rotor 0 should be the input alphabet"]
+        else:
+            errors = check_rotor(wiring, notch, alphabet)
+        results.append((f"Rotor {i}", errors))
+    for i, wiring in enumerate(definition["reflectors"]):
+        if i == 0:
+            errors = [] if wiring == alphabet else ["Reflector 0 should be the input alphabet"]
+        else:
+            errors = check_reflector(wiring, alphabet)
+        results.append((f"Reflector {i}", errors))
+    if definition["plugboard"] is not None:
+        results.append(("Plugboard", check_plugboard(definition["plugboard"], alphabet)))
+    return results
+
+
+# ===========================
+# PARSING
+# ===========================
+
+C_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', '\\': '\\',
+             '"': '"', "'": "'", '?': '?', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+# Comments, string and char literals, and the punctuation that matters
+C_TOKEN = re.compile(r'//[^\n]*|/\*.*?\*/|"((?:[^"\\\n]|\\.)*)"|\'((?:[^\'\\\n]|\\.)+)\'|[{}=;]|\n',
+                     re.DOTALL)
+DEFINE = re.compile(r'^\s*#define\s+(\w+)\s+(\d+)', re.MULTILINE)
+ARRAY_NAMES = {"ROTOR": "rotors", "NOTCH": "notches", "REFLECTOR": "reflectors"}
+SCALAR_NAMES = {"PLUGBOARD": "plugboard", "alphabet": "alphabet"}
+
+
+def _c_escape(m):
+    esc = m.group(1)
+    if esc[0] == 'x':
+        return chr(int(esc[1:], 16) & 0xFF)
+    if esc[0] in '01234567':
+        return chr(int(esc, 8) & 0xFF)
+    return C_ESCAPES.get(esc, esc)
+
+
+def c_unescape(body):
+    """Text of a C string/char literal body"""
+    return re.sub(r'\\(x[0-9a-fA-F]+|[0-7]{1,3}|.)', _c_escape, body)
+
+
+def c_tokens(text):
+    """(kind, value, line, offset) for the literals and punctuation in C
+    source; kind is 'str', 'char' or the punctuation character itself."""
+    line = 1
+    for m in C_TOKEN.finditer(text):
+        tok = m.group(0)
+        if tok == '\n':
+            line += 1
+        elif tok.startswith(('//', '/*')):
+            line += tok.count('\n')
+        elif m.group(1) is not None:
+            yield 'str', c_unescape(m.group(1)), line, m.start()
+        elif m.group(2) is not None:
+            yield 'char', c_unescape(m.group(2)), line, m.start()
+        else:
+            yield tok, tok, line, m.start()
+
+
+def _declared_name(text, names):
+    """The name in the declaration ending at the end of text, if any"""
+    m = re.search(r'\b(' + '|'.join(names) + r')\s*(\[[^\]]*\])?\s*$', text)
+    return m.group(1) if m else None
+
+
+def parse_cpp(text):
+    """Machine definition from main.cpp source
+    Returns a dict with alphabet, rotors, notches, reflectors, plugboard,
+    defines (#define NAME number) and warnings (e.g. stray string literals
+    outside any initializer, which stop main.cpp from compiling)."""
+    definition = {"alphabet": None, "rotors": [], "notches": [], "reflectors": [],
+                  "plugboard": None, "defines": {}, "warnings": []}
+    for name, value in DEFINE.findall(text):
+        definition["defines"][name] = int(value)
+
+    # Declarations are found from the source text before each '='
+    depth = 0
+    target = None     # list being filled by the current initializer
+    scalar = None     # scalar name waiting for its string
+    previous = None
+    for kind, value, line, offset in c_tokens(text):
+        if kind == '=' and depth == 0:
+            head = text[text.rfind('\n', 0, offset) + 1:offset]
+            array = _declared_name(head, ARRAY_NAMES)
+            scalar = _declared_name(head, SCALAR_NAMES)
+            target = definition[ARRAY_NAMES[array]] if array else None
+        elif kind == '{':
+            depth += 1
+        elif kind == '}':
+            if depth == 0:
+                definition["warnings"].append(f"line {line}: '}}' without a matching '{{'")
+            else:
+                depth -= 1
+            if depth == 0:
+                target = None
+        elif kind in ('str', 'char'):
+            if depth == 1 and target is not None:
+                target.append(value)
+            elif depth == 0 and scalar is not None and previous == '=':
+                definition[SCALAR_NAMES[scalar]] = value
+                scalar = None
+            elif depth == 0:
+                definition["warnings"].append(
+                    f"line {line}: string outside any initializer: {value[:20]!r}...")
+        previous = kind
+
+    if definition["alphabet"] is None:
+        definition["alphabet"] = ALPHABET
+    nchars = definition["defines"].get("Nchars")
+    if nchars is not None and nchars != len(definition["alphabet"]):
+        definition["warnings"].append(
+            f"Nchars is {nchars} but the alphabet has {len(definition['alphabet'])} characters")
+    for name, key, define in (("ROTOR", "rotors", "Nrotors"),
+                              ("REFLECTOR", "reflectors", "Nrefls")):
+        size = definition["defines"].get(define)
+        if size is not None and len(definition[key]) > size:
+            definition["warnings"].append(
+                f"{name} has {len(definition[key])} entries, {define} is {size}")
+    return definition
+
+
+def parse_config(text):
+    """Machine definition from a config file (format in the module docstring)"""
+    definition = {"alphabet": ALPHABET, "rotors": [], "notches": [], "reflectors": [],
+                  "plugboard": None, "defines": {}, "warnings": []}
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        kind, _, rest = line.partition(' ')
+        values = [value for tok, value, _, _ in c_tokens(rest) if tok in ('str', 'char')]
+        if kind not in ("alphabet",) + KINDS or not values:
+            raise ValueError(f"Config line {number}: expected '<kind> \"wiring\"', got {raw!r}")
+        if kind == "rotor":
+            definition["rotors"].append(values[0])
+            definition["notches"].append(values[1] if len(values) > 1 else None)
+        elif kind == "reflector":
+            definition["reflectors"].append(values[0])
+        else:
+            definition[kind] = values[0]
+    # Config files have no unused entry 0, so number from 1 like main.cpp
+    if definition["rotors"]:
+        definition["rotors"].insert(0, definition["alphabet"])
+        definition["notches"].insert(0, None)
+    if definition["reflectors"]:
+        definition["reflectors"].insert(0, definition["alphabet"])
+    return definition
+
+
+def c_string(text):
+    """C string literal for text"""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def c_char(c):
+    """C char literal for c"""
+    return "'" + {'\\': '\\\\', "'": "\\'"}.get(c, c) + "'"
+
+
+def format_config(definition):
+    """Machine file text for a definition (entry 0, the input alphabet,
+    of rotors and reflectors is implied and left out)"""
+    lines = ["# ENIGMA machine definition", f"alphabet  {c_string(definition['alphabet'])}"]
+    for wiring, notch in zip(definition["rotors"][1:], definition["notches"][1:]):
+        lines.append(f"rotor     {c_string(wiring)}" + (f" {c_char(notch)}" if notch else ""))
+    for wiring in definition["reflectors"][1:]:
+        lines.append(f"reflector {c_string(wiring)}")
+    if definition["plugboard"] is not None:
+        lines.append(f"plugboard {c_string(definition['plugboard'])}")
+    return "\n".join(lines) + "\n"
+
+
+def decode_text(raw):
+    """Text of a machine file or source: UTF-8, or Latin-1 when the bytes
+    are not valid UTF-8 (main.cpp and machine files written before
+    alphabets could go past U+00FF)"""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def load_definition(path):
+    """Parse main.cpp-style source (.c/.cpp/.h) or a config file"""
+    with open(path, 'rb') as f:
+        text = decode_text(f.read())
+    if path.lower().endswith(('.c', '.cpp', '.h', '.hpp')):
+        return parse_cpp(text)
+    return parse_config(text)
+
+
+def check_candidates(lines, kind, alphabet=ALPHABET):
+    """Yield (line number, wiring, errors) for a stream of candidate wirings"""
+    check = CHECKS[kind]
+    for number, line in enumerate(lines, 1):
+        wiring = line.rstrip('\r\n')
+        if wiring:
+            yield number, wiring, check(wiring, alphabet=alphabet)
+
+
+# ===========================
+# REPORTING
+# ===========================
+
+def print_results(results):
+    """Print ✓/✗ per part; returns the number of parts with errors"""
+    failed = 0
+    for name, errors in results:
+        if errors:
+            failed += 1
+            print(f"{name}: ✗")
+            for error in errors:
+                print(f"    {error}")
+        else:
+            print(f"{name}: ✓")
+    return failed
+
+
+def run_checks(source=DEFAULT_SOURCE, only=None):
+    """Check the wirings in source and print the results
+    only limits the report to 'rotors', 'reflectors' or 'plugboard'.
+    Returns the exit status: 1 if a wiring checked is wrong. Parser
+    warnings (stray text in the source and the like) are printed but do
+    not count, so the status says whether the wirings are good."""
+    definition = load_definition(source)
+    print(f"{source}: alphabet of {len(definition['alphabet'])} characters")
+    for warning in definition["warnings"]:
+        print(f"  ⚠ {warning} (warning only)")
+    results = check_machine(definition)
+    if only:
+        prefix = {"rotors": ("Rotor", "NOTCH"), "reflectors": ("Reflector",),
+                  "plugboard": ("Plugboard",)}[only]
+        results = [r for r in results if r[0].startswith(prefix)]
+    failed = print_results(results)
+    print(f"\n{len(results) - failed} of {len(results)} valid")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate ENIGMA wirings")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="C++ source with the wiring arrays (default: main.cpp)")
+    source.add_argument("--config", help="machine config file instead of C++ source")
+    source.add_argument("--candidates", help="file of candidate wirings, one per line "
+                                             "('-' for stdin)")
+    parser.add_argument("--kind", choices=KINDS, default="rotor",
+                        help="with --candidates: what the wirings are (default: rotor)")
+    parser.add_argument("--only", choices=("rotors", "reflectors", "plugboard"),
+                        help="report only one part of the machine")
+    parser.add_argument("--export", metavar="FILE",
+                        help="write the checked wirings to FILE as a machine file")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.export:
+            definition = load_definition(args.config or args.source)
+            with open(args.export, "w", encoding="utf-8", newline="\n") as f:
+                f.write(format_config(definition))
+            print(f"Wrote {args.export}")
+            return 0
+        if args.candidates:
+            f = sys.stdin if args.candidates == '-' else open(args.candidates, encoding='latin-1')
+            with f:
+                start = time.perf_counter()
+                total = bad = 0
+                for number, wiring, errors in check_candidates(f, args.kind):
+                    total += 1
+                    if errors:
+                        bad += 1
+                        print(f"line {number}: ✗ {'; '.join(errors)}")
+                elapsed = time.perf_counter() - start
+            print(f"{total - bad} of {total} {args.kind} wirings valid "
+                  f"({total / elapsed if elapsed else 0:,.0f} per second)")
+            return 1 if bad else 0
+        return run_checks(args.config or args.source, args.only)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
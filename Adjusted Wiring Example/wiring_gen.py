@@ -0,0 +1,432 @@
+"""
+Bulk rotor/reflector generator for the ENIGMA machine
+Generates candidate wirings in batches, rejects duplicates, scores the
+rest and prints the best ones as ready-to-paste main.cpp blocks
+(ROTOR[] + NOTCH[], or REFLECTOR[]), or with --replace as single entries
+to paste over the broken ones, the rest of the array kept.
+
+- Randomness comes from a SHAKE-256 stream (HashDRBG): cryptographically
+  strong and repeatable with --seed. Every wiring is the argsort of 64-bit
+  random keys, so a seed gives the same wirings with or without NumPy.
+- Reflectors pair up consecutive entries of a random permutation: a
+  uniform random involution in linear time, with one fixed point for
+  main.cpp's odd 69-character alphabet.
+- Scores: differential uniformity (the largest number of x with
+  S(x + a) - S(x) = b, over a != 0 and b; lower is better; shifting the
+  rotor to any offset conjugates it by a rotation, which leaves this
+  unchanged, so one figure covers all 69 offsets), fixed points and cycle
+  structure.
+- The index stores a hash of each wiring's canonical form, the smallest of
+  its 69 rotation conjugates S(x + o) - o. A rotor conjugated that way is
+  the same rotor at another ring setting, so both duplicates and
+  conjugate-equivalent wirings are rejected. The wirings already in
+  main.cpp are in the index from the start.
+
+Usage:
+  python wiring_gen.py --kind rotor --count 100000 --keep 10 --seed 1
+  python wiring_gen.py --kind reflector --count 1000000 --keep 4 -o reflectors.txt
+  python wiring_gen.py --kind rotor --replace 2,4   (new rotors 2 and 4 only)
+  python wiring_gen.py --count 50000 --candidates all.txt   (then: python wiring_check.py --candidates all.txt)
+"""
+
+import argparse
+import hashlib
+import heapq
+import os
+import secrets
+import struct
+import sys
+import time
+from collections import Counter
+
+from wiring_check import ALPHABET, DEFAULT_SOURCE, c_char, c_string, load_definition
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # Scoring falls back to pure Python (much slower)
+
+BATCH_SIZE = 4096       # Candidates generated and scored together
+DU_CHUNK = 64           # Candidates per bincount in differential_uniformity_batch
+DRBG_BLOCK = 1 << 16    # Bytes per SHAKE-256 call
+INDEX_DIGEST_SIZE = 8   # Bytes of the canonical-form hash kept in the index
+
+
+# ===========================
+# RANDOMNESS
+# ===========================
+
+class HashDRBG:
+    """Deterministic random bit generator over SHAKE-256
+    Block i of the stream is SHAKE-256(SHA-256(seed) || i). Without a seed,
+    a random one is drawn from the OS and kept in .seed so the run can be
+    repeated."""
+
+    def __init__(self, seed=None):
+        self.seed = str(seed) if seed is not None else secrets.token_hex(16)
+        self._key = hashlib.sha256(self.seed.encode()).digest()
+        self._counter = 0
+        self._buffer = b''
+        self._pos = 0
+
+    def read(self, n):
+        """Next n bytes of the stream"""
+        parts = []
+        while n > 0:
+            if self._pos == len(self._buffer):
+                self._buffer = hashlib.shake_256(
+                    self._key + self._counter.to_bytes(8, 'big')).digest(DRBG_BLOCK)
+                self._counter += 1
+                self._pos = 0
+            take = min(n, len(self._buffer) - self._pos)
+            parts.append(self._buffer[self._pos:self._pos + take])
+            self._pos += take
+            n -= take
+        return b''.join(parts)
+
+    def randbelow(self, n):
+        """Uniform integer in [0, n), by rejection sampling"""
+        size = (n.bit_length() + 7) // 8 + 1
+        limit = 256 ** size - 256 ** size % n
+        while True:
+            value = int.from_bytes(self.read(size), 'big')
+            if value < limit:
+                return value % n
+
+    def permutations(self, count, n):
+        """count random permutations of range(n), as lists
+        Each is the argsort of n random 64-bit keys."""
+        keys = self.read(8 * n * count)
+        if NUMPY_AVAILABLE:
+            array = np.frombuffer(keys, dtype='<u8').reshape(count, n)
+            return np.argsort(array, axis=1, kind='stable').tolist()
+        unpack = struct.Struct(f'<{n}Q').unpack_from
+        return [sorted(range(n), key=unpack(keys, 8 * n * i).__getitem__)
+                for i in range(count)]
+
+
+def involution(perm):
+    """Reflector from a permutation: pair entries 0-1, 2-3, ...
+    An odd last entry maps to itself."""
+    out = list(range(len(perm)))
+    for i in range(0, len(perm) - 1, 2):
+        a, b = perm[i], perm[i + 1]
+        out[a] = b
+        out[b] = a
+    return out
+
+
+# ===========================
+# SCORING
+# ===========================
+
+def cycle_lengths(perm):
+    """Cycle structure of a permutation, longest cycle first"""
+    seen = [False] * len(perm)
+    lengths = []
+    for start in range(len(perm)):
+        length = 0
+        x = start
+        while not seen[x]:
+            seen[x] = True
+            x = perm[x]
+            length += 1
+        if length:
+            lengths.append(length)
+    return sorted(lengths, reverse=True)
+
+
+def differential_uniformity(perm):
+    """max over a != 0, b of #{x : S(x + a) - S(x) = b} (mod n)"""
+    n = len(perm)
+    doubled = perm + perm
+    return max(max(Counter((y - x) % n for y, x in zip(doubled[a:a + n], perm)).values())
+               for a in range(1, n))
+
+
+def differential_uniformity_batch(perms):
+    """differential_uniformity() for a list of permutations, with NumPy
+    All n - 1 shifts of a sub-batch are counted by one bincount."""
+    if not NUMPY_AVAILABLE:
+        return [differential_uniformity(p) for p in perms]
+    if not perms:
+        return []
+    s = np.asarray(perms, dtype=np.int32)
+    count, n = s.shape
+    out = []
+    for start in range(0, count, DU_CHUNK):
+        part = s[start:start + DU_CHUNK]
+        rows = len(part)
+        doubled = np.concatenate([part, part], axis=1)
+        # shifted[r, a - 1, x] = S(x + a) for a = 1 .. n - 1
+        shifted = np.lib.stride_tricks.sliding_window_view(doubled, n, axis=1)[:, 1:n]
+        # S(x + a) - S(x) lies in (-n, n): count it in 2n bins, then fold
+        # bin d + n onto bin d instead of taking it mod n
+        base = (np.arange(rows * (n - 1), dtype=np.int32) * (2 * n) + n).reshape(rows, n - 1, 1)
+        bins = (shifted + base) - part[:, None, :]
+        counts = np.bincount(bins.ravel(), minlength=rows * (n - 1) * 2 * n)
+        counts = counts.reshape(rows, n - 1, 2 * n)
+        counts = counts[:, :, :n] + counts[:, :, n:]
+        out.extend(counts.reshape(rows, -1).max(axis=1).tolist())
+    return out
+
+
+def score(perm, uniformity):
+    """Score dict of one wiring; rank() orders by it"""
+    return {"uniformity": uniformity,
+            "fixed_points": sum(1 for i, x in enumerate(perm) if i == x),
+            "cycles": cycle_lengths(perm)}
+
+
+def rank(result):
+    """Sort key, best first: low differential uniformity, few fixed points,
+    few (so long) cycles"""
+    return (result["uniformity"], result["fixed_points"], len(result["cycles"]))
+
+
+# ===========================
+# DEDUPLICATION INDEX
+# ===========================
+
+class WiringIndex:
+    """Hashes of the wirings seen so far, up to rotation conjugacy"""
+
+    def __init__(self, n=len(ALPHABET)):
+        self.n = n
+        # _subtract[o] maps byte v to (v - o) mod n
+        self._subtract = [bytes((v - o) % n for v in range(n)).ljust(256, b'\0')
+                          for o in range(n)]
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def canonical(self, perm):
+        """Smallest of the rotation conjugates S(x + o) - o, as bytes
+        Only the offsets whose conjugate starts with the smallest byte,
+        (S(o) - o) mod n, can give the minimum, so only those are built."""
+        n = self.n
+        first = [(x - o) % n for o, x in enumerate(perm)]
+        low = min(first)
+        s = bytes(perm)
+        return min((s[o:] + s[:o]).translate(self._subtract[o])
+                   for o, v in enumerate(first) if v == low)
+
+    def key(self, perm):
+        return hashlib.blake2b(self.canonical(perm), digest_size=INDEX_DIGEST_SIZE).digest()
+
+    def add(self, perm):
+        """Record perm; False if it (or a conjugate) was already there"""
+        key = self.key(perm)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+
+# ===========================
+# GENERATOR
+# ===========================
+
+class WiringGenerator:
+    """Stream of new, scored rotor or reflector candidates
+    Each candidate is a dict with the wiring string, the permutation it
+    stands for (alphabet indices) and its score fields."""
+
+    def __init__(self, kind="rotor", seed=None, alphabet=ALPHABET, avoid=()):
+        if kind not in ("rotor", "reflector"):
+            raise ValueError(f"Unknown kind {kind!r}")
+        if len(alphabet) > 256:
+            raise ValueError("Alphabets over 256 characters are not supported")
+        self.kind = kind
+        self.alphabet = alphabet
+        self.rng = HashDRBG(seed)
+        self.index = WiringIndex(len(alphabet))
+        self.rejected = 0
+        self._text = alphabet.encode('latin-1').ljust(256, b'\0')
+        position = {c: i for i, c in enumerate(alphabet)}
+        for wiring in avoid:
+            if sorted(wiring) == sorted(alphabet):
+                self.index.add([position[c] for c in wiring])
+
+    def batch(self, size=BATCH_SIZE):
+        """Generate size candidates and return the new ones, scored"""
+        perms = self.rng.permutations(size, len(self.alphabet))
+        if self.kind == "reflector":
+            perms = [involution(p) for p in perms]
+        fresh = [p for p in perms if self.index.add(p)]
+        self.rejected += len(perms) - len(fresh)
+        out = []
+        for perm, uniformity in zip(fresh, differential_uniformity_batch(fresh)):
+            result = score(perm, uniformity)
+            result["perm"] = perm
+            result["wiring"] = bytes(perm).translate(self._text).decode('latin-1')
+            out.append(result)
+        return out
+
+    def best(self, count, keep, batch_size=BATCH_SIZE, sink=None, progress=None):
+        """The keep best of count candidates, best first
+        sink(candidate) sees every new candidate, progress(done) each batch."""
+        heap = []  # (negated rank, serial, candidate): worst kept on top
+        serial = 0
+        done = 0
+        while done < count:
+            for candidate in self.batch(min(batch_size, count - done)):
+                serial += 1
+                if sink:
+                    sink(candidate)
+                item = (tuple(-x for x in rank(candidate)), -serial, candidate)
+                if len(heap) < keep:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            done = min(done + batch_size, count)
+            if progress:
+                progress(done)
+        return [item[2] for item in sorted(heap, reverse=True)]
+
+
+# ===========================
+# OUTPUT
+# ===========================
+
+def describe(candidate):
+    """Score as a short comment"""
+    cycles = candidate["cycles"]
+    return (f"DU {candidate['uniformity']}, {candidate['fixed_points']} fixed, "
+            f"{len(cycles)} cycles (longest {cycles[0]})")
+
+
+def rotor_block(candidates, notches, alphabet=ALPHABET):
+    """ROTOR[] and NOTCH[] for main.cpp (entry 0 stays the input alphabet)"""
+    lines = []
+    if len(candidates) + 1 != 11:
+        lines.append(f"// Set #define Nrotors {len(candidates) + 1} to match")
+    lines += ["char *ROTOR[Nrotors] = {",
+              '    // input alphabet ("rotor" 0, not used)',
+              f"    {c_string(alphabet)},"]
+    for i, candidate in enumerate(candidates, 1):
+        lines.append(f"    // rotor {i} - New ({describe(candidate)})")
+        lines.append(f"    {c_string(candidate['wiring'])}"
+                     + ("," if i < len(candidates) else ""))
+    lines += ["};", "",
+              "// Position in which each rotor causes its left neighbor to turn",
+              "char NOTCH[Nrotors] = { "
+              + ", ".join(c_char(c) for c in ['z'] + notches) + " };"]
+    return "\n".join(lines)
+
+
+def reflector_block(candidates, alphabet=ALPHABET):
+    """REFLECTOR[] for main.cpp (entry 0 stays the input alphabet)"""
+    lines = []
+    if len(candidates) + 1 != 5:
+        lines.append(f"// Set #define Nrefls {len(candidates) + 1} to match")
+    lines += ["char *REFLECTOR[Nrefls] = {",
+              '    // input alphabet ("REFLECTOR" 0, not used)',
+              f"    {c_string(alphabet)},"]
+    for i, candidate in enumerate(candidates, 1):
+        lines.append(f"    // reflector {i} - New ({describe(candidate)})")
+        lines.append(f"    {c_string(candidate['wiring'])}"
+                     + ("," if i < len(candidates) else ""))
+    lines.append("};")
+    return "\n".join(lines)
+
+
+def replacement_lines(candidates, numbers, kind, last):
+    """New entries for positions numbers of main.cpp's ROTOR[] or
+    REFLECTOR[], to paste over the old ones (last is the array's last
+    position, which has no comma); NOTCH[] and the other entries stay"""
+    lines = []
+    for number, candidate in zip(numbers, candidates):
+        lines.append(f"    // {kind} {number} - Fixed ({describe(candidate)})")
+        lines.append(f"    {c_string(candidate['wiring'])}" + ("" if number == last else ","))
+    return "\n".join(lines)
+
+
+def parse_positions(text):
+    """Array positions from '2,4'"""
+    try:
+        positions = [int(n) for n in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected positions like 2,4, got {text!r}")
+    if len(set(positions)) != len(positions):
+        raise argparse.ArgumentTypeError(f"position repeated in {text!r}")
+    return positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and rank ENIGMA wirings")
+    parser.add_argument("--kind", choices=("rotor", "reflector"), default="rotor")
+    parser.add_argument("-n", "--count", type=int, default=100_000,
+                        help="candidates to generate (default: 100,000)")
+    parser.add_argument("-k", "--keep", type=int, default=10,
+                        help="best wirings to print (default: 10)")
+    parser.add_argument("--seed", help="seed for a repeatable run (default: random)")
+    parser.add_argument("--avoid", default=DEFAULT_SOURCE,
+                        help="source/config whose wirings are taken already "
+                             "(default: main.cpp, 'none' to skip)")
+    parser.add_argument("--candidates", metavar="FILE",
+                        help="also write every new candidate to FILE, one per line")
+    parser.add_argument("--replace", type=parse_positions, metavar="N[,N...]",
+                        help="print only new entries for these positions of main.cpp's "
+                             "array, to paste over the old ones (implies --keep)")
+    parser.add_argument("-o", "--output", help="write the block here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.replace:
+        args.keep = len(args.replace)
+
+    try:
+        avoid = ()
+        # Entry 0 is the input alphabet, so the last is 10 rotors or 4 reflectors in main.cpp
+        last = 10 if args.kind == "rotor" else 4
+        if args.avoid != "none" and os.path.exists(args.avoid):
+            definition = load_definition(args.avoid)
+            avoid = definition["rotors" if args.kind == "rotor" else "reflectors"]
+            last = len(avoid) - 1
+        if args.replace and not all(1 <= n <= last for n in args.replace):
+            raise ValueError(f"Positions to replace must be 1 to {last}")
+        generator = WiringGenerator(args.kind, args.seed, avoid=avoid)
+        sink = None
+        out_file = None
+        if args.candidates:
+            out_file = open(args.candidates, "w", encoding="latin-1", newline="\n")
+            sink = lambda candidate: out_file.write(candidate["wiring"] + "\n")
+
+        start = time.perf_counter()
+
+        def progress(done):
+            rate = done / (time.perf_counter() - start)
+            print(f"\r{done:,} of {args.count:,} ({rate:,.0f} per second)",
+                  end="", file=sys.stderr)
+
+        try:
+            best = generator.best(args.count, args.keep, sink=sink, progress=progress)
+        finally:
+            if out_file:
+                out_file.close()
+        print(f"\n{generator.rejected:,} duplicates/conjugates rejected, "
+              f"seed {generator.rng.seed}", file=sys.stderr)
+
+        if args.replace:
+            block = replacement_lines(best, args.replace, args.kind, last)
+        elif args.kind == "rotor":
+            notches = [generator.alphabet[generator.rng.randbelow(len(generator.alphabet))]
+                       for _ in best]
+            block = rotor_block(best, notches)
+        else:
+            block = reflector_block(best)
+        if args.output:
+            with open(args.output, "w", encoding="latin-1") as f:
+                f.write(block + "\n")
+            print(f"Wrote {len(best)} wirings to {args.output}", file=sys.stderr)
+        else:
+            print(block)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
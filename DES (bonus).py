@@ -1,532 +1,1859 @@
-"""
-DES Encryption/Decryption Application
-Combines custom DES implementation with PyCryptodome library
-Supports ECB and CBC modes for educational purposes
-
-REFERENCES AND ACKNOWLEDGMENTS:
-================================
-Source code adapted from: https://github.com/Vipul97/des
-- Repository by Vipul97 (MIT License)
-- DES implementation structure, key generation, and encryption/decryption logic
-  have been combined and restructured for this educational application
-
-EDUCATIONAL PURPOSE:
-This implementation is designed for educational purposes to demonstrate
-how DES encryption works internally. The code has been restructured and
-combined with additional features for learning purposes.
-"""
-
-import sys
-import os
-
-try:
-    from Crypto.Cipher import DES
-    from Crypto.Random import get_random_bytes
-    PYCRYPTODOME_AVAILABLE = True
-except ImportError:
-    PYCRYPTODOME_AVAILABLE = False
-    print("Note: PyCryptodome not installed. Install with: pip install pycryptodome")
-    print("Running with custom implementation only.\n")
-
-# ===========================
-# CUSTOM DES IMPLEMENTATION
-# ===========================
-# Code adapted from: https://github.com/Vipul97/des
-# Restructured and combined for educational purposes
-
-# Permutation Tables
-IP = [
-    58, 50, 42, 34, 26, 18, 10, 2,
-    60, 52, 44, 36, 28, 20, 12, 4,
-    62, 54, 46, 38, 30, 22, 14, 6,
-    64, 56, 48, 40, 32, 24, 16, 8,
-    57, 49, 41, 33, 25, 17, 9, 1,
-    59, 51, 43, 35, 27, 19, 11, 3,
-    61, 53, 45, 37, 29, 21, 13, 5,
-    63, 55, 47, 39, 31, 23, 15, 7
-]
-
-FP = [
-    40, 8, 48, 16, 56, 24, 64, 32,
-    39, 7, 47, 15, 55, 23, 63, 31,
-    38, 6, 46, 14, 54, 22, 62, 30,
-    37, 5, 45, 13, 53, 21, 61, 29,
-    36, 4, 44, 12, 52, 20, 60, 28,
-    35, 3, 43, 11, 51, 19, 59, 27,
-    34, 2, 42, 10, 50, 18, 58, 26,
-    33, 1, 41, 9, 49, 17, 57, 25
-]
-
-E = [
-    32, 1, 2, 3, 4, 5,
-    4, 5, 6, 7, 8, 9,
-    8, 9, 10, 11, 12, 13,
-    12, 13, 14, 15, 16, 17,
-    16, 17, 18, 19, 20, 21,
-    20, 21, 22, 23, 24, 25,
-    24, 25, 26, 27, 28, 29,
-    28, 29, 30, 31, 32, 1
-]
-
-P = [
-    16, 7, 20, 21, 29, 12, 28, 17,
-    1, 15, 23, 26, 5, 18, 31, 10,
-    2, 8, 24, 14, 32, 27, 3, 9,
-    19, 13, 30, 6, 22, 11, 4, 25
-]
-
-PC1 = [
-    57, 49, 41, 33, 25, 17, 9,
-    1, 58, 50, 42, 34, 26, 18,
-    10, 2, 59, 51, 43, 35, 27,
-    19, 11, 3, 60, 52, 44, 36,
-    63, 55, 47, 39, 31, 23, 15,
-    7, 62, 54, 46, 38, 30, 22,
-    14, 6, 61, 53, 45, 37, 29,
-    21, 13, 5, 28, 20, 12, 4
-]
-
-PC2 = [
-    14, 17, 11, 24, 1, 5,
-    3, 28, 15, 6, 21, 10,
-    23, 19, 12, 4, 26, 8,
-    16, 7, 27, 20, 13, 2,
-    41, 52, 31, 37, 47, 55,
-    30, 40, 51, 45, 33, 48,
-    44, 49, 39, 56, 34, 53,
-    46, 42, 50, 36, 29, 32
-]
-
-SHIFT = [1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1]
-
-SBOX = [
-    [[14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7],
-     [0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8],
-     [4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0],
-     [15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]],
-    
-    [[15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
-     [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
-     [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
-     [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]],
-    
-    [[10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8],
-     [13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1],
-     [13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7],
-     [1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]],
-    
-    [[7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15],
-     [13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9],
-     [10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4],
-     [3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]],
-    
-    [[2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9],
-     [14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6],
-     [4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14],
-     [11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]],
-    
-    [[12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11],
-     [10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8],
-     [9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6],
-     [4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]],
-    
-    [[4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1],
-     [13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6],
-     [1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2],
-     [6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]],
-    
-    [[13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7],
-     [1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2],
-     [7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8],
-     [2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]]
-]
-
-
-def hex_to_bin(hex_str):
-    """Convert hex string to binary string
-    Utility function for hex-to-binary conversion"""
-    return bin(int(hex_str, 16))[2:].zfill(64)
-
-
-def bin_to_hex(bin_str):
-    """Convert binary string to hex string
-    Utility function for binary-to-hex conversion"""
-    return hex(int(bin_str, 2))[2:].upper().zfill(16)
-
-
-def permute(bits, table):
-    """Apply permutation table to bits
-    Core permutation operation used throughout DES
-    Adapted from: https://github.com/Vipul97/des"""
-    return ''.join(bits[i - 1] for i in table)
-
-
-def xor(a, b):
-    """XOR two binary strings
-    Fundamental operation in DES encryption"""
-    return ''.join('0' if x == y else '1' for x, y in zip(a, b))
-
-
-def left_shift(bits, n):
-    """Circular left shift"""
-    return bits[n:] + bits[:n]
-
-
-def sbox_substitution(bits):
-    """Apply S-box substitution"""
-    output = ''
-    for i in range(8):
-        block = bits[i * 6:(i + 1) * 6]
-        row = int(block[0] + block[5], 2)
-        col = int(block[1:5], 2)
-        val = SBOX[i][row][col]
-        output += bin(val)[2:].zfill(4)
-    return output
-
-
-def generate_round_keys(key_bin):
-    """Generate 16 round keys from the main key
-    Key schedule algorithm adapted from: https://github.com/Vipul97/des
-    Implements PC1 permutation, key splitting, and left shifts"""
-    keys = []
-    key_56 = permute(key_bin, PC1)
-    C, D = key_56[:28], key_56[28:]
-    
-    for shift in SHIFT:
-        C = left_shift(C, shift)
-        D = left_shift(D, shift)
-        keys.append(permute(C + D, PC2))
-    
-    return keys
-
-
-def feistel_function(R, K):
-    """The Feistel (F) function
-    Core transformation function in DES
-    Implementation adapted from: https://github.com/Vipul97/des"""
-    expanded = permute(R, E)
-    xored = xor(expanded, K)
-    substituted = sbox_substitution(xored)
-    return permute(substituted, P)
-
-
-def des_process(data_bin, keys, encrypt=True):
-    """Core DES processing (encryption or decryption)
-    Main DES algorithm implementation
-    Structure adapted from: https://github.com/Vipul97/des"""
-    if not encrypt:
-        keys = keys[::-1]  # Reverse keys for decryption
-    
-    data = permute(data_bin, IP)
-    L, R = data[:32], data[32:]
-    
-    for key in keys:
-        new_R = xor(L, feistel_function(R, key))
-        L, R = R, new_R
-    
-    return permute(R + L, FP)  # Note: R + L (swap)
-
-
-class CustomDES:
-    """Custom DES implementation"""
-    
-    @staticmethod
-    def encrypt_ecb(plaintext_hex, key_hex):
-        """Encrypt using ECB mode"""
-        plaintext_bin = hex_to_bin(plaintext_hex)
-        key_bin = hex_to_bin(key_hex)
-        keys = generate_round_keys(key_bin)
-        ciphertext_bin = des_process(plaintext_bin, keys, encrypt=True)
-        return bin_to_hex(ciphertext_bin)
-    
-    @staticmethod
-    def decrypt_ecb(ciphertext_hex, key_hex):
-        """Decrypt using ECB mode"""
-        ciphertext_bin = hex_to_bin(ciphertext_hex)
-        key_bin = hex_to_bin(key_hex)
-        keys = generate_round_keys(key_bin)
-        plaintext_bin = des_process(ciphertext_bin, keys, encrypt=False)
-        return bin_to_hex(plaintext_bin)
-    
-    @staticmethod
-    def encrypt_cbc(plaintext_hex, key_hex, iv_hex):
-        """Encrypt using CBC mode"""
-        plaintext_bin = hex_to_bin(plaintext_hex)
-        key_bin = hex_to_bin(key_hex)
-        iv_bin = hex_to_bin(iv_hex)
-        keys = generate_round_keys(key_bin)
-        
-        # XOR plaintext with IV before encryption
-        xored = xor(plaintext_bin, iv_bin)
-        ciphertext_bin = des_process(xored, keys, encrypt=True)
-        return bin_to_hex(ciphertext_bin)
-    
-    @staticmethod
-    def decrypt_cbc(ciphertext_hex, key_hex, iv_hex):
-        """Decrypt using CBC mode"""
-        ciphertext_bin = hex_to_bin(ciphertext_hex)
-        key_bin = hex_to_bin(key_hex)
-        iv_bin = hex_to_bin(iv_hex)
-        keys = generate_round_keys(key_bin)
-        
-        # Decrypt then XOR with IV
-        decrypted_bin = des_process(ciphertext_bin, keys, encrypt=False)
-        plaintext_bin = xor(decrypted_bin, iv_bin)
-        return bin_to_hex(plaintext_bin)
-
-
-# ===========================
-# PYCRYPTODOME WRAPPER
-# ===========================
-
-class PyCryptoDES:
-    """PyCryptodome DES wrapper for comparison"""
-    
-    @staticmethod
-    def encrypt_ecb(plaintext_hex, key_hex):
-        """Encrypt using PyCryptodome ECB mode"""
-        if not PYCRYPTODOME_AVAILABLE:
-            return None
-        
-        key = bytes.fromhex(key_hex)
-        plaintext = bytes.fromhex(plaintext_hex)
-        cipher = DES.new(key, DES.MODE_ECB)
-        ciphertext = cipher.encrypt(plaintext)
-        return ciphertext.hex().upper()
-    
-    @staticmethod
-    def decrypt_ecb(ciphertext_hex, key_hex):
-        """Decrypt using PyCryptodome ECB mode"""
-        if not PYCRYPTODOME_AVAILABLE:
-            return None
-        
-        key = bytes.fromhex(key_hex)
-        ciphertext = bytes.fromhex(ciphertext_hex)
-        cipher = DES.new(key, DES.MODE_ECB)
-        plaintext = cipher.decrypt(ciphertext)
-        return plaintext.hex().upper()
-    
-    @staticmethod
-    def encrypt_cbc(plaintext_hex, key_hex, iv_hex):
-        """Encrypt using PyCryptodome CBC mode"""
-        if not PYCRYPTODOME_AVAILABLE:
-            return None
-        
-        key = bytes.fromhex(key_hex)
-        plaintext = bytes.fromhex(plaintext_hex)
-        iv = bytes.fromhex(iv_hex)
-        cipher = DES.new(key, DES.MODE_CBC, iv)
-        ciphertext = cipher.encrypt(plaintext)
-        return ciphertext.hex().upper()
-    
-    @staticmethod
-    def decrypt_cbc(ciphertext_hex, key_hex, iv_hex):
-        """Decrypt using PyCryptodome CBC mode"""
-        if not PYCRYPTODOME_AVAILABLE:
-            return None
-        
-        key = bytes.fromhex(key_hex)
-        ciphertext = bytes.fromhex(ciphertext_hex)
-        iv = bytes.fromhex(iv_hex)
-        cipher = DES.new(key, DES.MODE_CBC, iv)
-        plaintext = cipher.decrypt(ciphertext)
-        return plaintext.hex().upper()
-
-
-# ===========================
-# USER INTERFACE
-# ===========================
-
-def validate_hex(hex_str, length):
-    """Validate hexadecimal string"""
-    if len(hex_str) != length:
-        return False
-    try:
-        int(hex_str, 16)
-        return True
-    except ValueError:
-        return False
-
-
-def print_header():
-    """Print application header"""
-    print("=" * 70)
-    print("DES ENCRYPTION/DECRYPTION TOOL".center(70))
-    print("Custom Implementation + PyCryptodome Library".center(70))
-    print("=" * 70)
-    print()
-
-
-def print_menu():
-    """Print main menu"""
-    print("\n" + "=" * 70)
-    print("MAIN MENU")
-    print("=" * 70)
-    print("1. ECB Mode - Electronic Codebook")
-    print("2. CBC Mode - Cipher Block Chaining")
-    print("3. Compare Custom vs PyCryptodome")
-    print("4. Batch Test Mode")
-    print("5. Exit")
-    print("=" * 70)
-
-
-def ecb_mode():
-    """ECB mode encryption/decryption"""
-    print("\n" + "-" * 70)
-    print("ECB MODE - Electronic Codebook")
-    print("-" * 70)
-    
-    # Get inputs
-    while True:
-        key = input("Enter 64-bit key (16 hex digits): ").strip().upper()
-        if validate_hex(key, 16):
-            break
-        print("❌ Invalid! Must be 16 hexadecimal characters.")
-    
-    while True:
-        plaintext = input("Enter 64-bit plaintext (16 hex digits): ").strip().upper()
-        if validate_hex(plaintext, 16):
-            break
-        print("❌ Invalid! Must be 16 hexadecimal characters.")
-    
-    # Custom implementation
-    print("\n🔧 CUSTOM IMPLEMENTATION:")
-    print("-" * 70)
-    ciphertext_custom = CustomDES.encrypt_ecb(plaintext, key)
-    print(f"Ciphertext:  {ciphertext_custom}")
-    
-    decrypted_custom = CustomDES.decrypt_ecb(ciphertext_custom, key)
-    print(f"Decrypted:   {decrypted_custom}")
-    print(f"Verified:    {'✅ PASS' if decrypted_custom == plaintext else '❌ FAIL'}")
-    
-    # PyCryptodome comparison
-    if PYCRYPTODOME_AVAILABLE:
-        print("\n📚 PYCRYPTODOME LIBRARY:")
-        print("-" * 70)
-        ciphertext_lib = PyCryptoDES.encrypt_ecb(plaintext, key)
-        print(f"Ciphertext:  {ciphertext_lib}")
-        
-        decrypted_lib = PyCryptoDES.decrypt_ecb(ciphertext_lib, key)
-        print(f"Decrypted:   {decrypted_lib}")
-        print(f"Verified:    {'✅ PASS' if decrypted_lib == plaintext else '❌ FAIL'}")
-        
-        print("\n🔍 COMPARISON:")
-        print("-" * 70)
-        print(f"Match:       {'✅ IDENTICAL' if ciphertext_custom == ciphertext_lib else '❌ DIFFERENT'}")
-
-
-def cbc_mode():
-    """CBC mode encryption/decryption"""
-    print("\n" + "-" * 70)
-    print("CBC MODE - Cipher Block Chaining")
-    print("-" * 70)
-    
-    # Get inputs
-    while True:
-        key = input("Enter 64-bit key (16 hex digits): ").strip().upper()
-        if validate_hex(key, 16):
-            break
-        print("❌ Invalid! Must be 16 hexadecimal characters.")
-    
-    while True:
-        plaintext = input("Enter 64-bit plaintext (16 hex digits): ").strip().upper()
-        if validate_hex(plaintext, 16):
-            break
-        print("❌ Invalid! Must be 16 hexadecimal characters.")
-    
-    while True:
-        iv = input("Enter 64-bit IV (16 hex digits): ").strip().upper()
-        if validate_hex(iv, 16):
-            break
-        print("❌ Invalid! Must be 16 hexadecimal characters.")
-    
-    # Custom implementation
-    print("\n🔧 CUSTOM IMPLEMENTATION:")
-    print("-" * 70)
-    ciphertext_custom = CustomDES.encrypt_cbc(plaintext, key, iv)
-    print(f"Ciphertext:  {ciphertext_custom}")
-    
-    decrypted_custom = CustomDES.decrypt_cbc(ciphertext_custom, key, iv)
-    print(f"Decrypted:   {decrypted_custom}")
-    print(f"Verified:    {'✅ PASS' if decrypted_custom == plaintext else '❌ FAIL'}")
-    
-    # PyCryptodome comparison
-    if PYCRYPTODOME_AVAILABLE:
-        print("\n📚 PYCRYPTODOME LIBRARY:")
-        print("-" * 70)
-        ciphertext_lib = PyCryptoDES.encrypt_cbc(plaintext, key, iv)
-        print(f"Ciphertext:  {ciphertext_lib}")
-        
-        decrypted_lib = PyCryptoDES.decrypt_cbc(ciphertext_lib, key, iv)
-        print(f"Decrypted:   {decrypted_lib}")
-        print(f"Verified:    {'✅ PASS' if decrypted_lib == plaintext else '❌ FAIL'}")
-        
-        print("\n🔍 COMPARISON:")
-        print("-" * 70)
-        print(f"Match:       {'✅ IDENTICAL' if ciphertext_custom == ciphertext_lib else '❌ DIFFERENT'}")
-
-
-def batch_test():
-    """Run batch tests with predefined test vectors"""
-    print("\n" + "-" * 70)
-    print("BATCH TEST MODE")
-    print("-" * 70)
-    
-    test_vectors = [
-        {"key": "133457799BBCDFF1", "plaintext": "0123456789ABCDEF", "name": "Test 1"},
-        {"key": "AABB09182736CCDD", "plaintext": "123456ABCD132536", "name": "Test 2"},
-        {"key": "0E329232EA6D0D73", "plaintext": "8787878787878787", "name": "Test 3"},
-    ]
-    
-    print(f"\nRunning {len(test_vectors)} test vectors...\n")
-    
-    for i, test in enumerate(test_vectors, 1):
-        print(f"{test['name']}:")
-        print(f"  Key:       {test['key']}")
-        print(f"  Plaintext: {test['plaintext']}")
-        
-        cipher = CustomDES.encrypt_ecb(test['plaintext'], test['key'])
-        decrypted = CustomDES.decrypt_ecb(cipher, test['key'])
-        
-        print(f"  Cipher:    {cipher}")
-        print(f"  Decrypted: {decrypted}")
-        print(f"  Status:    {'✅ PASS' if decrypted == test['plaintext'] else '❌ FAIL'}")
-        print()
-
-
-def main():
-    """Main application loop"""
-    print_header()
-    
-    print("📖 Welcome to the DES Encryption/Decryption Tool!")
-    print("\nThis tool combines:")
-    print("  • Custom DES implementation (educational)")
-    print("  • PyCryptodome library (production-ready)")
-    print("\nSupported modes: ECB, CBC")
-    print("Input format: 16 hexadecimal digits (64 bits)")
-    
-    while True:
-        print_menu()
-        choice = input("\nSelect option (1-5): ").strip()
-        
-        if choice == '1':
-            ecb_mode()
-        elif choice == '2':
-            cbc_mode()
-        elif choice == '3':
-            print("\n🔍 Running comparison test...")
-            ecb_mode()
-        elif choice == '4':
-            batch_test()
-        elif choice == '5':
-            print("\n👋 Thank you for using DES Encryption Tool!")
-            print("=" * 70)
-            break
-        else:
-            print("\n❌ Invalid choice! Please select 1-5.")
-        
-        input("\nPress Enter to continue...")
-
-
-if __name__ == "__main__":
+"""
+DES Encryption/Decryption Application
+Combines custom DES implementation with PyCryptodome library
+Supports ECB and CBC modes for educational purposes
+
+REFERENCES AND ACKNOWLEDGMENTS:
+================================
+Source code adapted from: https://github.com/Vipul97/des
+- Repository by Vipul97 (MIT License)
+- DES implementation structure, key generation, and encryption/decryption logic
+  have been combined and restructured for this educational application
+
+EDUCATIONAL PURPOSE:
+This implementation is designed for educational purposes to demonstrate
+how DES encryption works internally. The code has been restructured and
+combined with additional features for learning purposes.
+"""
+
+import argparse
+import sys
+import os
+import statistics
+import struct
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from Crypto.Cipher import DES, DES3
+    from Crypto.Random import get_random_bytes
+    PYCRYPTODOME_AVAILABLE = True
+except ImportError:
+    PYCRYPTODOME_AVAILABLE = False
+    # stderr, so the note never ends up inside piped ciphertext
+    print("Note: PyCryptodome not installed. Install with: pip install pycryptodome",
+          file=sys.stderr)
+    print("Running with custom implementation only.\n", file=sys.stderr)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # Bulk modes fall back to the pure-Python engine
+
+# ===========================
+# CUSTOM DES IMPLEMENTATION
+# ===========================
+# Code adapted from: https://github.com/Vipul97/des
+# Restructured and combined for educational purposes
+
+# Permutation Tables
+IP = [
+    58, 50, 42, 34, 26, 18, 10, 2,
+    60, 52, 44, 36, 28, 20, 12, 4,
+    62, 54, 46, 38, 30, 22, 14, 6,
+    64, 56, 48, 40, 32, 24, 16, 8,
+    57, 49, 41, 33, 25, 17, 9, 1,
+    59, 51, 43, 35, 27, 19, 11, 3,
+    61, 53, 45, 37, 29, 21, 13, 5,
+    63, 55, 47, 39, 31, 23, 15, 7
+]
+
+FP = [
+    40, 8, 48, 16, 56, 24, 64, 32,
+    39, 7, 47, 15, 55, 23, 63, 31,
+    38, 6, 46, 14, 54, 22, 62, 30,
+    37, 5, 45, 13, 53, 21, 61, 29,
+    36, 4, 44, 12, 52, 20, 60, 28,
+    35, 3, 43, 11, 51, 19, 59, 27,
+    34, 2, 42, 10, 50, 18, 58, 26,
+    33, 1, 41, 9, 49, 17, 57, 25
+]
+
+E = [
+    32, 1, 2, 3, 4, 5,
+    4, 5, 6, 7, 8, 9,
+    8, 9, 10, 11, 12, 13,
+    12, 13, 14, 15, 16, 17,
+    16, 17, 18, 19, 20, 21,
+    20, 21, 22, 23, 24, 25,
+    24, 25, 26, 27, 28, 29,
+    28, 29, 30, 31, 32, 1
+]
+
+P = [
+    16, 7, 20, 21, 29, 12, 28, 17,
+    1, 15, 23, 26, 5, 18, 31, 10,
+    2, 8, 24, 14, 32, 27, 3, 9,
+    19, 13, 30, 6, 22, 11, 4, 25
+]
+
+PC1 = [
+    57, 49, 41, 33, 25, 17, 9,
+    1, 58, 50, 42, 34, 26, 18,
+    10, 2, 59, 51, 43, 35, 27,
+    19, 11, 3, 60, 52, 44, 36,
+    63, 55, 47, 39, 31, 23, 15,
+    7, 62, 54, 46, 38, 30, 22,
+    14, 6, 61, 53, 45, 37, 29,
+    21, 13, 5, 28, 20, 12, 4
+]
+
+PC2 = [
+    14, 17, 11, 24, 1, 5,
+    3, 28, 15, 6, 21, 10,
+    23, 19, 12, 4, 26, 8,
+    16, 7, 27, 20, 13, 2,
+    41, 52, 31, 37, 47, 55,
+    30, 40, 51, 45, 33, 48,
+    44, 49, 39, 56, 34, 53,
+    46, 42, 50, 36, 29, 32
+]
+
+SHIFT = [1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1]
+
+SBOX = [
+    [[14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7],
+     [0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8],
+     [4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0],
+     [15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]],
+    
+    [[15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
+     [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
+     [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
+     [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]],
+    
+    [[10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8],
+     [13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1],
+     [13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7],
+     [1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]],
+    
+    [[7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15],
+     [13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9],
+     [10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4],
+     [3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]],
+    
+    [[2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9],
+     [14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6],
+     [4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14],
+     [11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]],
+    
+    [[12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11],
+     [10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8],
+     [9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6],
+     [4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]],
+    
+    [[4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1],
+     [13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6],
+     [1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2],
+     [6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]],
+    
+    [[13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7],
+     [1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2],
+     [7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8],
+     [2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]]
+]
+
+
+def hex_to_bin(hex_str):
+    """Convert hex string to binary string
+    Utility function for hex-to-binary conversion"""
+    return bin(int(hex_str, 16))[2:].zfill(64)
+
+
+def bin_to_hex(bin_str):
+    """Convert binary string to hex string
+    Utility function for binary-to-hex conversion"""
+    return hex(int(bin_str, 2))[2:].upper().zfill(16)
+
+
+def permute(bits, table):
+    """Apply permutation table to bits
+    Core permutation operation used throughout DES
+    Adapted from: https://github.com/Vipul97/des"""
+    return ''.join(bits[i - 1] for i in table)
+
+
+def xor(a, b):
+    """XOR two binary strings
+    Fundamental operation in DES encryption"""
+    return ''.join('0' if x == y else '1' for x, y in zip(a, b))
+
+
+def left_shift(bits, n):
+    """Circular left shift"""
+    return bits[n:] + bits[:n]
+
+
+def sbox_substitution(bits):
+    """Apply S-box substitution"""
+    output = ''
+    for i in range(8):
+        block = bits[i * 6:(i + 1) * 6]
+        row = int(block[0] + block[5], 2)
+        col = int(block[1:5], 2)
+        val = SBOX[i][row][col]
+        output += bin(val)[2:].zfill(4)
+    return output
+
+
+def generate_round_keys(key_bin):
+    """Generate 16 round keys from the main key
+    Key schedule algorithm adapted from: https://github.com/Vipul97/des
+    Implements PC1 permutation, key splitting, and left shifts"""
+    keys = []
+    key_56 = permute(key_bin, PC1)
+    C, D = key_56[:28], key_56[28:]
+    
+    for shift in SHIFT:
+        C = left_shift(C, shift)
+        D = left_shift(D, shift)
+        keys.append(permute(C + D, PC2))
+    
+    return keys
+
+
+def feistel_function(R, K):
+    """The Feistel (F) function
+    Core transformation function in DES
+    Implementation adapted from: https://github.com/Vipul97/des"""
+    expanded = permute(R, E)
+    xored = xor(expanded, K)
+    substituted = sbox_substitution(xored)
+    return permute(substituted, P)
+
+
+def des_process(data_bin, keys, encrypt=True):
+    """Core DES processing (encryption or decryption)
+    Main DES algorithm implementation
+    Structure adapted from: https://github.com/Vipul97/des"""
+    if not encrypt:
+        keys = keys[::-1]  # Reverse keys for decryption
+    
+    data = permute(data_bin, IP)
+    L, R = data[:32], data[32:]
+    
+    for key in keys:
+        new_R = xor(L, feistel_function(R, key))
+        L, R = R, new_R
+    
+    return permute(R + L, FP)  # Note: R + L (swap)
+
+
+# ===========================
+# INTEGER-PACKED DES ENGINE
+# ===========================
+# Same algorithm as above, but the state is kept as 32/64-bit integers.
+# Permutations become bytewise table lookups and the S-boxes are merged
+# with P into SP tables, so a round is a few lookups and no strings.
+
+def build_byte_tables(table, in_bits):
+    """Precompute bytewise lookup tables for a permutation table
+    tables[k][v] holds the output bits contributed by input byte k
+    (k = 0 is the most significant byte) when that byte equals v"""
+    out_bits = len(table)
+    tables = []
+    for k in range(in_bits // 8):
+        byte_table = [0] * 256
+        for v in range(256):
+            out = 0
+            for j, src in enumerate(table):
+                pos = src - 1 - k * 8  # Bit position inside byte k
+                if 0 <= pos < 8 and (v >> (7 - pos)) & 1:
+                    out |= 1 << (out_bits - 1 - j)
+            byte_table[v] = out
+        tables.append(byte_table)
+    return tables
+
+
+def permute_int(value, tables):
+    """Apply a permutation prepared by build_byte_tables to an integer"""
+    out = 0
+    shift = len(tables) * 8
+    for byte_table in tables:
+        shift -= 8
+        out |= byte_table[(value >> shift) & 0xFF]
+    return out
+
+
+def build_sp_tables():
+    """Merge SBOX and P into 8 tables of 64 entries
+    SP[i][v] is the P-permuted 32-bit output of S-box i for the raw
+    6-bit input v (row and column bits still interleaved)"""
+    sp_tables = []
+    for i in range(8):
+        sp = [0] * 64
+        for v in range(64):
+            row = ((v >> 4) & 2) | (v & 1)
+            col = (v >> 1) & 0xF
+            sp[v] = permute_int(SBOX[i][row][col] << (28 - 4 * i), P_TABLES)
+        sp_tables.append(sp)
+    return sp_tables
+
+
+IP_TABLES = build_byte_tables(IP, 64)
+FP_TABLES = build_byte_tables(FP, 64)
+E_TABLES = build_byte_tables(E, 32)
+P_TABLES = build_byte_tables(P, 32)
+PC1_TABLES = build_byte_tables(PC1, 64)
+PC2_TABLES = build_byte_tables(PC2, 56)
+SP = build_sp_tables()
+
+# Round-function tables: E by 16-bit halves (2 lookups instead of 4) and
+# the SP tables paired on 12-bit inputs (4 lookups instead of 8)
+E_HI = [E_TABLES[0][v >> 8] | E_TABLES[1][v & 0xFF] for v in range(65536)]
+E_LO = [E_TABLES[2][v >> 8] | E_TABLES[3][v & 0xFF] for v in range(65536)]
+SP_PAIRS = [[SP[2 * i][v >> 6] | SP[2 * i + 1][v & 0x3F] for v in range(4096)]
+            for i in range(4)]
+
+
+# des_process_int keeps both halves E-expanded (48 bits) for all 16 rounds.
+# E only copies bits, so E(L ^ f) = E(L) ^ E(f): with the SP outputs stored
+# expanded, a round is the key XOR and 3 lookups (S-boxes 1-3, 4-6 and
+# 7-8), with no E lookups at all. IP produces the expanded halves directly
+# and FP reads them back.
+
+def expand_int(value):
+    """E applied to a 32-bit integer (48-bit result)"""
+    return permute_int(value, E_TABLES)
+
+
+def build_fp_e_tables():
+    """FP over the expanded halves, 12 bits at a time
+    Tables 0-3 take the 12-bit chunks of E(R), 4-7 those of E(L), and give
+    their share of FP(R + L). Of the bits E duplicates only the first copy
+    is read, the other one always holds the same value."""
+    first = {}
+    for j, src in enumerate(E):
+        first.setdefault(src, j)
+    tables = []
+    for shift in (32, 0):  # R is the high half of the FP input
+        for chunk in range(4):
+            table = [0] * 4096
+            for v in range(4096):
+                half = 0
+                for b in range(12):
+                    j = 12 * chunk + b  # Bit j of the expanded half, MSB first
+                    if (v >> (11 - b)) & 1 and first[E[j]] == j:
+                        half |= 1 << (32 - E[j])
+                table[v] = permute_int(half << shift, FP_TABLES)
+            tables.append(table)
+    return tables
+
+
+IP_E_TABLES = [[(expand_int(v >> 32) << 48) | expand_int(v & 0xFFFFFFFF) for v in table]
+               for table in IP_TABLES]
+FP_E_TABLES = build_fp_e_tables()
+
+
+def build_sp_e_tables():
+    """E(P(S(x))) for S-boxes 1-3 and 4-6 on 18-bit inputs and 7-8 on 12 bits
+    Three S-boxes only have 16**3 different outputs, so each 18-bit table
+    holds 4096 distinct integers shared by its 262144 entries (2 MB of
+    references rather than 10 MB of integers)."""
+    tables = []
+    for first in (0, 3):
+        nibbles = [[SBOX[i][((v >> 4) & 2) | (v & 1)][(v >> 1) & 0xF] for v in range(64)]
+                   for i in range(first, first + 3)]
+        # One input per output nibble is enough to build every distinct value
+        inputs = [{n: v for v, n in enumerate(box)} for box in nibbles]
+        values = [0] * 4096
+        for n0, v0 in inputs[0].items():
+            for n1, v1 in inputs[1].items():
+                for n2, v2 in inputs[2].items():
+                    values[(n0 << 8) | (n1 << 4) | n2] = expand_int(
+                        SP[first][v0] | SP[first + 1][v1] | SP[first + 2][v2])
+        hi, mid, lo = ([n << shift for n in box] for box, shift in zip(nibbles, (8, 4, 0)))
+        tables.append([values[a | b | c] for a in hi for b in mid for c in lo])
+    tables.append([expand_int(v) for v in SP_PAIRS[3]])
+    return tables
+
+
+SP_E_TABLES = build_sp_e_tables()
+
+
+def generate_round_keys_int(key_int):
+    """Generate the 16 round keys as 48-bit integers
+    Integer counterpart of generate_round_keys"""
+    c0, c1, c2, c3, c4, c5, c6 = PC2_TABLES
+    keys = []
+    key_56 = permute_int(key_int, PC1_TABLES)
+    C, D = key_56 >> 28, key_56 & 0xFFFFFFF
+
+    for shift in SHIFT:
+        C = ((C << shift) | (C >> (28 - shift))) & 0xFFFFFFF
+        D = ((D << shift) | (D >> (28 - shift))) & 0xFFFFFFF
+        keys.append(c0[C >> 20] | c1[(C >> 12) & 0xFF] | c2[(C >> 4) & 0xFF] |
+                    c3[((C & 0xF) << 4) | (D >> 24)] | c4[(D >> 16) & 0xFF] |
+                    c5[(D >> 8) & 0xFF] | c6[D & 0xFF])
+
+    return keys
+
+
+def des_process_int(block, keys):
+    """Core DES processing on a 64-bit integer block
+    Integer counterpart of des_process, bit-identical output. keys is a
+    16-key schedule in processing order (a cipher's decrypt_keys to
+    decrypt); triple DES goes through des3_process_int.
+    The halves stay E-expanded (see SP_E_TABLES) and the 16 rounds are
+    written out, alternating L and R so they never need swapping."""
+    ip0, ip1, ip2, ip3, ip4, ip5, ip6, ip7 = IP_E_TABLES
+    fr0, fr1, fr2, fr3, fl0, fl1, fl2, fl3 = FP_E_TABLES
+    s0, s1, s2 = SP_E_TABLES
+    k0, k1, k2, k3, k4, k5, k6, k7, k8, k9, k10, k11, k12, k13, k14, k15 = keys
+
+    L = (ip0[block >> 56] | ip1[(block >> 48) & 0xFF] |
+         ip2[(block >> 40) & 0xFF] | ip3[(block >> 32) & 0xFF] |
+         ip4[(block >> 24) & 0xFF] | ip5[(block >> 16) & 0xFF] |
+         ip6[(block >> 8) & 0xFF] | ip7[block & 0xFF])
+    L, R = L >> 48, L & 0xFFFFFFFFFFFF
+
+    x = R ^ k0
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k1
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k2
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k3
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k4
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k5
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k6
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k7
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k8
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k9
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k10
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k11
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k12
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k13
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = R ^ k14
+    L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+    x = L ^ k15
+    R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+
+    # FP applied to R + L (swap), straight from the expanded halves
+    return (fr0[R >> 36] | fr1[(R >> 24) & 0xFFF] | fr2[(R >> 12) & 0xFFF] | fr3[R & 0xFFF] |
+            fl0[L >> 36] | fl1[(L >> 24) & 0xFFF] | fl2[(L >> 12) & 0xFFF] | fl3[L & 0xFFF])
+
+
+def des3_process_int(block, keys):
+    """Fused triple DES on a 64-bit integer block
+    keys is the 48-key EDE schedule in processing order. The FP at the end
+    of one DES pass and the IP at the start of the next cancel out (FP is
+    the inverse of IP), so the block pays for one IP and one FP in total;
+    between passes only the halves swap. Same expanded halves and tables
+    as des_process_int."""
+    ip0, ip1, ip2, ip3, ip4, ip5, ip6, ip7 = IP_E_TABLES
+    fr0, fr1, fr2, fr3, fl0, fl1, fl2, fl3 = FP_E_TABLES
+    s0, s1, s2 = SP_E_TABLES
+
+    L = (ip0[block >> 56] | ip1[(block >> 48) & 0xFF] |
+         ip2[(block >> 40) & 0xFF] | ip3[(block >> 32) & 0xFF] |
+         ip4[(block >> 24) & 0xFF] | ip5[(block >> 16) & 0xFF] |
+         ip6[(block >> 8) & 0xFF] | ip7[block & 0xFF])
+    L, R = L >> 48, L & 0xFFFFFFFFFFFF
+
+    for stage in (0, 16, 32):
+        key_iter = iter(keys[stage:stage + 16])
+        for k1, k2 in zip(key_iter, key_iter):
+            x = R ^ k1
+            L ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+            x = L ^ k2
+            R ^= s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF]
+        L, R = R, L  # Fused FP + IP between passes (and the final swap)
+
+    # After the last swap L holds what FP takes as its high half
+    return (fr0[L >> 36] | fr1[(L >> 24) & 0xFFF] | fr2[(L >> 12) & 0xFFF] | fr3[L & 0xFFF] |
+            fl0[R >> 36] | fl1[(R >> 24) & 0xFFF] | fl2[(R >> 12) & 0xFFF] | fl3[R & 0xFFF])
+
+
+def int_to_hex(value):
+    """Convert a 64-bit integer to a 16 digit hex string"""
+    return format(value, '016X')
+
+
+# ===========================
+# MULTI-BLOCK BYTE PROCESSING
+# ===========================
+
+BLOCK_SIZE = 8            # DES block size in bytes
+BULK_CHUNK = 64 * 1024    # Bytes unpacked to integers at a time
+
+
+NUMPY_MIN_BYTES = 512       # Below this NumPy call overhead outweighs the gain
+NUMPY_CHUNK = 1024 * 1024  # Bytes per vectorized batch (bounds temporaries)
+
+if NUMPY_AVAILABLE:
+    NP_IP = np.array(IP_TABLES, dtype=np.uint64)
+    NP_FP = np.array(FP_TABLES, dtype=np.uint64)
+    NP_E_HI = np.array(E_HI, dtype=np.uint64)
+    NP_E_LO = np.array(E_LO, dtype=np.uint64)
+    NP_SP = np.array(SP_PAIRS, dtype=np.uint32)
+    NP_BYTE_SHIFTS = [np.uint64(56 - 8 * k) for k in range(8)]
+
+
+def des_process_numpy(blocks, keys):
+    """Vectorized DES over a uint64 array of blocks
+    The plain 32-bit halves with the E_HI/E_LO and SP_PAIRS tables (the
+    expanded tables of des_process_int would need 96 bits per block),
+    applied to every block at once with table gathers; keys must be in
+    processing order (48 for triple DES)."""
+    u = np.uint64
+    shifts = NP_BYTE_SHIFTS
+    data = NP_IP[0][blocks >> shifts[0]]
+    for k in range(1, 8):
+        data |= NP_IP[k][(blocks >> shifts[k]) & u(0xFF)]
+    L = (data >> u(32)).astype(np.uint32)
+    R = (data & u(0xFFFFFFFF)).astype(np.uint32)
+
+    s0, s1, s2, s3 = NP_SP
+    for i, key in enumerate(keys):
+        if i and not i % 16:
+            L, R = R, L  # Fused FP + IP between triple DES passes
+        x = (NP_E_HI[R >> 16] | NP_E_LO[R & 0xFFFF]) ^ u(key)
+        f = s0[x >> u(36)]
+        f |= s1[(x >> u(24)) & u(0xFFF)]
+        f |= s2[(x >> u(12)) & u(0xFFF)]
+        f |= s3[x & u(0xFFF)]
+        L, R = R, L ^ f
+
+    # FP applied to R + L (swap), one byte of each half at a time
+    out = NP_FP[0][R >> 24]
+    for k in range(1, 4):
+        out |= NP_FP[k][(R >> (24 - 8 * k)) & 0xFF]
+    for k in range(4):
+        out |= NP_FP[4 + k][(L >> (24 - 8 * k)) & 0xFF]
+    return out
+
+
+def ecb_process_numpy(data, keys):
+    """ECB-process whole blocks with the NumPy backend"""
+    out = bytearray()
+    view = memoryview(data)
+    for start in range(0, len(view), NUMPY_CHUNK):
+        blocks = np.frombuffer(view[start:start + NUMPY_CHUNK], dtype='>u8')
+        result = des_process_numpy(blocks.astype(np.uint64), keys)
+        out += result.astype('>u8').tobytes()
+    return bytes(out)
+
+
+def cbc_decrypt_numpy(data, keys, iv):
+    """CBC-decrypt whole blocks with the NumPy backend
+    Returns (plaintext, last ciphertext block) like cbc_decrypt_bytes"""
+    out = bytearray()
+    view = memoryview(data)
+    prev = iv
+    for start in range(0, len(view), NUMPY_CHUNK):
+        blocks = np.frombuffer(view[start:start + NUMPY_CHUNK], dtype='>u8')
+        blocks = blocks.astype(np.uint64)
+        chain = np.empty_like(blocks)
+        chain[0] = prev
+        chain[1:] = blocks[:-1]
+        out += (des_process_numpy(blocks, keys) ^ chain).astype('>u8').tobytes()
+        prev = int(blocks[-1])
+    return bytes(out), prev
+
+
+def use_numpy(data):
+    """Whether a bulk call on data should take the NumPy path"""
+    return NUMPY_AVAILABLE and len(data) >= NUMPY_MIN_BYTES
+
+
+def pkcs7_pad(data, block_size=BLOCK_SIZE):
+    """Append PKCS#7 padding (always 1 to block_size bytes)"""
+    n = block_size - len(data) % block_size
+    return bytes(data) + bytes([n]) * n
+
+
+def pkcs7_unpad(data, block_size=BLOCK_SIZE):
+    """Remove PKCS#7 padding, raising ValueError if it is malformed"""
+    if not data or len(data) % block_size:
+        raise ValueError("Padded data must be a non-empty multiple of the block size")
+    n = data[-1]
+    if not 1 <= n <= block_size or data[-n:] != bytes([n]) * n:
+        raise ValueError("Invalid PKCS#7 padding")
+    return bytes(data[:-n])
+
+
+def block_int(value, name):
+    """Convert an 8-byte key/IV to an integer, validating its length"""
+    if len(value) != BLOCK_SIZE:
+        raise ValueError(f"{name} must be exactly {BLOCK_SIZE} bytes")
+    return int.from_bytes(value, 'big')
+
+
+def check_blocks(data):
+    """Make sure unpadded data is a whole number of blocks"""
+    if len(data) % BLOCK_SIZE:
+        raise ValueError(f"Data length must be a multiple of {BLOCK_SIZE} bytes")
+
+
+def ecb_process_bytes(data, keys, process=None):
+    """Run every 8-byte block of data through process
+    keys must already be in processing order (reversed for decryption),
+    so the schedule is computed once for the whole run. process is the
+    block function for the schedule (a cipher's process; des_process_int
+    if not given). Large inputs go through the NumPy backend when it is
+    installed."""
+    if use_numpy(data):
+        return ecb_process_numpy(data, keys)
+
+    process = process or des_process_int
+    out = bytearray()
+    view = memoryview(data)
+    for start in range(0, len(view), BULK_CHUNK):
+        chunk = view[start:start + BULK_CHUNK]
+        fmt = '>%dQ' % (len(chunk) // BLOCK_SIZE)
+        out += struct.pack(fmt, *[process(block, keys)
+                                  for block in struct.unpack(fmt, chunk)])
+    return bytes(out)
+
+
+def cbc_encrypt_bytes(data, keys, iv, process=None):
+    """CBC-encrypt whole blocks, chaining from the integer iv
+    process is as for ecb_process_bytes.
+    Returns (ciphertext, last ciphertext block) so callers can keep chaining"""
+    process = process or des_process_int
+    out = bytearray()
+    view = memoryview(data)
+    prev = iv
+    for start in range(0, len(view), BULK_CHUNK):
+        chunk = view[start:start + BULK_CHUNK]
+        fmt = '>%dQ' % (len(chunk) // BLOCK_SIZE)
+        blocks = []
+        append = blocks.append
+        for block in struct.unpack(fmt, chunk):
+            prev = process(block ^ prev, keys)
+            append(prev)
+        out += struct.pack(fmt, *blocks)
+    return bytes(out), prev
+
+
+def cbc_decrypt_bytes(data, keys, iv, process=None):
+    """CBC-decrypt whole blocks, chaining from the integer iv
+    keys must be the reversed (decryption) schedule, process is as for
+    ecb_process_bytes.
+    Returns (plaintext, last ciphertext block) so callers can keep chaining.
+    Large inputs go through the NumPy backend when it is installed."""
+    if use_numpy(data):
+        return cbc_decrypt_numpy(data, keys, iv)
+
+    process = process or des_process_int
+    out = bytearray()
+    view = memoryview(data)
+    prev = iv
+    for start in range(0, len(view), BULK_CHUNK):
+        chunk = view[start:start + BULK_CHUNK]
+        fmt = '>%dQ' % (len(chunk) // BLOCK_SIZE)
+        blocks = struct.unpack(fmt, chunk)
+        out += struct.pack(fmt, *[process(block, keys) ^ chain for block, chain
+                                  in zip(blocks, (prev,) + blocks[:-1])])
+        prev = blocks[-1]
+    return bytes(out), prev
+
+
+# ===========================
+# KEY SCHEDULE CACHE
+# ===========================
+
+class DESCipher:
+    """DES bound to one key, with both round-key schedules precomputed
+    Build it once per key and reuse it for any number of blocks."""
+
+    def __init__(self, key):
+        self.key = bytes(key)
+        self.encrypt_keys = tuple(generate_round_keys_int(block_int(key, "Key")))
+        self.decrypt_keys = self.encrypt_keys[::-1]
+
+    @property
+    def process(self):
+        """Block function for this cipher's schedules
+        Looked up on each use, so a patched module function is picked up."""
+        return des_process_int
+
+    def encrypt_block(self, block):
+        """Encrypt one 64-bit integer block"""
+        return self.process(block, self.encrypt_keys)
+
+    def decrypt_block(self, block):
+        """Decrypt one 64-bit integer block"""
+        return self.process(block, self.decrypt_keys)
+
+    def encrypt_ecb(self, plaintext, padding=True):
+        """Encrypt bytes using ECB mode (PKCS#7 padded by default)"""
+        if padding:
+            plaintext = pkcs7_pad(plaintext)
+        check_blocks(plaintext)
+        return ecb_process_bytes(plaintext, self.encrypt_keys, self.process)
+
+    def decrypt_ecb(self, ciphertext, padding=True):
+        """Decrypt bytes using ECB mode (PKCS#7 padded by default)"""
+        check_blocks(ciphertext)
+        plaintext = ecb_process_bytes(ciphertext, self.decrypt_keys, self.process)
+        return pkcs7_unpad(plaintext) if padding else plaintext
+
+    def encrypt_cbc(self, plaintext, iv, padding=True):
+        """Encrypt bytes using CBC mode (PKCS#7 padded by default)"""
+        if padding:
+            plaintext = pkcs7_pad(plaintext)
+        check_blocks(plaintext)
+        return cbc_encrypt_bytes(plaintext, self.encrypt_keys,
+                                 block_int(iv, "IV"), self.process)[0]
+
+    def decrypt_cbc(self, ciphertext, iv, padding=True):
+        """Decrypt bytes using CBC mode (PKCS#7 padded by default)"""
+        check_blocks(ciphertext)
+        plaintext = cbc_decrypt_bytes(ciphertext, self.decrypt_keys,
+                                      block_int(iv, "IV"), self.process)[0]
+        return pkcs7_unpad(plaintext) if padding else plaintext
+
+
+class TripleDESCipher(DESCipher):
+    """Triple DES (EDE) bound to one key
+    A 16-byte key is two-key EDE2 (K1, K2, K1), a 24-byte key three-key
+    EDE3 (K1, K2, K3): encrypt with K1, decrypt with K2, encrypt with K3.
+    The three schedules are concatenated into one 48-key schedule, which
+    des3_process_int runs as fused passes; process hands it to every bulk
+    helper."""
+
+    def __init__(self, key):
+        key = bytes(key)
+        if len(key) == 16:
+            k1, k2, k3 = key[:8], key[8:], key[:8]
+        elif len(key) == 24:
+            k1, k2, k3 = key[:8], key[8:16], key[16:]
+        else:
+            raise ValueError("Triple DES key must be 16 or 24 bytes")
+        c1, c2, c3 = DESCipher(k1), DESCipher(k2), DESCipher(k3)
+        self.key = key
+        self.encrypt_keys = c1.encrypt_keys + c2.decrypt_keys + c3.encrypt_keys
+        self.decrypt_keys = self.encrypt_keys[::-1]
+
+    @property
+    def process(self):
+        """Block function for the 48-key schedules"""
+        return des3_process_int
+
+
+def new_cipher(key):
+    """DESCipher for an 8-byte key, TripleDESCipher for 16 or 24 bytes"""
+    if len(key) in (16, 24):
+        return TripleDESCipher(key)
+    return DESCipher(key)
+
+
+class KeyScheduleCache:
+    """Bounded LRU cache of DES/triple DES ciphers keyed by key bytes
+    hits/misses count lookups, so the reuse rate can be checked."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._ciphers = OrderedDict()
+
+    def get(self, key):
+        """Return the cipher for key, building its schedule on a miss"""
+        key = bytes(key)
+        cipher = self._ciphers.get(key)
+        if cipher is not None:
+            self.hits += 1
+            self._ciphers.move_to_end(key)
+            return cipher
+
+        self.misses += 1
+        cipher = new_cipher(key)
+        self._ciphers[key] = cipher
+        if len(self._ciphers) > self.maxsize:
+            self._ciphers.popitem(last=False)  # Evict least recently used
+        return cipher
+
+    def clear(self):
+        """Drop every cached schedule and reset the counters"""
+        self._ciphers.clear()
+        self.hits = self.misses = 0
+
+    def info(self):
+        """Cache statistics as a dict"""
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._ciphers), "maxsize": self.maxsize}
+
+
+KEY_CACHE = KeyScheduleCache()
+
+
+class CustomDES:
+    """Custom DES implementation
+
+    The block core is chosen by the `engine` class attribute:
+    "int" (integer-packed tables, default) or "string" (the original
+    '0'/'1' string pipeline, kept as the readable reference)."""
+
+    engine = "int"
+
+    @classmethod
+    def encrypt_ecb(cls, plaintext_hex, key_hex):
+        """Encrypt using ECB mode"""
+        if cls.engine == "int":
+            cipher = KEY_CACHE.get(bytes.fromhex(key_hex))
+            return int_to_hex(cipher.encrypt_block(int(plaintext_hex, 16)))
+
+        plaintext_bin = hex_to_bin(plaintext_hex)
+        key_bin = hex_to_bin(key_hex)
+        keys = generate_round_keys(key_bin)
+        ciphertext_bin = des_process(plaintext_bin, keys, encrypt=True)
+        return bin_to_hex(ciphertext_bin)
+
+    @classmethod
+    def decrypt_ecb(cls, ciphertext_hex, key_hex):
+        """Decrypt using ECB mode"""
+        if cls.engine == "int":
+            cipher = KEY_CACHE.get(bytes.fromhex(key_hex))
+            return int_to_hex(cipher.decrypt_block(int(ciphertext_hex, 16)))
+
+        ciphertext_bin = hex_to_bin(ciphertext_hex)
+        key_bin = hex_to_bin(key_hex)
+        keys = generate_round_keys(key_bin)
+        plaintext_bin = des_process(ciphertext_bin, keys, encrypt=False)
+        return bin_to_hex(plaintext_bin)
+
+    @classmethod
+    def encrypt_cbc(cls, plaintext_hex, key_hex, iv_hex):
+        """Encrypt using CBC mode"""
+        if cls.engine == "int":
+            cipher = KEY_CACHE.get(bytes.fromhex(key_hex))
+            xored = int(plaintext_hex, 16) ^ int(iv_hex, 16)
+            return int_to_hex(cipher.encrypt_block(xored))
+
+        plaintext_bin = hex_to_bin(plaintext_hex)
+        key_bin = hex_to_bin(key_hex)
+        iv_bin = hex_to_bin(iv_hex)
+        keys = generate_round_keys(key_bin)
+        
+        # XOR plaintext with IV before encryption
+        xored = xor(plaintext_bin, iv_bin)
+        ciphertext_bin = des_process(xored, keys, encrypt=True)
+        return bin_to_hex(ciphertext_bin)
+    
+    @classmethod
+    def decrypt_cbc(cls, ciphertext_hex, key_hex, iv_hex):
+        """Decrypt using CBC mode"""
+        if cls.engine == "int":
+            cipher = KEY_CACHE.get(bytes.fromhex(key_hex))
+            decrypted = cipher.decrypt_block(int(ciphertext_hex, 16))
+            return int_to_hex(decrypted ^ int(iv_hex, 16))
+
+        ciphertext_bin = hex_to_bin(ciphertext_hex)
+        key_bin = hex_to_bin(key_hex)
+        iv_bin = hex_to_bin(iv_hex)
+        keys = generate_round_keys(key_bin)
+        
+        # Decrypt then XOR with IV
+        decrypted_bin = des_process(ciphertext_bin, keys, encrypt=False)
+        plaintext_bin = xor(decrypted_bin, iv_bin)
+        return bin_to_hex(plaintext_bin)
+
+    # Bytes-in/bytes-out methods for data of any length. These always use
+    # the integer engine, with the key schedule taken from KEY_CACHE.
+    # A 16 or 24-byte key selects triple DES (EDE2/EDE3).
+
+    @staticmethod
+    def encrypt_ecb_bytes(plaintext, key, padding=True):
+        """Encrypt bytes using ECB mode (PKCS#7 padded by default)"""
+        return KEY_CACHE.get(key).encrypt_ecb(plaintext, padding)
+
+    @staticmethod
+    def decrypt_ecb_bytes(ciphertext, key, padding=True):
+        """Decrypt bytes using ECB mode (PKCS#7 padded by default)"""
+        return KEY_CACHE.get(key).decrypt_ecb(ciphertext, padding)
+
+    @staticmethod
+    def encrypt_cbc_bytes(plaintext, key, iv, padding=True):
+        """Encrypt bytes using CBC mode (PKCS#7 padded by default)"""
+        return KEY_CACHE.get(key).encrypt_cbc(plaintext, iv, padding)
+
+    @staticmethod
+    def decrypt_cbc_bytes(ciphertext, key, iv, padding=True):
+        """Decrypt bytes using CBC mode (PKCS#7 padded by default)"""
+        return KEY_CACHE.get(key).decrypt_cbc(ciphertext, iv, padding)
+
+    @staticmethod
+    def encrypt_ctr_bytes(data, key, nonce=b'', initial_value=0, offset=0):
+        """Encrypt/decrypt bytes using CTR mode, data starting offset bytes in"""
+        return CTRMode(key, nonce, initial_value).crypt(data, offset)
+
+    @staticmethod
+    def encrypt_ofb_bytes(data, key, iv, offset=0):
+        """Encrypt/decrypt bytes using OFB mode, data starting offset bytes in"""
+        return OFBMode(key, iv).crypt(data, offset)
+
+    # Keystream modes: decryption is the same XOR as encryption
+    decrypt_ctr_bytes = encrypt_ctr_bytes
+    decrypt_ofb_bytes = encrypt_ofb_bytes
+
+
+class IntDES(CustomDES):
+    """CustomDES pinned to the integer-packed engine"""
+    engine = "int"
+
+
+class StringDES(CustomDES):
+    """CustomDES pinned to the original string pipeline"""
+    engine = "string"
+
+
+ENGINES = {"int": IntDES, "string": StringDES}
+SPEEDUP_TARGET = 50  # Block rate of the int core over the string core (batch_test)
+RATE_ROUNDS = 8      # Timing rounds of engine_block_rates
+
+
+# ===========================
+# PYCRYPTODOME WRAPPER
+# ===========================
+
+def new_pycrypto(key, mode, *args, **kwargs):
+    """PyCryptodome DES object, or DES3 for 16/24-byte (triple DES) keys"""
+    if len(key) in (16, 24):
+        return DES3.new(key, mode, *args, **kwargs)
+    return DES.new(key, mode, *args, **kwargs)
+
+
+class PyCryptoDES:
+    """PyCryptodome DES wrapper for comparison
+    The *_bytes methods accept 16/24-byte keys for triple DES."""
+    
+    @staticmethod
+    def encrypt_ecb(plaintext_hex, key_hex):
+        """Encrypt using PyCryptodome ECB mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+        
+        key = bytes.fromhex(key_hex)
+        plaintext = bytes.fromhex(plaintext_hex)
+        cipher = DES.new(key, DES.MODE_ECB)
+        ciphertext = cipher.encrypt(plaintext)
+        return ciphertext.hex().upper()
+    
+    @staticmethod
+    def decrypt_ecb(ciphertext_hex, key_hex):
+        """Decrypt using PyCryptodome ECB mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+        
+        key = bytes.fromhex(key_hex)
+        ciphertext = bytes.fromhex(ciphertext_hex)
+        cipher = DES.new(key, DES.MODE_ECB)
+        plaintext = cipher.decrypt(ciphertext)
+        return plaintext.hex().upper()
+    
+    @staticmethod
+    def encrypt_cbc(plaintext_hex, key_hex, iv_hex):
+        """Encrypt using PyCryptodome CBC mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+        
+        key = bytes.fromhex(key_hex)
+        plaintext = bytes.fromhex(plaintext_hex)
+        iv = bytes.fromhex(iv_hex)
+        cipher = DES.new(key, DES.MODE_CBC, iv)
+        ciphertext = cipher.encrypt(plaintext)
+        return ciphertext.hex().upper()
+    
+    @staticmethod
+    def decrypt_cbc(ciphertext_hex, key_hex, iv_hex):
+        """Decrypt using PyCryptodome CBC mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+        
+        key = bytes.fromhex(key_hex)
+        ciphertext = bytes.fromhex(ciphertext_hex)
+        iv = bytes.fromhex(iv_hex)
+        cipher = DES.new(key, DES.MODE_CBC, iv)
+        plaintext = cipher.decrypt(ciphertext)
+        return plaintext.hex().upper()
+
+    @staticmethod
+    def encrypt_ecb_bytes(plaintext, key, padding=True):
+        """Encrypt bytes using PyCryptodome ECB mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+
+        if padding:
+            plaintext = pkcs7_pad(plaintext)
+        return new_pycrypto(key, DES.MODE_ECB).encrypt(plaintext)
+
+    @staticmethod
+    def decrypt_ecb_bytes(ciphertext, key, padding=True):
+        """Decrypt bytes using PyCryptodome ECB mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+
+        plaintext = new_pycrypto(key, DES.MODE_ECB).decrypt(ciphertext)
+        return pkcs7_unpad(plaintext) if padding else plaintext
+
+    @staticmethod
+    def encrypt_cbc_bytes(plaintext, key, iv, padding=True):
+        """Encrypt bytes using PyCryptodome CBC mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+
+        if padding:
+            plaintext = pkcs7_pad(plaintext)
+        return new_pycrypto(key, DES.MODE_CBC, iv).encrypt(plaintext)
+
+    @staticmethod
+    def decrypt_cbc_bytes(ciphertext, key, iv, padding=True):
+        """Decrypt bytes using PyCryptodome CBC mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+
+        plaintext = new_pycrypto(key, DES.MODE_CBC, iv).decrypt(ciphertext)
+        return pkcs7_unpad(plaintext) if padding else plaintext
+
+    @staticmethod
+    def encrypt_ctr_bytes(data, key, nonce=b'', initial_value=0):
+        """Encrypt/decrypt bytes using PyCryptodome CTR mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+
+        return new_pycrypto(key, DES.MODE_CTR, nonce=nonce,
+                            initial_value=initial_value).encrypt(data)
+
+    @staticmethod
+    def encrypt_ofb_bytes(data, key, iv):
+        """Encrypt/decrypt bytes using PyCryptodome OFB mode"""
+        if not PYCRYPTODOME_AVAILABLE:
+            return None
+
+        return new_pycrypto(key, DES.MODE_OFB, iv).encrypt(data)
+
+    decrypt_ctr_bytes = encrypt_ctr_bytes
+    decrypt_ofb_bytes = encrypt_ofb_bytes
+
+
+# ===========================
+# PARALLEL BULK MODE
+# ===========================
+# ECB (both directions) and CBC decryption have no dependency between
+# blocks, so block-aligned shards can be processed by separate processes.
+
+PARALLEL_SHARD = 256 * 1024  # Bytes per task, a multiple of BLOCK_SIZE
+
+_worker_cipher = None  # DESCipher/TripleDESCipher, set once per worker
+
+
+def _init_worker(key):
+    """Pool initializer: build the key's cipher in the worker process"""
+    global _worker_cipher
+    _worker_cipher = KEY_CACHE.get(key)
+
+
+def _ecb_shard(task):
+    """Worker task: ECB-process one shard"""
+    shard, decrypt = task
+    cipher = _worker_cipher
+    keys = cipher.decrypt_keys if decrypt else cipher.encrypt_keys
+    return ecb_process_bytes(shard, keys, cipher.process)
+
+
+def _cbc_decrypt_shard(task):
+    """Worker task: CBC-decrypt one shard given the block preceding it"""
+    shard, chain = task
+    cipher = _worker_cipher
+    return cbc_decrypt_bytes(shard, cipher.decrypt_keys, chain, cipher.process)[0]
+
+
+class ParallelDES:
+    """Process-pool DES for large buffers
+    ECB and CBC decryption are split into block-aligned shards and spread
+    over the pool; results are stitched back in order. CBC encryption is
+    inherently serial and runs in the calling process. Worker processes
+    receive the key once, when they start, and build its cipher.
+    Use as a context manager (or call close()) to shut the pool down."""
+
+    def __init__(self, key, workers=None, shard_size=PARALLEL_SHARD):
+        if shard_size <= 0 or shard_size % BLOCK_SIZE:
+            raise ValueError(f"Shard size must be a positive multiple of {BLOCK_SIZE}")
+        self.cipher = KEY_CACHE.get(key)
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self.cipher.key,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut the worker pool down"""
+        self._pool.shutdown()
+
+    def _shards(self, data):
+        view = memoryview(data)
+        return [bytes(view[start:start + self.shard_size])
+                for start in range(0, len(view), self.shard_size)]
+
+    def ecb_blocks(self, data, decrypt=False):
+        """ECB-process whole blocks in parallel"""
+        check_blocks(data)
+        tasks = [(shard, decrypt) for shard in self._shards(data)]
+        return b''.join(self._pool.map(_ecb_shard, tasks))
+
+    def cbc_decrypt_blocks(self, data, iv):
+        """CBC-decrypt whole blocks in parallel, chaining from the integer iv
+        Returns (plaintext, last ciphertext block) like cbc_decrypt_bytes"""
+        check_blocks(data)
+        if not data:
+            return b'', iv
+        shards = self._shards(data)
+        chains = [iv] + [int.from_bytes(shard[-BLOCK_SIZE:], 'big')
+                         for shard in shards]
+        out = b''.join(self._pool.map(_cbc_decrypt_shard, zip(shards, chains)))
+        return out, chains[-1]
+
+    def encrypt_ecb(self, plaintext, padding=True):
+        """Encrypt bytes using ECB mode (PKCS#7 padded by default)"""
+        return self.ecb_blocks(pkcs7_pad(plaintext) if padding else plaintext)
+
+    def decrypt_ecb(self, ciphertext, padding=True):
+        """Decrypt bytes using ECB mode (PKCS#7 padded by default)"""
+        plaintext = self.ecb_blocks(ciphertext, decrypt=True)
+        return pkcs7_unpad(plaintext) if padding else plaintext
+
+    def encrypt_cbc(self, plaintext, iv, padding=True):
+        """Encrypt bytes using CBC mode (serial, in this process)"""
+        return self.cipher.encrypt_cbc(plaintext, iv, padding)
+
+    def decrypt_cbc(self, ciphertext, iv, padding=True):
+        """Decrypt bytes using CBC mode (PKCS#7 padded by default)"""
+        plaintext = self.cbc_decrypt_blocks(ciphertext, block_int(iv, "IV"))[0]
+        return pkcs7_unpad(plaintext) if padding else plaintext
+
+
+def parallel_benchmark(size=4 * 1024 * 1024, max_workers=None, key=None):
+    """Measure ECB-encrypt and CBC-decrypt throughput for 1..max_workers
+    Returns a list of (workers, ecb MB/s, cbc-decrypt MB/s)"""
+    max_workers = max_workers or os.cpu_count() or 1
+    key = key or bytes.fromhex("133457799BBCDFF1")
+    iv = bytes(BLOCK_SIZE)
+    data = os.urandom(size)
+    ciphertext = KEY_CACHE.get(key).encrypt_cbc(data, iv, padding=False)
+
+    results = []
+    for workers in range(1, max_workers + 1):
+        with ParallelDES(key, workers=workers) as engine:
+            engine.ecb_blocks(data[:engine.shard_size * workers])  # Warm up
+            start = time.perf_counter()
+            engine.ecb_blocks(data)
+            ecb_time = time.perf_counter() - start
+            start = time.perf_counter()
+            engine.decrypt_cbc(ciphertext, iv, padding=False)
+            cbc_time = time.perf_counter() - start
+        mb = size / (1024 * 1024)
+        results.append((workers, mb / ecb_time, mb / cbc_time))
+    return results
+
+
+# ===========================
+# CTR / OFB STREAM MODES
+# ===========================
+# Both modes XOR the data with a keystream, so encryption and decryption
+# are the same operation and no padding is needed. Every method takes the
+# byte offset of data within the whole message, so one record in the
+# middle of a large file can be decrypted on its own.
+
+CTR_BATCH = 64 * 1024      # Keystream bytes generated per batch
+OFB_CHECKPOINT = 4096      # Blocks between saved OFB feedback registers
+
+
+def xor_bytes(data, keystream):
+    """XOR two equal-length byte strings"""
+    n = len(data)
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(n, 'big')
+
+
+def keystream_blocks(offset, length):
+    """(first block index, block count, skip) covering offset..offset+length
+    skip is how far offset lies into the first block."""
+    first = offset // BLOCK_SIZE
+    last = -(-(offset + length) // BLOCK_SIZE)
+    return first, last - first, offset - first * BLOCK_SIZE
+
+
+class KeystreamMode:
+    """Shared part of CTR and OFB: a keystream XORed into the data
+    Subclasses provide _generate(first, count), returning keystream blocks
+    first..first+count-1 as bytes. precompute() fills a buffer ahead of the
+    data; keystream() serves from it when the range is inside."""
+
+    _buffer = (0, b'')  # (byte offset, precomputed keystream)
+
+    def precompute(self, length, offset=0):
+        """Generate length bytes of keystream from offset into the buffer"""
+        first, count, skip = keystream_blocks(offset, length)
+        self._buffer = (offset, self._generate(first, count)[skip:skip + length])
+
+    def keystream(self, offset, length):
+        """length keystream bytes starting at byte offset"""
+        start, buffered = self._buffer
+        if start <= offset and offset + length <= start + len(buffered):
+            return buffered[offset - start:offset - start + length]
+        first, count, skip = keystream_blocks(offset, length)
+        return self._generate(first, count)[skip:skip + length]
+
+    def crypt(self, data, offset=0):
+        """Encrypt or decrypt data that starts offset bytes into the message"""
+        return xor_bytes(data, self.keystream(offset, len(data)))
+
+    encrypt = decrypt = crypt
+
+
+class CTRMode(KeystreamMode):
+    """DES/triple DES counter mode
+    The counter block is nonce || counter, the counter filling the other
+    8 - len(nonce) bytes big-endian and starting at initial_value, as in
+    PyCryptodome's MODE_CTR. Keystream blocks are independent, so they are
+    made in batches through the bulk ECB path (NumPy when installed, a
+    ParallelDES pool with workers > 1). precompute() fills a buffer ahead
+    of the data. Use as a context manager when workers > 1."""
+
+    def __init__(self, key, nonce=b'', initial_value=0, workers=1,
+                 batch_size=CTR_BATCH):
+        if len(nonce) >= BLOCK_SIZE:
+            raise ValueError(f"Nonce must be shorter than {BLOCK_SIZE} bytes")
+        if batch_size <= 0 or batch_size % BLOCK_SIZE:
+            raise ValueError(f"Batch size must be a positive multiple of {BLOCK_SIZE}")
+        self.cipher = KEY_CACHE.get(key)
+        self.nonce = bytes(nonce)
+        self.counter_bits = 8 * (BLOCK_SIZE - len(nonce))
+        if not 0 <= initial_value < 1 << self.counter_bits:
+            raise ValueError("Initial counter value does not fit the counter")
+        self.initial_value = initial_value
+        self.batch_size = batch_size
+        self._prefix = int.from_bytes(self.nonce, 'big') << self.counter_bits
+        self._parallel = ParallelDES(key, workers) if workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool, if any"""
+        if self._parallel:
+            self._parallel.close()
+
+    def counter_blocks(self, first, count):
+        """Packed counter blocks first..first+count-1
+        The counter wraps modulo its width; like PyCryptodome, running on
+        until it would repeat initial_value is an OverflowError."""
+        if first + count > 1 << self.counter_bits:
+            raise OverflowError("CTR counter wrapped around")
+        mask = (1 << self.counter_bits) - 1
+        start = (self.initial_value + first) & mask
+        if NUMPY_AVAILABLE:
+            counters = np.arange(count, dtype=np.uint64) + np.uint64(start)
+            counters = (counters & np.uint64(mask)) | np.uint64(self._prefix)
+            return counters.astype('>u8').tobytes()
+        prefix = self._prefix
+        return struct.pack('>%dQ' % count, *[prefix | (c & mask) for c
+                                              in range(start, start + count)])
+
+    def _generate(self, first, count):
+        """Keystream blocks first..first+count-1, computed batch by batch"""
+        out = bytearray()
+        step = self.batch_size // BLOCK_SIZE
+        for start in range(first, first + count, step):
+            counters = self.counter_blocks(start, min(step, first + count - start))
+            if self._parallel:
+                out += self._parallel.ecb_blocks(counters)
+            else:
+                out += ecb_process_bytes(counters, self.cipher.encrypt_keys,
+                                         self.cipher.process)
+        return bytes(out)
+
+
+class OFBMode(KeystreamMode):
+    """DES/triple DES output feedback mode
+    Each keystream block encrypts the previous one (the IV first), so the
+    keystream is serial. While generating it, the feedback register is
+    saved every checkpoint_interval blocks; reaching a later offset then
+    starts from the nearest checkpoint instead of from the IV.
+    precompute() runs the keystream ahead of the data into a buffer."""
+
+    def __init__(self, key, iv, checkpoint_interval=OFB_CHECKPOINT):
+        if checkpoint_interval <= 0:
+            raise ValueError("Checkpoint interval must be positive")
+        self.cipher = KEY_CACHE.get(key)
+        self.iv = bytes(iv)
+        self.checkpoint_interval = checkpoint_interval
+        # Block index -> feedback register that produces that block
+        self._checkpoints = {0: block_int(iv, "IV")}
+
+    def _generate(self, first, count):
+        """Keystream blocks first..first+count-1"""
+        interval = self.checkpoint_interval
+        start = first - first % interval
+        while start not in self._checkpoints:
+            start -= interval
+        state = self._checkpoints[start]
+
+        process = self.cipher.process
+        keys = self.cipher.encrypt_keys
+        checkpoints = self._checkpoints
+        blocks = []
+        append = blocks.append
+        for index in range(start, first + count):
+            if index % interval == 0:
+                checkpoints[index] = state
+            state = process(state, keys)
+            if index >= first:
+                append(state)
+        return struct.pack('>%dQ' % count, *blocks)
+
+
+# ===========================
+# STREAMING FILE/PIPE MODE
+# ===========================
+
+STREAM_CHUNK = 1024 * 1024  # Bytes read per chunk, a multiple of BLOCK_SIZE
+
+
+def read_chunk(src, size):
+    """Read exactly size bytes unless EOF comes first (pipes return short reads)"""
+    parts = []
+    remaining = size
+    while remaining:
+        part = src.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b''.join(parts)
+
+
+def skip_bytes(src, count):
+    """Move src forward count bytes (seeking when it can, else reading)"""
+    if src.seekable():
+        src.seek(count, os.SEEK_CUR)
+        return
+    while count:
+        part = src.read(min(count, STREAM_CHUNK))
+        if not part:
+            break
+        count -= len(part)
+
+
+def crypt_stream(src, dst, key, decrypt=False, mode="cbc", iv=None,
+                 padding=True, chunk_size=STREAM_CHUNK, workers=1,
+                 offset=0, length=None):
+    """Encrypt or decrypt a binary stream with bounded memory
+    Reads fixed-size chunks, carries the CBC chaining block from one chunk
+    to the next and only pads/unpads the final chunk. With workers > 1,
+    ECB, CBC decryption and CTR chunks are spread over a ParallelDES pool.
+    CTR (iv is the initial counter block) and OFB never pad; for them src
+    may start offset bytes into the message and length limits the bytes
+    processed, so one record can be decrypted from the middle of a file.
+    Returns the number of bytes written."""
+    if mode in ("ctr", "ofb"):
+        return _stream_keystream(src, dst, key, mode, iv, chunk_size,
+                                 workers, offset, length)
+    if mode not in ("ecb", "cbc"):
+        raise ValueError("Mode must be 'ecb', 'cbc', 'ctr' or 'ofb'")
+    if offset or length is not None:
+        raise ValueError("Offset and length need CTR or OFB mode")
+    if chunk_size <= 0 or chunk_size % BLOCK_SIZE:
+        raise ValueError(f"Chunk size must be a positive multiple of {BLOCK_SIZE}")
+
+    cipher = KEY_CACHE.get(key)
+    keys = cipher.decrypt_keys if decrypt else cipher.encrypt_keys
+    core = cipher.process
+    chain = block_int(iv, "IV") if mode == "cbc" else None
+
+    parallel = None
+    if workers > 1 and (mode == "ecb" or decrypt):
+        parallel = ParallelDES(key, workers=workers)
+
+    def process(data):
+        nonlocal chain
+        if mode == "ecb":
+            if parallel:
+                return parallel.ecb_blocks(data, decrypt)
+            return ecb_process_bytes(data, keys, core)
+        if decrypt:
+            if parallel:
+                out, chain = parallel.cbc_decrypt_blocks(data, chain)
+            else:
+                out, chain = cbc_decrypt_bytes(data, keys, chain, core)
+        else:
+            out, chain = cbc_encrypt_bytes(data, keys, chain, core)
+        return out
+
+    try:
+        return _stream_chunks(src, dst, process, decrypt, padding, chunk_size)
+    finally:
+        if parallel:
+            parallel.close()
+
+
+def _stream_chunks(src, dst, process, decrypt, padding, chunk_size):
+    """Chunk loop of crypt_stream"""
+    written = 0
+    chunk = read_chunk(src, chunk_size)
+    while True:
+        next_chunk = read_chunk(src, chunk_size)
+        if not next_chunk:
+            break
+        out = process(chunk)  # A full chunk, so always whole blocks
+        dst.write(out)
+        written += len(out)
+        chunk = next_chunk
+
+    # Final chunk: the only place padding is added or removed
+    if padding and not decrypt:
+        chunk = pkcs7_pad(chunk)
+    check_blocks(chunk)
+    out = process(chunk)
+    if padding and decrypt:
+        out = pkcs7_unpad(out)
+    dst.write(out)
+    return written + len(out)
+
+
+def _stream_keystream(src, dst, key, mode, iv, chunk_size, workers, offset, length):
+    """Chunk loop of crypt_stream for CTR and OFB"""
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    if mode == "ctr":
+        engine = CTRMode(key, initial_value=block_int(iv, "IV"), workers=workers)
+    else:
+        engine = OFBMode(key, iv)
+
+    written = 0
+    try:
+        while length is None or written < length:
+            size = chunk_size if length is None else min(chunk_size, length - written)
+            chunk = read_chunk(src, size)
+            if not chunk:
+                break
+            dst.write(engine.crypt(chunk, offset + written))
+            written += len(chunk)
+    finally:
+        if mode == "ctr":
+            engine.close()
+    return written
+
+
+# ===========================
+# USER INTERFACE
+# ===========================
+
+def validate_hex(hex_str, length):
+    """Validate hexadecimal string"""
+    if len(hex_str) != length:
+        return False
+    try:
+        int(hex_str, 16)
+        return True
+    except ValueError:
+        return False
+
+
+def print_header():
+    """Print application header"""
+    print("=" * 70)
+    print("DES ENCRYPTION/DECRYPTION TOOL".center(70))
+    print("Custom Implementation + PyCryptodome Library".center(70))
+    print("=" * 70)
+    print()
+
+
+def print_menu():
+    """Print main menu"""
+    print("\n" + "=" * 70)
+    print("MAIN MENU")
+    print("=" * 70)
+    print("1. ECB Mode - Electronic Codebook")
+    print("2. CBC Mode - Cipher Block Chaining")
+    print("3. Compare Custom vs PyCryptodome")
+    print("4. Batch Test Mode")
+    print("5. Exit")
+    print("=" * 70)
+
+
+def ecb_mode():
+    """ECB mode encryption/decryption"""
+    print("\n" + "-" * 70)
+    print("ECB MODE - Electronic Codebook")
+    print("-" * 70)
+    
+    # Get inputs
+    while True:
+        key = input("Enter 64-bit key (16 hex digits): ").strip().upper()
+        if validate_hex(key, 16):
+            break
+        print("❌ Invalid! Must be 16 hexadecimal characters.")
+    
+    while True:
+        plaintext = input("Enter 64-bit plaintext (16 hex digits): ").strip().upper()
+        if validate_hex(plaintext, 16):
+            break
+        print("❌ Invalid! Must be 16 hexadecimal characters.")
+    
+    # Custom implementation
+    print("\n🔧 CUSTOM IMPLEMENTATION:")
+    print("-" * 70)
+    ciphertext_custom = CustomDES.encrypt_ecb(plaintext, key)
+    print(f"Ciphertext:  {ciphertext_custom}")
+    
+    decrypted_custom = CustomDES.decrypt_ecb(ciphertext_custom, key)
+    print(f"Decrypted:   {decrypted_custom}")
+    print(f"Verified:    {'✅ PASS' if decrypted_custom == plaintext else '❌ FAIL'}")
+    
+    # PyCryptodome comparison
+    if PYCRYPTODOME_AVAILABLE:
+        print("\n📚 PYCRYPTODOME LIBRARY:")
+        print("-" * 70)
+        ciphertext_lib = PyCryptoDES.encrypt_ecb(plaintext, key)
+        print(f"Ciphertext:  {ciphertext_lib}")
+        
+        decrypted_lib = PyCryptoDES.decrypt_ecb(ciphertext_lib, key)
+        print(f"Decrypted:   {decrypted_lib}")
+        print(f"Verified:    {'✅ PASS' if decrypted_lib == plaintext else '❌ FAIL'}")
+        
+        print("\n🔍 COMPARISON:")
+        print("-" * 70)
+        print(f"Match:       {'✅ IDENTICAL' if ciphertext_custom == ciphertext_lib else '❌ DIFFERENT'}")
+
+
+def cbc_mode():
+    """CBC mode encryption/decryption"""
+    print("\n" + "-" * 70)
+    print("CBC MODE - Cipher Block Chaining")
+    print("-" * 70)
+    
+    # Get inputs
+    while True:
+        key = input("Enter 64-bit key (16 hex digits): ").strip().upper()
+        if validate_hex(key, 16):
+            break
+        print("❌ Invalid! Must be 16 hexadecimal characters.")
+    
+    while True:
+        plaintext = input("Enter 64-bit plaintext (16 hex digits): ").strip().upper()
+        if validate_hex(plaintext, 16):
+            break
+        print("❌ Invalid! Must be 16 hexadecimal characters.")
+    
+    while True:
+        iv = input("Enter 64-bit IV (16 hex digits): ").strip().upper()
+        if validate_hex(iv, 16):
+            break
+        print("❌ Invalid! Must be 16 hexadecimal characters.")
+    
+    # Custom implementation
+    print("\n🔧 CUSTOM IMPLEMENTATION:")
+    print("-" * 70)
+    ciphertext_custom = CustomDES.encrypt_cbc(plaintext, key, iv)
+    print(f"Ciphertext:  {ciphertext_custom}")
+    
+    decrypted_custom = CustomDES.decrypt_cbc(ciphertext_custom, key, iv)
+    print(f"Decrypted:   {decrypted_custom}")
+    print(f"Verified:    {'✅ PASS' if decrypted_custom == plaintext else '❌ FAIL'}")
+    
+    # PyCryptodome comparison
+    if PYCRYPTODOME_AVAILABLE:
+        print("\n📚 PYCRYPTODOME LIBRARY:")
+        print("-" * 70)
+        ciphertext_lib = PyCryptoDES.encrypt_cbc(plaintext, key, iv)
+        print(f"Ciphertext:  {ciphertext_lib}")
+        
+        decrypted_lib = PyCryptoDES.decrypt_cbc(ciphertext_lib, key, iv)
+        print(f"Decrypted:   {decrypted_lib}")
+        print(f"Verified:    {'✅ PASS' if decrypted_lib == plaintext else '❌ FAIL'}")
+        
+        print("\n🔍 COMPARISON:")
+        print("-" * 70)
+        print(f"Match:       {'✅ IDENTICAL' if ciphertext_custom == ciphertext_lib else '❌ DIFFERENT'}")
+
+
+def batch_test():
+    """Run batch tests with predefined test vectors"""
+    print("\n" + "-" * 70)
+    print("BATCH TEST MODE")
+    print("-" * 70)
+    
+    test_vectors = [
+        {"key": "133457799BBCDFF1", "plaintext": "0123456789ABCDEF", "name": "Test 1"},
+        {"key": "AABB09182736CCDD", "plaintext": "123456ABCD132536", "name": "Test 2"},
+        {"key": "0E329232EA6D0D73", "plaintext": "8787878787878787", "name": "Test 3"},
+    ]
+    
+    print(f"\nRunning {len(test_vectors)} test vectors...\n")
+    
+    for i, test in enumerate(test_vectors, 1):
+        print(f"{test['name']}:")
+        print(f"  Key:       {test['key']}")
+        print(f"  Plaintext: {test['plaintext']}")
+        
+        cipher = CustomDES.encrypt_ecb(test['plaintext'], test['key'])
+        decrypted = CustomDES.decrypt_ecb(cipher, test['key'])
+        
+        cipher_str = StringDES.encrypt_ecb(test['plaintext'], test['key'])
+
+        print(f"  Cipher:    {cipher}")
+        print(f"  Decrypted: {decrypted}")
+        print(f"  Status:    {'✅ PASS' if decrypted == test['plaintext'] else '❌ FAIL'}")
+        print(f"  Engines:   {'✅ IDENTICAL' if cipher == cipher_str else '❌ DIFFERENT'}")
+        print()
+
+    triple_des_test()
+    stream_modes_test()
+
+    # Block rate of both engines over the same vectors
+    rates, speedup = engine_block_rates(test_vectors)
+    print(f"Block rate (encrypt + decrypt, best of {RATE_ROUNDS} rounds):")
+    print(f"  int core     {rates['int']:>10,.0f} blocks/s  (key schedules precomputed)")
+    print(f"  string core  {rates['string core']:>10,.0f} blocks/s  (key schedule precomputed)")
+    print(f"  StringDES    {rates['string']:>10,.0f} blocks/s  (hex API as above, key schedule per block)")
+    verdict = ('✅ PASS' if speedup >= SPEEDUP_TARGET else
+               f'❌ FAIL ({SPEEDUP_TARGET - speedup:.1f}x short)')
+    print(f"  Speedup:     {speedup:.1f}x core to core (median of the rounds), "
+          f"target {SPEEDUP_TARGET}x  {verdict}")
+    print(f"               {rates['int'] / rates['string']:.1f}x over StringDES")
+
+    info = KEY_CACHE.info()
+    print(f"Key schedule cache: {info['hits']} hits, {info['misses']} misses")
+
+
+def triple_des_test():
+    """Round-trip EDE2/EDE3 over a multi-block message, checked against DES3"""
+    message = b"Triple DES multi-block test message for ECB and CBC modes."
+    iv = bytes.fromhex("0011223344556677")
+    keys = {
+        "EDE2": bytes.fromhex("133457799BBCDFF1AABB09182736CCDD"),
+        "EDE3": bytes.fromhex("133457799BBCDFF1AABB09182736CCDD0E329232EA6D0D73"),
+    }
+
+    for name, key in keys.items():
+        print(f"Triple DES {name}:")
+        for mode in ("ecb", "cbc"):
+            args = (key, iv) if mode == "cbc" else (key,)
+            encrypt = getattr(CustomDES, f"encrypt_{mode}_bytes")
+            decrypt = getattr(CustomDES, f"decrypt_{mode}_bytes")
+            cipher = encrypt(message, *args)
+            status = '✅ PASS' if decrypt(cipher, *args) == message else '❌ FAIL'
+            if PYCRYPTODOME_AVAILABLE:
+                reference = getattr(PyCryptoDES, f"encrypt_{mode}_bytes")(message, *args)
+                match = '✅ IDENTICAL' if cipher == reference else '❌ DIFFERENT'
+                status += f", DES3 {match}"
+            print(f"  {mode.upper()}:       {status}")
+        print()
+
+
+def stream_modes_test():
+    """CTR/OFB round trip, random-access decryption and PyCryptodome check"""
+    message = b"CTR and OFB keystream test: any byte offset can be decrypted alone."
+    key = bytes.fromhex("133457799BBCDFF1")
+    iv = bytes.fromhex("0011223344556677")
+    start, end = 13, 41  # A record that does not sit on block boundaries
+
+    print("Stream modes:")
+    for mode, args, reference in (
+            ("ctr", (key, iv[:4], 5), lambda: PyCryptoDES.encrypt_ctr_bytes(
+                message, key, nonce=iv[:4], initial_value=5)),
+            ("ofb", (key, iv), lambda: PyCryptoDES.encrypt_ofb_bytes(message, key, iv))):
+        encrypt = getattr(CustomDES, f"encrypt_{mode}_bytes")
+        decrypt = getattr(CustomDES, f"decrypt_{mode}_bytes")
+        cipher = encrypt(message, *args)
+        ok = decrypt(cipher, *args) == message
+        ok = ok and decrypt(cipher[start:end], *args, offset=start) == message[start:end]
+        status = '✅ PASS' if ok else '❌ FAIL'
+        if PYCRYPTODOME_AVAILABLE:
+            status += f", PyCryptodome {'✅ IDENTICAL' if cipher == reference() else '❌ DIFFERENT'}"
+        print(f"  {mode.upper()}:       {status}")
+    print()
+
+
+def engine_block_rates(test_vectors, min_time=2.0, rounds=RATE_ROUNDS):
+    """Measure block rates in blocks/s, every block encrypted and decrypted
+    int          des_process_int, both schedules computed up front
+    string core  des_process, its schedule computed up front as well
+    string       StringDES on the hex vectors, as batch_test runs them
+                 (the string pipeline has no key cache, so its key
+                 schedule is paid per block)
+    Returns (best rate by engine, speedup). The engines take turns for
+    rounds rounds of min_time / rounds seconds each, in reverse order
+    every other round; speedup is the median over the rounds of int over
+    string core within a round. Both see the machine in the same state
+    within a round, so the ratio holds still even when the rates drift."""
+    def int_work(t):
+        keys = tuple(generate_round_keys_int(int(t['key'], 16)))
+        return int(t['plaintext'], 16), keys, keys[::-1]
+
+    def string_work(t):
+        keys = generate_round_keys(hex_to_bin(t['key']))
+        return hex_to_bin(t['plaintext']), keys, keys
+
+    def string_decrypt(block, keys):
+        return des_process(block, keys, encrypt=False)
+
+    cores = {
+        "int": ([int_work(t) for t in test_vectors], des_process_int, des_process_int),
+        "string": ([(t['plaintext'], t['key'], t['key']) for t in test_vectors],
+                   StringDES.encrypt_ecb, StringDES.decrypt_ecb),
+        "string core": ([string_work(t) for t in test_vectors], des_process, string_decrypt),
+    }
+    rates = dict.fromkeys(cores, 0.0)
+    ratios = []
+    order = list(cores)
+    for turn in range(rounds):
+        measured = {}
+        for engine in (order if turn % 2 == 0 else order[::-1]):
+            work, encrypt, decrypt = cores[engine]
+            blocks = 0
+            start = time.perf_counter()
+            while True:
+                for block, encrypt_keys, decrypt_keys in work:
+                    decrypt(encrypt(block, encrypt_keys), decrypt_keys)
+                blocks += 2 * len(work)
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time / rounds:
+                    break
+            measured[engine] = blocks / elapsed
+            rates[engine] = max(rates[engine], measured[engine])
+        ratios.append(measured["int"] / measured["string core"])
+    return rates, statistics.median(ratios)
+
+
+def parse_args(argv):
+    """Parse the non-interactive command line"""
+    parser = argparse.ArgumentParser(
+        description="Encrypt or decrypt a file (or stdin to stdout) with DES. "
+                    "Run without arguments for the interactive menu.")
+    parser.add_argument("action", choices=["encrypt", "decrypt", "benchmark"],
+                        help="benchmark measures parallel scaling over 1..N workers")
+    parser.add_argument("-k", "--key", help="64-bit key (16 hex digits), or "
+                        "32/48 hex digits for two/three-key triple DES")
+    parser.add_argument("-m", "--mode", choices=["ecb", "cbc", "ctr", "ofb"],
+                        default="cbc")
+    parser.add_argument("--iv", help="64-bit IV for CBC/OFB mode, or the initial "
+                        "counter block for CTR mode (16 hex digits)")
+    parser.add_argument("-i", "--input", default="-",
+                        help="input file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    parser.add_argument("--no-padding", action="store_true",
+                        help="do not add/remove PKCS#7 padding")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="CTR/OFB: start this many bytes into the input")
+    parser.add_argument("--length", type=int,
+                        help="CTR/OFB: process at most this many bytes")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK,
+                        help=f"bytes per read (default: {STREAM_CHUNK})")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="worker processes for ECB and CBC decryption "
+                             "(benchmark: highest count to try)")
+    parser.add_argument("--size", type=int, default=4,
+                        help="benchmark buffer size in MB (default: 4)")
+    args = parser.parse_args(argv)
+
+    if args.action == "benchmark":
+        return args
+    if args.key is None or not any(validate_hex(args.key, n) for n in (16, 32, 48)):
+        parser.error("key must be 16, 32 or 48 hexadecimal characters")
+    if args.mode != "ecb" and (args.iv is None or not validate_hex(args.iv, 16)):
+        parser.error(f"{args.mode.upper()} mode needs --iv with 16 hexadecimal characters")
+    if (args.offset or args.length is not None) and args.mode not in ("ctr", "ofb"):
+        parser.error("--offset and --length need CTR or OFB mode")
+    if args.offset < 0 or (args.length is not None and args.length < 0):
+        parser.error("--offset and --length must not be negative")
+    return args
+
+
+def run_cli(argv):
+    """Stream a file or pipe through DES, returning the exit status"""
+    args = parse_args(argv)
+    if args.action == "benchmark":
+        print(f"{'workers':>7} {'ECB MB/s':>10} {'CBC-dec MB/s':>13}")
+        max_workers = args.workers if args.workers > 1 else None  # All cores
+        for workers, ecb_rate, cbc_rate in parallel_benchmark(
+                args.size * 1024 * 1024, max_workers):
+            print(f"{workers:>7} {ecb_rate:>10.2f} {cbc_rate:>13.2f}")
+        return 0
+
+    src = dst = None
+    try:
+        src = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        skip_bytes(src, args.offset)
+        crypt_stream(src, dst, bytes.fromhex(args.key),
+                     decrypt=args.action == "decrypt", mode=args.mode,
+                     iv=bytes.fromhex(args.iv) if args.iv else None,
+                     padding=not args.no_padding, chunk_size=args.chunk_size,
+                     workers=args.workers, offset=args.offset, length=args.length)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if src not in (None, sys.stdin.buffer):
+            src.close()
+        if dst not in (None, sys.stdout.buffer):
+            dst.close()
+    return 0
+
+
+def main():
+    """Main application loop"""
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+
+    print_header()
+    
+    print("📖 Welcome to the DES Encryption/Decryption Tool!")
+    print("\nThis tool combines:")
+    print("  • Custom DES implementation (educational)")
+    print("  • PyCryptodome library (production-ready)")
+    print("\nSupported modes: ECB, CBC")
+    print("Input format: 16 hexadecimal digits (64 bits)")
+    
+    while True:
+        print_menu()
+        choice = input("\nSelect option (1-5): ").strip()
+        
+        if choice == '1':
+            ecb_mode()
+        elif choice == '2':
+            cbc_mode()
+        elif choice == '3':
+            print("\n🔍 Running comparison test...")
+            ecb_mode()
+        elif choice == '4':
+            batch_test()
+        elif choice == '5':
+            print("\n👋 Thank you for using DES Encryption Tool!")
+            print("=" * 70)
+            break
+        else:
+            print("\n❌ Invalid choice! Please select 1-5.")
+        
+        input("\nPress Enter to continue...")
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
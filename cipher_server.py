@@ -0,0 +1,1017 @@
+"""
+Encryption Service
+Enigma and DES behind one long-running asyncio server
+
+A launch of main.exe or "DES (bonus).py" spends far longer starting up
+than encrypting a short message. This server keeps the machines, key
+schedules and worker processes warm, so a message costs one round trip on
+a local TCP or Unix socket. Clients may pipeline any number of requests
+on a connection; each response carries its request's id and they can
+come back out of order.
+
+Concurrent requests are coalesced: each cipher has a batcher that waits
+up to --batch-delay milliseconds for more requests (or until a batch is
+full) and hands the whole batch to a worker process. There short Enigma
+messages of similar length go through enigma.encrypt_batch together, and
+the blocks of many DES requests share one NumPy pass even under
+different keys. The event loop only reads frames and writes results.
+
+Backpressure: a connection is not read while --max-inflight of its
+requests are unanswered, or while --max-pending bytes of requests are
+queued across all connections. A fast client is then slowed down by TCP
+instead of filling the server's memory.
+
+Protocol: every frame is two big-endian 32-bit lengths (header, body),
+a UTF-8 JSON header and the binary body.
+  {"id": 1, "op": "encrypt", "cipher": "enigma", "setup": "<esetup text>"}
+      + message; "unknown" sets the policy for characters outside the
+      alphabet. Enigma decrypts with the same operation. Without "setup"
+      the machine is InitEnigma's.
+  {"id": 2, "op": "decrypt", "cipher": "des", "key": "<16/32/48 hex>",
+   "mode": "cbc", "iv": "<16 hex>", "padding": true}  + data
+      mode is "ecb" or "cbc" (default), padding is PKCS#7 (default on).
+  {"id": 3, "op": "stats"}   counters since the start, see ServiceStats
+  {"id": 4, "op": "ping"}
+Responses: {"id": 1, "ok": true} + result, or {"id": 1, "ok": false,
+"error": "..."} with an empty body.
+
+Usage:
+  python cipher_server.py serve                          (127.0.0.1:7069, all cores)
+  python cipher_server.py serve -a /tmp/cipher.sock --machine my.machine
+  python cipher_server.py stats
+  python cipher_server.py bench --cipher des --clients 64 --requests 5000 --spawn 20
+"""
+
+import argparse
+import asyncio
+import collections
+import functools
+import itertools
+import json
+import os
+import random
+import signal
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from des_loader import DES_PATH, load_des
+
+ENIGMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "Adjusted Wiring Example")
+sys.path.insert(0, ENIGMA_DIR)
+import enigma  # noqa: E402  (needs ENIGMA_DIR on the path)
+
+des = load_des()
+
+DEFAULT_ADDRESS = "127.0.0.1:7069"
+FRAME = struct.Struct(">II")  # Header length, body length
+MAX_HEADER = 64 * 1024
+MAX_MESSAGE = 16 << 20        # Largest body accepted (16 MB)
+
+BATCH_ITEMS = 256             # Requests per batch
+BATCH_BYTES = 1 << 20         # Bytes per batch (a longer request goes alone)
+BATCH_DELAY = 0.002           # Seconds a request waits for company
+MAX_PENDING = 64 << 20        # Request bytes queued before reading stops
+MAX_INFLIGHT = 128            # Unanswered requests per connection
+LATENCY_WINDOW = 10000        # Latest requests the percentiles cover
+
+# Worker side: below these sizes a batch is cheaper one message at a time
+# (encrypt_bytes costs ~0.6 us a character, an encrypt_batch step ~40 us
+# whatever the number of messages)
+ENIGMA_BATCH_MIN = 64         # Messages of one length class for encrypt_batch
+ENIGMA_LONG = 4096            # Longer messages are encrypted on their own
+DES_BATCH_MIN = 64            # Blocks for one vectorized ECB/CBC-decrypt pass
+DES_LANES_MIN = 32            # Messages for side-by-side CBC encryption
+DES_LONG = 4096               # Longer messages use the cipher's own bulk path
+MACHINE_CACHE = 256           # Enigma setups kept built per process
+
+CIPHERS = ("enigma", "des")
+DES_MODES = ("ecb", "cbc")
+
+
+# ===========================
+# FRAMES
+# ===========================
+
+def parse_address(text):
+    """('tcp', (host, port)) for host:port, ('unix', path) for anything else"""
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit() and "/" not in text:
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", text
+
+
+async def read_frame(reader, max_body=MAX_MESSAGE):
+    """Next (header bytes, body) from a stream, None at a clean end
+    Raises ValueError for a frame over the limits (the stream cannot be
+    resynchronized after that) or one cut short."""
+    try:
+        head = await reader.readexactly(FRAME.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ValueError("Connection closed inside a frame header") from None
+    header_size, body_size = FRAME.unpack(head)
+    if header_size > MAX_HEADER:
+        raise ValueError(f"Frame header over {MAX_HEADER:,} bytes")
+    if body_size > max_body:
+        raise ValueError(f"Message of {body_size:,} bytes is over the "
+                         f"{max_body:,} byte limit")
+    try:
+        header = await reader.readexactly(header_size)
+        body = await reader.readexactly(body_size)
+    except asyncio.IncompleteReadError:
+        raise ValueError("Connection closed inside a frame") from None
+    return header, body
+
+
+def write_frame(writer, header, body=b''):
+    """Queue one frame on a stream (await writer.drain() afterwards)"""
+    header = json.dumps(header, separators=(",", ":")).encode()
+    writer.write(FRAME.pack(len(header), len(body)) + header)
+    if body:
+        writer.write(body)
+
+
+# ===========================
+# WORKER SIDE
+# ===========================
+# These run in the executor's processes, one batch per call. Each returns
+# one result per item: the output bytes, or the ValueError that item
+# raised, so one bad request does not fail the others in its batch.
+
+WIRING = None              # Wirings of this process's machines (None: main.cpp's)
+MACHINES = OrderedDict()   # (setup, unknown) -> Enigma at its start windows
+
+
+def init_worker(machine_path=None):
+    """Load the machine file once per worker process"""
+    global WIRING
+    WIRING = enigma.load_machine(machine_path) if machine_path else None
+    MACHINES.clear()
+
+
+def warm_up():
+    """Build the tables a first request would otherwise wait for"""
+    if enigma.NUMPY_AVAILABLE:
+        enigma.batch_tables(WIRING or enigma.DEFAULT_WIRING)
+    return os.getpid()
+
+
+def enigma_machine(setup, unknown):
+    """A machine for an esetup text at its start windows
+    Built machines are kept per process; the copy returned shares their
+    tables and only has its own rotor positions."""
+    key = (setup, unknown)
+    machine = MACHINES.get(key)
+    if machine is None:
+        if setup is None:
+            machine = enigma.Enigma(wiring=WIRING, unknown=unknown)
+        else:
+            machine = enigma.Enigma.from_setup(setup.splitlines(), WIRING, unknown)
+        MACHINES[key] = machine
+        if len(MACHINES) > MACHINE_CACHE:
+            MACHINES.popitem(last=False)
+    else:
+        MACHINES.move_to_end(key)
+    copy = object.__new__(type(machine))
+    copy.__dict__.update(machine.__dict__)
+    copy.positions = list(machine.start)
+    return copy
+
+
+def run_enigma_batch(items):
+    """Encrypt a batch of (setup, unknown, message) items
+    An encrypt_batch call costs one NumPy step per character of its longest
+    message, so messages are grouped by length (powers of two) and a group
+    only goes through it when it is big enough to beat encrypt_bytes."""
+    results = [None] * len(items)
+    classes = {}
+    for i, (setup, unknown, data) in enumerate(items):
+        try:
+            machine = enigma_machine(setup, unknown)
+        except ValueError as e:
+            results[i] = e
+            continue
+        if data and len(data) <= ENIGMA_LONG:
+            classes.setdefault(len(data).bit_length(), []).append((i, machine))
+        else:
+            results[i] = _encrypt_one(machine, data)
+
+    for group in classes.values():
+        if enigma.NUMPY_AVAILABLE and len(group) >= ENIGMA_BATCH_MIN:
+            try:
+                out = enigma.encrypt_batch([machine for _, machine in group],
+                                           [items[i][2] for i, _ in group])
+            except ValueError:
+                pass  # A message the reject policy refuses: find it one by one
+            else:
+                for (i, _), text in zip(group, out):
+                    results[i] = text
+                continue
+        for i, machine in group:
+            machine.reset()
+            results[i] = _encrypt_one(machine, items[i][2])
+    return results
+
+
+def _encrypt_one(machine, data):
+    try:
+        return machine.encrypt_bytes(data)
+    except ValueError as e:
+        return e
+
+
+def run_des_batch(items):
+    """Encrypt or decrypt a batch of (decrypt, key, mode, iv, padding, data)
+    ECB and CBC decryption of short messages share one NumPy pass, every
+    block with its own message's round keys, and CBC encryption runs
+    the messages side by side. Long messages, and every message without
+    NumPy, go through their cipher one at a time."""
+    results = [None] * len(items)
+    padded = []  # Batched decryptions, which still carry their padding
+    blocks = {}  # Cipher's block function -> [(i, keys, data, iv or None)]
+    chains = {}  # Same, for CBC encryption
+    for i, (decrypt, key, mode, iv, padding, data) in enumerate(items):
+        try:
+            cipher = des.KEY_CACHE.get(key)
+            if len(data) > DES_LONG or not des.NUMPY_AVAILABLE:
+                results[i] = _des_one(cipher, decrypt, mode, iv, padding, data)
+                continue
+            if padding and not decrypt:
+                data = des.pkcs7_pad(data)
+            des.check_blocks(data)
+            iv = des.block_int(iv, "IV") if mode == "cbc" else None
+        except ValueError as e:
+            results[i] = e
+            continue
+        keys = cipher.decrypt_keys if decrypt else cipher.encrypt_keys
+        if decrypt and padding:
+            padded.append(i)
+        jobs = chains if mode == "cbc" and not decrypt else blocks
+        # One block function means one schedule length, as the NumPy passes need
+        jobs.setdefault(cipher.process, []).append((i, keys, data, iv))
+
+    for process, jobs in blocks.items():
+        if sum(len(data) for _, _, data, _ in jobs) >= DES_BATCH_MIN * des.BLOCK_SIZE:
+            out = des_blocks_numpy([job[1:] for job in jobs])
+        else:
+            out = [des.ecb_process_bytes(data, keys, process) if iv is None
+                   else des.cbc_decrypt_bytes(data, keys, iv, process)[0]
+                   for _, keys, data, iv in jobs]
+        for (i, _, _, _), text in zip(jobs, out):
+            results[i] = text
+    for process, jobs in chains.items():
+        if len(jobs) >= DES_LANES_MIN:
+            out = des_chains_numpy([job[1:] for job in jobs])
+        else:
+            out = [des.cbc_encrypt_bytes(data, keys, iv, process)[0]
+                   for _, keys, data, iv in jobs]
+        for (i, _, _, _), text in zip(jobs, out):
+            results[i] = text
+
+    for i in padded:
+        try:
+            results[i] = des.pkcs7_unpad(results[i])
+        except ValueError as e:
+            results[i] = e
+    return results
+
+
+def _des_one(cipher, decrypt, mode, iv, padding, data):
+    if mode == "ecb":
+        fn = cipher.decrypt_ecb if decrypt else cipher.encrypt_ecb
+        return fn(data, padding)
+    fn = cipher.decrypt_cbc if decrypt else cipher.encrypt_cbc
+    return fn(data, iv, padding)
+
+
+def des_blocks_numpy(jobs):
+    """ECB and CBC decryption of many messages in one NumPy pass
+    jobs are (keys, data, iv) with keys in processing order, all the same
+    length, and iv None for ECB. des_process_numpy takes one key per
+    round; here each round's key is an array with every block's own."""
+    np = des.np
+    counts = np.array([len(data) // des.BLOCK_SIZE for _, data, _ in jobs])
+    blocks = np.frombuffer(b''.join(data for _, data, _ in jobs), dtype='>u8')
+    blocks = blocks.astype(np.uint64)
+    schedule = np.array([keys for keys, _, _ in jobs], dtype=np.uint64)
+    out = des.des_process_numpy(blocks, (np.repeat(column, counts)
+                                         for column in schedule.T))
+
+    # CBC: XOR with the block before, or the IV for a message's first
+    chain = np.zeros_like(blocks)
+    chain[1:] = blocks[:-1]
+    chain[~np.repeat([iv is not None for _, _, iv in jobs], counts)] = 0
+    starts = np.cumsum(counts) - counts
+    for start, count, (_, _, iv) in zip(starts, counts, jobs):
+        if iv is not None and count:
+            chain[start] = iv
+    out = (out ^ chain).astype('>u8').tobytes()
+    return [out[8 * start:8 * (start + count)] for start, count in zip(starts, counts)]
+
+
+def des_chains_numpy(jobs):
+    """CBC encryption of many messages side by side
+    Blocks of one message depend on each other, but different messages do
+    not, so step t encrypts block t of every message that is long enough.
+    jobs are (keys, data, iv), keys all the same length."""
+    np = des.np
+    order = sorted(range(len(jobs)), key=lambda k: -len(jobs[k][1]))
+    counts = [len(jobs[k][1]) // des.BLOCK_SIZE for k in order]
+    grid = np.zeros((len(order), counts[0]), dtype=np.uint64)
+    for row, k in enumerate(order):
+        grid[row, :counts[row]] = np.frombuffer(jobs[k][1], dtype='>u8')
+    schedule = np.array([jobs[k][0] for k in order], dtype=np.uint64).T
+    prev = np.array([jobs[k][2] for k in order], dtype=np.uint64)
+
+    active = len(order)
+    for t in range(counts[0]):
+        while counts[active - 1] <= t:
+            active -= 1  # Longest first, so the messages still going are a prefix
+        prev[:active] = des.des_process_numpy(grid[:active, t] ^ prev[:active],
+                                              schedule[:, :active])
+        grid[:active, t] = prev[:active]
+
+    out = [None] * len(jobs)
+    for row, k in enumerate(order):
+        out[k] = grid[row, :counts[row]].astype('>u8').tobytes()
+    return out
+
+
+# ===========================
+# EVENT LOOP SIDE
+# ===========================
+
+class Batcher:
+    """Coalesces requests for one back end into batches for an executor
+    A request that finds no batch running starts one at once. Otherwise
+    requests collect until max_items requests or max_bytes bytes are
+    waiting, or for delay seconds. At most max_running batches run at
+    once, and when one finishes everything waiting goes next, so batches
+    grow with the load while a lone request never waits."""
+
+    def __init__(self, name, run, executor, stats, max_items=BATCH_ITEMS,
+                 max_bytes=BATCH_BYTES, delay=BATCH_DELAY, max_running=1):
+        self.name = name
+        self.run = run
+        self.executor = executor
+        self.stats = stats
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.delay = delay
+        self.max_running = max_running
+        self.waiting = []  # (item, size, future)
+        self.waiting_bytes = 0
+        self.running = 0
+        self._timer = None
+
+    def submit(self, item, size):
+        """Queue one item; returns a future for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.waiting.append((item, size, future))
+        self.waiting_bytes += size
+        if self._full() or not self.running:
+            self._start()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._expired)
+        return future
+
+    def _full(self):
+        return len(self.waiting) >= self.max_items or self.waiting_bytes >= self.max_bytes
+
+    def _expired(self):
+        self._timer = None
+        self._start()
+
+    def _start(self):
+        """Start batches while there are free slots; whatever does not fit
+        waits for the next finished batch"""
+        loop = asyncio.get_running_loop()
+        while self.waiting and self.running < self.max_running:
+            count, size = 0, 0
+            for _, n, _ in self.waiting[:self.max_items]:
+                if count and size + n > self.max_bytes:
+                    break
+                count, size = count + 1, size + n
+            batch = self.waiting[:count]
+            del self.waiting[:count]
+            self.waiting_bytes -= size
+            self.running += 1
+            work = loop.run_in_executor(self.executor, self.run,
+                                        [item for item, _, _ in batch])
+            work.add_done_callback(functools.partial(
+                self._finished, batch, size, time.perf_counter()))
+            if not self._full():
+                break
+        if self.waiting and self.running < self.max_running:
+            if self._timer is None:
+                self._timer = loop.call_later(self.delay, self._expired)
+        elif self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _finished(self, batch, size, started, work):
+        self.running -= 1
+        self.stats.add_batch(self.name, len(batch), size, time.perf_counter() - started)
+        try:
+            results = work.result()
+        except Exception as e:  # Broken pool and the like: every item fails
+            results = [e] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        # Anything still waiting has waited at least one batch already
+        self._start()
+
+
+class ByteBudget:
+    """Bytes of requests admitted but not yet answered, across connections
+    acquire() waits while the limit would be passed; a request larger than
+    the whole limit is admitted only when nothing else is pending."""
+
+    def __init__(self, limit=MAX_PENDING):
+        self.limit = limit
+        self.used = 0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self, size):
+        """Admit size bytes; returns True if that had to wait"""
+        waited = False
+        async with self._changed:
+            while self.used and self.used + size > self.limit:
+                waited = True
+                await self._changed.wait()
+            self.used += size
+        return waited
+
+    async def release(self, size):
+        async with self._changed:
+            self.used -= size
+            self._changed.notify_all()
+
+
+class ServiceStats:
+    """Counters since the server started, as the stats request returns them
+    Latency is from a request's last byte read to its response queued, and
+    the percentiles cover the latest LATENCY_WINDOW requests."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = collections.Counter()  # "cipher op" -> requests
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.batches = collections.Counter()   # cipher -> batches
+        self.batched = collections.Counter()   # cipher -> requests in them
+        self.batch_bytes = collections.Counter()
+        self.batch_seconds = collections.Counter()
+        self.largest = collections.Counter()   # cipher -> most requests in one batch
+        self.connections = 0
+        self.open = 0
+        self.stalls = 0  # Reads held back because --max-pending was reached
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def add_request(self, kind, size_in, size_out, seconds, ok):
+        self.requests[kind] += 1
+        self.errors += not ok
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+        self.latencies.append(seconds)
+
+    def add_batch(self, cipher, count, size, seconds):
+        self.batches[cipher] += 1
+        self.batched[cipher] += count
+        self.batch_bytes[cipher] += size
+        self.batch_seconds[cipher] += seconds
+        self.largest[cipher] = max(self.largest[cipher], count)
+
+    def snapshot(self, pending_bytes=0, inflight=0):
+        """Counters, rates and latency percentiles as a JSON-ready dict"""
+        elapsed = time.monotonic() - self.started
+        total = sum(self.requests.values())
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)]
+                         * 1000, 3)
+
+        return {
+            "uptime": round(elapsed, 3),
+            "requests": total,
+            "by_kind": dict(self.requests),
+            "errors": self.errors,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "requests_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+            "mb_per_second": round(self.bytes_in / elapsed / 1e6, 3) if elapsed else 0.0,
+            "latency_ms": {f"p{p}": percentile(p) for p in (50, 90, 99)},
+            "batches": {
+                cipher: {
+                    "batches": self.batches[cipher],
+                    "mean_size": round(self.batched[cipher] / self.batches[cipher], 2),
+                    "largest": self.largest[cipher],
+                    "bytes": self.batch_bytes[cipher],
+                    "worker_seconds": round(self.batch_seconds[cipher], 3),
+                } for cipher in CIPHERS if self.batches[cipher]},
+            "connections": self.connections,
+            "open_connections": self.open,
+            "pending_bytes": pending_bytes,
+            "inflight": inflight,
+            "stalls": self.stalls,
+        }
+
+
+class CipherService:
+    """Request handling for the server: one handle() task per connection
+    executor runs the batches, max_running of them per cipher at a time."""
+
+    def __init__(self, executor, max_running=1, batch_items=BATCH_ITEMS,
+                 batch_bytes=BATCH_BYTES, batch_delay=BATCH_DELAY,
+                 max_pending=MAX_PENDING, max_inflight=MAX_INFLIGHT,
+                 max_message=MAX_MESSAGE):
+        self.stats = ServiceStats()
+        self.budget = ByteBudget(max_pending)
+        self.max_inflight = max_inflight
+        self.max_message = max_message
+        self.inflight = 0
+        self.batchers = {
+            "enigma": Batcher("enigma", run_enigma_batch, executor, self.stats,
+                              batch_items, batch_bytes, batch_delay, max_running),
+            "des": Batcher("des", run_des_batch, executor, self.stats,
+                           batch_items, batch_bytes, batch_delay, max_running),
+        }
+
+    async def handle(self, reader, writer):
+        """Serve one connection until the client closes it"""
+        self.stats.connections += 1
+        self.stats.open += 1
+        slots = asyncio.Semaphore(self.max_inflight)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await slots.acquire()
+                try:
+                    frame = await read_frame(reader, self.max_message)
+                except ValueError as e:
+                    # The stream is out of step: say why and hang up
+                    async with write_lock:
+                        write_frame(writer, {"id": None, "ok": False, "error": str(e)})
+                    break
+                if frame is None:
+                    break
+                size = len(frame[1])
+                if await self.budget.acquire(size):
+                    self.stats.stalls += 1
+                task = asyncio.create_task(
+                    self._serve(frame, writer, write_lock, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.stats.open -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _serve(self, frame, writer, write_lock, slots):
+        """Answer one request, then free its slot and budget"""
+        raw, body = frame
+        started = time.perf_counter()
+        self.inflight += 1
+        reply, result = {"id": None}, b''
+        try:
+            header = json.loads(raw)
+            if not isinstance(header, dict):
+                raise ValueError("Request header must be a JSON object")
+            reply["id"] = header.get("id")
+            kind, extra, result = await self.dispatch(header, body)
+            reply.update(ok=True, **extra)
+        except ValueError as e:  # Includes bad JSON
+            kind, result = "invalid", b''
+            reply.update(ok=False, error=str(e))
+        except Exception as e:
+            kind, result = "failed", b''
+            reply.update(ok=False, error=f"{type(e).__name__}: {e}")
+            print(f"Request failed: {e!r}", file=sys.stderr)
+        finally:
+            self.inflight -= 1
+            await self.budget.release(len(body))
+        self.stats.add_request(kind, len(body), len(result),
+                               time.perf_counter() - started, reply["ok"])
+        try:
+            async with write_lock:
+                write_frame(writer, reply, result)
+                await writer.drain()
+        except ConnectionError:
+            pass  # The client went away; its reader loop ends too
+        finally:
+            slots.release()
+
+    async def dispatch(self, header, body):
+        """Run one parsed request: returns (kind, extra header fields, body)"""
+        op = header.get("op")
+        if op == "ping":
+            return "ping", {}, b''
+        if op == "stats":
+            return "stats", {"stats": self.stats.snapshot(self.budget.used,
+                                                          self.inflight)}, b''
+        if op not in ("encrypt", "decrypt"):
+            raise ValueError(f"Unknown op {op!r} (encrypt, decrypt, stats or ping)")
+        cipher = header.get("cipher")
+        if cipher == "enigma":
+            item = enigma_item(header, body)
+        elif cipher == "des":
+            item = des_item(header, body, op == "decrypt")
+        else:
+            raise ValueError(f"Unknown cipher {cipher!r} (enigma or des)")
+        result = await self.batchers[cipher].submit(item, len(body))
+        return f"{cipher} {op}", {}, result
+
+
+def enigma_item(header, body):
+    """Batch item for an Enigma request, checked as far as is cheap here"""
+    setup = header.get("setup")
+    unknown = header.get("unknown")
+    if setup is not None and not isinstance(setup, str):
+        raise ValueError("setup must be the text of an esetup file")
+    if unknown is not None and unknown not in enigma.UNKNOWN_POLICIES:
+        raise ValueError(f"unknown must be one of {', '.join(enigma.UNKNOWN_POLICIES)}")
+    return setup, unknown, body
+
+
+def des_item(header, body, decrypt):
+    """Batch item for a DES request, with the key and IV decoded"""
+    mode = header.get("mode", "cbc")
+    if mode not in DES_MODES:
+        raise ValueError(f"mode must be one of {', '.join(DES_MODES)}")
+    key = header.get("key")
+    if not isinstance(key, str) or not any(des.validate_hex(key, n) for n in (16, 32, 48)):
+        raise ValueError("key must be 16, 32 or 48 hexadecimal characters")
+    iv = header.get("iv")
+    if mode == "cbc":
+        if not isinstance(iv, str) or not des.validate_hex(iv, 16):
+            raise ValueError("CBC mode needs an iv of 16 hexadecimal characters")
+        iv = bytes.fromhex(iv)
+    return decrypt, bytes.fromhex(key), mode, iv, bool(header.get("padding", True)), body
+
+
+def make_executor(workers, machine_path=None):
+    """Process pool for the batches; workers=0 runs them on one thread of
+    this process instead (no pickling, but the GIL is shared with the loop)"""
+    if workers == 0:
+        init_worker(machine_path)
+        return ThreadPoolExecutor(1)
+    return ProcessPoolExecutor(workers, initializer=init_worker,
+                               initargs=(machine_path,))
+
+
+async def serve(address=DEFAULT_ADDRESS, workers=None, machine_path=None,
+                stats_every=0, **limits):
+    """Run the server until SIGINT or SIGTERM
+    limits are CipherService's keyword arguments."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    executor = make_executor(workers, machine_path)
+    service = CipherService(executor, max(workers, 1), **limits)
+    # Start the workers now rather than on the first request
+    await asyncio.gather(*(loop.run_in_executor(executor, warm_up)
+                           for _ in range(max(workers, 1))))
+
+    kind, where = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(where) and stat.S_ISSOCK(os.stat(where).st_mode):
+            os.unlink(where)  # Left behind by a server that was killed
+        server = await asyncio.start_unix_server(service.handle, where)
+    else:
+        server = await asyncio.start_server(service.handle, *where)
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C still ends asyncio.run
+    print(f"Listening on {address} with {workers or 'no'} worker processes",
+          file=sys.stderr)
+    reporter = asyncio.create_task(report(service, stats_every)) if stats_every else None
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        if reporter:
+            reporter.cancel()
+        executor.shutdown(cancel_futures=True)
+        if kind == "unix" and os.path.exists(where):
+            os.unlink(where)
+
+
+async def report(service, every):
+    """Print a line of counters to stderr every few seconds"""
+    while True:
+        await asyncio.sleep(every)
+        s = service.stats.snapshot(service.budget.used, service.inflight)
+        latency = s["latency_ms"]
+        batches = ", ".join(f"{c} {b['mean_size']}/batch" for c, b in s["batches"].items())
+        print(f"{s['requests']:,} requests ({s['requests_per_second']:,}/s, "
+              f"{s['mb_per_second']} MB/s), p50 {latency['p50']} ms, "
+              f"p99 {latency['p99']} ms, {s['pending_bytes']:,} bytes pending"
+              + (f", {batches}" if batches else ""), file=sys.stderr)
+
+
+# ===========================
+# CLIENT
+# ===========================
+
+class CipherClient:
+    """Client for one connection; any number of tasks may share it
+    Requests are pipelined: each gets an id and waits for the response
+    with that id. Error responses raise ValueError with the server's
+    message."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}  # id -> future
+        self._write_lock = asyncio.Lock()
+        self._responses = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, address=DEFAULT_ADDRESS):
+        kind, where = parse_address(address)
+        if kind == "unix":
+            reader, writer = await asyncio.open_unix_connection(where)
+        else:
+            reader, writer = await asyncio.open_connection(*where)
+        return cls(reader, writer)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._responses
+
+    async def request(self, header, body=b''):
+        """Send one request; returns (response header, body)"""
+        header = dict(header, id=next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[header["id"]] = future
+        try:
+            async with self._write_lock:
+                write_frame(self.writer, header, body)
+                await self.writer.drain()
+        except ConnectionError:
+            self._waiting.pop(header["id"], None)
+            if future.done():
+                future.result()  # The server's reason for hanging up, if it gave one
+            future.cancel()
+            raise
+        reply, data = await future
+        if not reply.get("ok"):
+            raise ValueError(reply.get("error", "Request failed"))
+        return reply, data
+
+    async def _read_responses(self):
+        error = ConnectionError("Connection closed")
+        try:
+            while True:
+                frame = await read_frame(self.reader, 1 << 32)
+                if frame is None:
+                    break
+                reply = json.loads(frame[0])
+                future = self._waiting.pop(reply.get("id"), None)
+                if future is None:  # The server could not tell which request
+                    error = ConnectionError(reply.get("error", "Unexpected response"))
+                    break
+                if not future.done():
+                    future.set_result((reply, frame[1]))
+        except (ValueError, ConnectionError) as e:
+            error = ConnectionError(str(e))
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(error)
+        self._waiting.clear()
+
+    async def enigma(self, data, setup=None, unknown=None):
+        """Encrypt (or decrypt, the same thing) data on an esetup machine"""
+        header = {"op": "encrypt", "cipher": "enigma"}
+        if setup is not None:
+            header["setup"] = setup
+        if unknown is not None:
+            header["unknown"] = unknown
+        return (await self.request(header, data))[1]
+
+    async def des(self, data, key, decrypt=False, mode="cbc", iv=None, padding=True):
+        """DES or triple DES (by key length) in ECB or CBC mode"""
+        header = {"op": "decrypt" if decrypt else "encrypt", "cipher": "des",
+                  "key": key.hex(), "mode": mode, "padding": padding}
+        if iv is not None:
+            header["iv"] = iv.hex()
+        return (await self.request(header, data))[1]
+
+    async def stats(self):
+        return (await self.request({"op": "stats"}))[0]["stats"]
+
+
+# ===========================
+# BENCHMARK
+# ===========================
+
+def bench_key(cipher, rng):
+    """A random key for one benchmark client: esetup text or (key, iv)"""
+    if cipher == "des":
+        return rng.randbytes(8), rng.randbytes(8)
+    rotors = rng.sample(range(1, 9), 3)
+    windows = rng.sample(enigma.ALPHABET[:36], 3)
+    pairs = "".join(rng.sample(enigma.ALPHABET[:26], 6))
+    lines = [pairs, "3"] + [f"{r}{p}{w}" for p, (r, w) in
+                            enumerate(zip(rotors, windows), 1)] + ["b"]
+    return "\n".join(lines)
+
+
+def bench_local(cipher, key, data):
+    """What the server should answer, computed here"""
+    if cipher == "des":
+        return des.KEY_CACHE.get(key[0]).encrypt_cbc(data, key[1])
+    return enigma.Enigma.from_setup(key.splitlines()).encrypt_bytes(data)
+
+
+async def bench_client(address, cipher, count, size, rng, latencies):
+    """One closed-loop client: a request, its answer, the next request"""
+    key = bench_key(cipher, rng)
+    text = "".join(rng.choices(enigma.ALPHABET[:37], k=size)).encode()
+    async with await CipherClient.connect(address) as client:
+        for n in range(count):
+            started = time.perf_counter()
+            if cipher == "des":
+                out = await client.des(text, key[0], iv=key[1])
+            else:
+                out = await client.enigma(text, setup=key)
+            latencies.append(time.perf_counter() - started)
+            if n == 0 and out != bench_local(cipher, key, text):
+                raise ValueError(f"Server's {cipher} output differs from a local run")
+
+
+async def run_bench(address, cipher, clients, requests, size, seed=1):
+    """Closed-loop load from many clients; returns (seconds, latencies, stats)"""
+    rng = random.Random(seed)
+    latencies = []
+    per_client = [requests // clients + (k < requests % clients) for k in range(clients)]
+    started = time.perf_counter()
+    await asyncio.gather(*(bench_client(address, cipher, n, size,
+                                        random.Random(rng.random()), latencies)
+                           for n in per_client if n))
+    elapsed = time.perf_counter() - started
+    async with await CipherClient.connect(address) as client:
+        stats = await client.stats()
+    return elapsed, latencies, stats
+
+
+def spawn_baseline(cipher, size, launches):
+    """Seconds per message when every message is its own process launch"""
+    rng = random.Random(1)
+    key = bench_key(cipher, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, out = os.path.join(tmp, "plain"), os.path.join(tmp, "out")
+        with open(plain, "w") as f:
+            f.write("".join(rng.choices(enigma.ALPHABET[:37], k=size)))
+        if cipher == "des":
+            command = [sys.executable, DES_PATH, "encrypt", "-k", key[0].hex(),
+                       "--iv", key[1].hex(), "-i", plain, "-o", out]
+        else:
+            setup = os.path.join(tmp, "esetup")
+            with open(setup, "w") as f:
+                f.write(key)
+            command = [sys.executable, os.path.join(ENIGMA_DIR, "enigma.py"), "--stream",
+                       "--setup", setup, "-i", plain, "-o", out]
+        started = time.perf_counter()
+        for _ in range(launches):
+            subprocess.run(command, check=True, capture_output=True)
+        return (time.perf_counter() - started) / launches
+
+
+def print_bench(cipher, requests, size, elapsed, latencies, stats, spawn=None):
+    latencies = sorted(latencies)
+
+    def pick(p):
+        return latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(f"{requests:,} {cipher} requests of {size:,} bytes in {elapsed:.2f} s: "
+          f"{requests / elapsed:,.0f} requests/s, {requests * size / elapsed / 1e6:.2f} MB/s")
+    print(f"Latency: p50 {pick(50):.2f} ms, p90 {pick(90):.2f} ms, p99 {pick(99):.2f} ms")
+    batches = stats["batches"].get(cipher)
+    if batches:
+        print(f"Server batches: {batches['batches']:,}, {batches['mean_size']} requests "
+              f"each on average, largest {batches['largest']}")
+    if spawn:
+        print(f"One process per message: {spawn * 1000:.1f} ms each "
+              f"({1 / spawn:,.1f} messages/s, {spawn * requests / elapsed:,.0f}x slower)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Enigma and DES encryption service with request batching")
+    parser.add_argument("action", choices=["serve", "stats", "bench"],
+                        help="run the server, print its counters, or load it "
+                             "with concurrent clients")
+    parser.add_argument("-a", "--address", default=DEFAULT_ADDRESS,
+                        help=f"host:port, or a path for a Unix socket "
+                             f"(default: {DEFAULT_ADDRESS})")
+    serve_opts = parser.add_argument_group("serve")
+    serve_opts.add_argument("-w", "--workers", type=int,
+                            help="worker processes (default: all cores; 0 runs "
+                                 "batches on a thread of the server)")
+    serve_opts.add_argument("--machine", metavar="FILE",
+                            help="Enigma wirings from a machine file (see wiring_check.py)")
+    serve_opts.add_argument("--batch-size", type=int, default=BATCH_ITEMS, metavar="N",
+                            help=f"most requests per batch (default: {BATCH_ITEMS})")
+    serve_opts.add_argument("--batch-delay", type=float, default=BATCH_DELAY * 1000,
+                            metavar="MS", help="longest wait for a batch to fill "
+                                               f"(default: {BATCH_DELAY * 1000:g} ms)")
+    serve_opts.add_argument("--max-pending", type=int, default=MAX_PENDING >> 20,
+                            metavar="MB", help="request data queued before "
+                            f"connections stop being read (default: {MAX_PENDING >> 20})")
+    serve_opts.add_argument("--max-inflight", type=int, default=MAX_INFLIGHT, metavar="N",
+                            help="unanswered requests per connection before it "
+                                 f"stops being read (default: {MAX_INFLIGHT})")
+    serve_opts.add_argument("--max-message", type=int, default=MAX_MESSAGE >> 20,
+                            metavar="MB", help="largest request accepted "
+                                               f"(default: {MAX_MESSAGE >> 20})")
+    serve_opts.add_argument("--stats-every", type=float, default=0, metavar="SECONDS",
+                            help="print counters to stderr this often")
+    bench_opts = parser.add_argument_group("bench")
+    bench_opts.add_argument("--cipher", choices=CIPHERS, default="enigma")
+    bench_opts.add_argument("--clients", type=int, default=32,
+                            help="concurrent connections (default: 32)")
+    bench_opts.add_argument("--requests", type=int, default=2000,
+                            help="requests in total (default: 2000)")
+    bench_opts.add_argument("--size", type=int, default=64,
+                            help="message bytes (default: 64)")
+    bench_opts.add_argument("--spawn", type=int, default=0, metavar="N",
+                            help="also time N process launches of the plain "
+                                 "command-line tool, for comparison")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 0:
+        parser.error("--workers must not be negative")
+    if min(args.batch_size, args.max_inflight, args.clients, args.requests) < 1:
+        parser.error("--batch-size, --max-inflight, --clients and --requests "
+                     "must be at least 1")
+
+    try:
+        if args.action == "serve":
+            asyncio.run(serve(args.address, args.workers, args.machine, args.stats_every,
+                              batch_items=args.batch_size,
+                              batch_delay=args.batch_delay / 1000,
+                              max_pending=args.max_pending << 20,
+                              max_inflight=args.max_inflight,
+                              max_message=args.max_message << 20))
+        elif args.action == "stats":
+            async def fetch():
+                async with await CipherClient.connect(args.address) as client:
+                    return await client.stats()
+            print(json.dumps(asyncio.run(fetch()), indent=2))
+        else:
+            elapsed, latencies, stats = asyncio.run(run_bench(
+                args.address, args.cipher, args.clients, args.requests, args.size))
+            spawn = spawn_baseline(args.cipher, args.size, args.spawn) if args.spawn else None
+            print_bench(args.cipher, args.requests, args.size, elapsed, latencies,
+                        stats, spawn)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
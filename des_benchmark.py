@@ -0,0 +1,344 @@
+"""
+DES Benchmark Suite
+Measures every DES engine in "DES (bonus).py" against PyCryptodome
+
+For each engine it records:
+  - key schedule cost
+  - single-block latency
+  - bulk ECB/CBC throughput at several sizes (1 KB, 1 MB, 64 MB by default)
+  - peak Python memory of each bulk run (tracemalloc)
+
+Results are written as JSON. With --baseline, throughput is compared to an
+earlier run and the script exits with status 1 when any figure drops by
+more than --max-regression percent.
+
+Usage:
+  python des_benchmark.py -o results.json
+  python des_benchmark.py --baseline results.json --max-regression 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from des_loader import load_des
+
+des = load_des()
+
+KEY = bytes.fromhex("133457799BBCDFF1")
+IV = bytes.fromhex("0011223344556677")
+BLOCK = 0x0123456789ABCDEF
+MODES = ("ecb_encrypt", "ecb_decrypt", "cbc_encrypt", "cbc_decrypt")
+DEFAULT_SIZES = "1K,1M,64M"
+UNITS = {"K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024}
+
+
+# ===========================
+# ENGINES
+# ===========================
+# Each engine provides a key schedule step, a single-block operation and
+# bulk functions for every mode. max_size keeps the slow engines from
+# running for hours on the large sizes; those entries are reported as null.
+
+@contextmanager
+def numpy_disabled():
+    """Force the pure-Python integer path inside the DES module"""
+    saved = des.NUMPY_AVAILABLE
+    des.NUMPY_AVAILABLE = False
+    try:
+        yield
+    finally:
+        des.NUMPY_AVAILABLE = saved
+
+
+@contextmanager
+def no_context():
+    yield
+
+
+def string_engine():
+    """Original '0'/'1' string pipeline"""
+    key_bin = des.hex_to_bin(KEY.hex())
+    keys = des.generate_round_keys(key_bin)
+    block_bin = des.hex_to_bin(format(BLOCK, '016X'))
+
+    def bulk(decrypt, cbc):
+        def run(data):
+            # Block-by-block through the hex API, the only way this engine
+            # can process more than one block
+            impl = des.StringDES
+            prev = IV.hex()
+            for start in range(0, len(data), des.BLOCK_SIZE):
+                block = data[start:start + des.BLOCK_SIZE].hex()
+                if not cbc:
+                    (impl.decrypt_ecb if decrypt else impl.encrypt_ecb)(block, KEY.hex())
+                elif decrypt:
+                    impl.decrypt_cbc(block, KEY.hex(), prev)
+                    prev = block
+                else:
+                    prev = impl.encrypt_cbc(block, KEY.hex(), prev)
+        return run
+
+    return {
+        "key_schedule": lambda: des.generate_round_keys(des.hex_to_bin(KEY.hex())),
+        "block": lambda: des.des_process(block_bin, keys),
+        "bulk": {mode: bulk("decrypt" in mode, "cbc" in mode) for mode in MODES},
+        "max_size": 16 * 1024,
+        "context": no_context,
+    }
+
+
+def int_engine(context=numpy_disabled, max_size=1024 * 1024):
+    """Integer-packed engine through DESCipher (pure Python by default)"""
+    cipher = des.DESCipher(KEY)
+    return {
+        "key_schedule": lambda: des.DESCipher(KEY),
+        "block": lambda: cipher.encrypt_block(BLOCK),
+        "bulk": {
+            "ecb_encrypt": lambda data: cipher.encrypt_ecb(data, padding=False),
+            "ecb_decrypt": lambda data: cipher.decrypt_ecb(data, padding=False),
+            "cbc_encrypt": lambda data: cipher.encrypt_cbc(data, IV, padding=False),
+            "cbc_decrypt": lambda data: cipher.decrypt_cbc(data, IV, padding=False),
+        },
+        "max_size": max_size,
+        "context": context,
+    }
+
+
+def numpy_engine():
+    """Integer engine with the NumPy bulk backend enabled"""
+    engine = int_engine(context=no_context, max_size=None)
+    # CBC encryption stays serial and pure Python, so cap it like int
+    engine["max_sizes"] = {"cbc_encrypt": 1024 * 1024}
+    return engine
+
+
+def parallel_engine(workers):
+    """ParallelDES process pool"""
+    pool = des.ParallelDES(KEY, workers=workers)
+    engine = int_engine(context=no_context, max_size=None)
+    engine["bulk"] = {
+        "ecb_encrypt": lambda data: pool.ecb_blocks(data),
+        "ecb_decrypt": lambda data: pool.ecb_blocks(data, decrypt=True),
+        "cbc_encrypt": lambda data: pool.encrypt_cbc(data, IV, padding=False),
+        "cbc_decrypt": lambda data: pool.decrypt_cbc(data, IV, padding=False),
+    }
+    engine["max_sizes"] = {"cbc_encrypt": 1024 * 1024}
+    engine["close"] = pool.close
+    return engine
+
+
+def pycryptodome_engine():
+    """PyCryptodome reference"""
+    DES = des.DES
+    ecb = DES.new(KEY, DES.MODE_ECB)
+    block = BLOCK.to_bytes(8, 'big')
+    return {
+        "key_schedule": lambda: DES.new(KEY, DES.MODE_ECB),
+        "block": lambda: ecb.encrypt(block),
+        "bulk": {
+            "ecb_encrypt": lambda data: DES.new(KEY, DES.MODE_ECB).encrypt(data),
+            "ecb_decrypt": lambda data: DES.new(KEY, DES.MODE_ECB).decrypt(data),
+            "cbc_encrypt": lambda data: DES.new(KEY, DES.MODE_CBC, IV).encrypt(data),
+            "cbc_decrypt": lambda data: DES.new(KEY, DES.MODE_CBC, IV).decrypt(data),
+        },
+        "max_size": None,
+        "context": no_context,
+    }
+
+
+def available_engines(workers):
+    """Engine name -> factory, for everything usable in this environment"""
+    engines = {
+        "custom-string": string_engine,
+        "custom-int": int_engine,
+    }
+    if des.NUMPY_AVAILABLE:
+        engines["custom-numpy"] = numpy_engine
+    engines["custom-parallel"] = lambda: parallel_engine(workers)
+    if des.PYCRYPTODOME_AVAILABLE:
+        engines["pycryptodome"] = pycryptodome_engine
+    return engines
+
+
+# ===========================
+# MEASUREMENT
+# ===========================
+
+def best_time(fn, min_time):
+    """Best wall time of one fn() call, repeating for at least min_time"""
+    best = float("inf")
+    total = 0.0
+    while total < min_time or best == float("inf"):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+    return best
+
+
+def best_time_batched(fn, min_time, batch=100):
+    """Like best_time, for calls too short to time one at a time"""
+    return best_time(lambda: [fn() for _ in range(batch)], min_time) / batch
+
+
+def parse_size(text):
+    """'64M' -> 67108864"""
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(text[:-1]) * UNITS[text[-1]]
+    return int(text)
+
+
+def bench_engine(engine, sizes, min_time):
+    """Run every measurement for one engine and return the result dict"""
+    result = {"throughput_mb_s": {}, "peak_memory_bytes": {}}
+    with engine["context"]():
+        result["key_schedule_us"] = best_time_batched(engine["key_schedule"], min_time) * 1e6
+        result["block_latency_us"] = best_time_batched(engine["block"], min_time) * 1e6
+
+        for mode in MODES:
+            limit = engine.get("max_sizes", {}).get(mode, engine["max_size"])
+            result["throughput_mb_s"][mode] = {}
+            result["peak_memory_bytes"][mode] = {}
+            for label, size in sizes:
+                if limit is not None and size > limit:
+                    result["throughput_mb_s"][mode][label] = None
+                    result["peak_memory_bytes"][mode][label] = None
+                    continue
+                data = os.urandom(size)
+                run = engine["bulk"][mode]
+                seconds = best_time(lambda: run(data), min_time)
+
+                tracemalloc.start()
+                run(data)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                result["throughput_mb_s"][mode][label] = size / seconds / UNITS["M"]
+                result["peak_memory_bytes"][mode][label] = peak
+    return result
+
+
+def run_benchmarks(engine_names, sizes, min_time, workers):
+    """Benchmark the named engines, printing progress to stderr"""
+    engines = available_engines(workers)
+    results = {}
+    for name in engine_names:
+        if name not in engines:
+            print(f"Skipping {name}: not available here", file=sys.stderr)
+            continue
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        engine = engines[name]()
+        try:
+            results[name] = bench_engine(engine, sizes, min_time)
+        finally:
+            if "close" in engine:
+                engine["close"]()
+    return results
+
+
+# ===========================
+# REPORTING
+# ===========================
+
+def metadata(sizes, min_time, workers):
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": workers,
+        "numpy": des.NUMPY_AVAILABLE,
+        "pycryptodome": des.PYCRYPTODOME_AVAILABLE,
+        "sizes": [label for label, _ in sizes],
+        "min_time": min_time,
+    }
+
+
+def print_report(results):
+    """Human-readable summary of the results"""
+    print("=" * 70)
+    print("DES BENCHMARK".center(70))
+    print("=" * 70)
+    for name, result in results.items():
+        print(f"\n{name}")
+        print("-" * 70)
+        print(f"  Key schedule:  {result['key_schedule_us']:10.2f} us")
+        print(f"  Block latency: {result['block_latency_us']:10.2f} us")
+        for mode, by_size in result["throughput_mb_s"].items():
+            figures = ", ".join(f"{label}: {'-' if rate is None else f'{rate:.2f}'}"
+                                for label, rate in by_size.items())
+            print(f"  {mode:<12}   {figures} MB/s")
+
+
+def compare_baseline(results, baseline, max_regression):
+    """List throughput figures that dropped more than max_regression percent"""
+    failures = []
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        for mode, by_size in result["throughput_mb_s"].items():
+            for label, rate in by_size.items():
+                old_rate = old.get("throughput_mb_s", {}).get(mode, {}).get(label)
+                if rate is None or not old_rate:
+                    continue
+                drop = (old_rate - rate) / old_rate * 100
+                if drop > max_regression:
+                    failures.append(f"{name} {mode} {label}: {old_rate:.2f} -> "
+                                    f"{rate:.2f} MB/s ({drop:.1f}% slower)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DES engines")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"bulk sizes, e.g. 1K,1M (default: {DEFAULT_SIZES})")
+    parser.add_argument("--engines", help="comma-separated engine names "
+                        "(default: all available)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds to repeat each measurement for (default: 0.2)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for custom-parallel")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="allowed throughput drop in percent (default: 10)")
+    args = parser.parse_args(argv)
+
+    sizes = [(label.strip().upper(), parse_size(label))
+             for label in args.sizes.split(",")]
+    names = (args.engines.split(",") if args.engines
+             else list(available_engines(args.workers)))
+
+    results = run_benchmarks(names, sizes, args.min_time, args.workers)
+    print_report(results)
+
+    report = {"meta": metadata(sizes, args.min_time, args.workers), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = compare_baseline(results, baseline, args.max_regression)
+        if failures:
+            print(f"\n❌ Throughput regressions over {args.max_regression}%:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print(f"\n✅ No throughput regression over {args.max_regression}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
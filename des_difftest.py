@@ -0,0 +1,247 @@
+"""
+DES Differential Test Harness
+Randomized CustomDES vs PyCryptodome comparison at scale
+
+Generates random key/IV/data tuples (including weak and semi-weak keys,
+triple DES keys and multi-block CBC), runs them in batches across a process pool and compares
+the custom engines with PyCryptodome. The first divergence is shrunk to a
+single-block reproducer. Cases are derived from --seed, so a failing run
+can be repeated exactly. Nothing here needs network access.
+
+Skips itself (exit status 0) when PyCryptodome is not installed.
+
+Usage:
+  python des_difftest.py                       (1,000,000 cases, all cores)
+  python des_difftest.py --cases 20000 --seed 7 --workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from des_loader import load_des
+
+des = load_des()
+
+OPERATIONS = ("ecb_encrypt", "ecb_decrypt", "cbc_encrypt", "cbc_decrypt")
+
+WEAK_KEYS = [
+    "0101010101010101", "FEFEFEFEFEFEFEFE",
+    "E0E0E0E0F1F1F1F1", "1F1F1F1F0E0E0E0E",
+]
+
+SEMI_WEAK_KEYS = [
+    "01FE01FE01FE01FE", "FE01FE01FE01FE01",
+    "1FE01FE00EF10EF1", "E01FE01FF10EF10E",
+    "01E001E001F101F1", "E001E001F101F101",
+    "1FFE1FFE0EFE0EFE", "FE1FFE1FFE0EFE0E",
+    "011F011F010E010E", "1F011F010E010E01",
+    "E0FEE0FEF1FEF1FE", "FEE0FEE0FEF1FEF1",
+]
+
+SPECIAL_KEY_RATE = 0.05    # Share of cases using a weak/semi-weak key
+TRIPLE_DES_RATE = 0.05     # Share of cases using a 16/24-byte triple DES key
+LARGE_CASE_RATE = 0.01     # Share of cases big enough for the NumPy path
+STRING_ENGINE_RATE = 0.01  # Share of single-block cases also run on StringDES
+
+
+# ===========================
+# CASE GENERATION
+# ===========================
+
+def make_case(rng):
+    """One random test case as a dict of hex strings"""
+    if rng.random() < SPECIAL_KEY_RATE:
+        key = rng.choice(WEAK_KEYS + SEMI_WEAK_KEYS)
+    elif rng.random() < TRIPLE_DES_RATE:
+        key = triple_des_key(rng)
+    else:
+        key = format(rng.getrandbits(64), '016X')
+
+    if rng.random() < LARGE_CASE_RATE:
+        blocks = rng.randint(64, 512)
+    else:
+        blocks = rng.choice((1, 1, 1, 2, 3, 4, 8, 16))
+
+    return {
+        "op": rng.choice(OPERATIONS),
+        "key": key,
+        "iv": format(rng.getrandbits(64), '016X'),
+        "data": rng.getrandbits(64 * blocks).to_bytes(8 * blocks, 'big').hex().upper(),
+        "string": blocks == 1 and len(key) == 16 and rng.random() < STRING_ENGINE_RATE,
+    }
+
+
+def triple_des_key(rng):
+    """Random EDE2 or EDE3 key that PyCryptodome's DES3 accepts
+    (DES3 rejects keys whose parts repeat, since they degrade to DES)"""
+    parts = rng.choice((2, 3))
+    while True:
+        subkeys = [rng.getrandbits(64) & 0xFEFEFEFEFEFEFEFE for _ in range(parts)]
+        if len(set(subkeys)) == parts:
+            return "".join(format(k, '016X') for k in subkeys)
+
+
+def batch_cases(seed, batch, size):
+    """The cases of one batch, reproducible from (seed, batch)"""
+    rng = random.Random(f"{seed}:{batch}")
+    return [make_case(rng) for _ in range(size)]
+
+
+# ===========================
+# EXECUTION
+# ===========================
+
+def run_reference(case):
+    """PyCryptodome result for a case"""
+    key, iv, data = (bytes.fromhex(case[name]) for name in ("key", "iv", "data"))
+    op = case["op"]
+    if op.startswith("ecb"):
+        fn = getattr(des.PyCryptoDES, op.replace("ecb_", "") + "_ecb_bytes")
+        return fn(data, key, padding=False)
+    fn = getattr(des.PyCryptoDES, op.replace("cbc_", "") + "_cbc_bytes")
+    return fn(data, key, iv, padding=False)
+
+
+def run_custom(case, engine="int"):
+    """CustomDES result for a case (integer/NumPy path or string engine)"""
+    op = case["op"]
+    direction = op.split("_")[1]
+    if engine == "string":
+        impl = des.StringDES
+        if op.startswith("ecb"):
+            out = getattr(impl, direction + "_ecb")(case["data"], case["key"])
+        else:
+            out = getattr(impl, direction + "_cbc")(case["data"], case["key"], case["iv"])
+        return bytes.fromhex(out)
+
+    key, iv, data = (bytes.fromhex(case[name]) for name in ("key", "iv", "data"))
+    cipher = des.new_cipher(key)
+    if op.startswith("ecb"):
+        return getattr(cipher, direction + "_ecb")(data, padding=False)
+    return getattr(cipher, direction + "_cbc")(data, iv, padding=False)
+
+
+def check_case(case):
+    """Return (engine, got, expected) for the first mismatch, else None"""
+    expected = run_reference(case)
+    engines = ("int", "string") if case["string"] else ("int",)
+    for engine in engines:
+        got = run_custom(case, engine)
+        if got != expected:
+            return engine, got, expected
+    return None
+
+
+def run_batch(task):
+    """Worker: check one batch, returning (cases checked, failure or None)"""
+    seed, batch, size = task
+    for checked, case in enumerate(batch_cases(seed, batch, size), 1):
+        mismatch = check_case(case)
+        if mismatch:
+            engine, got, expected = mismatch
+            return checked, {"batch": batch, "case": case, "engine": engine,
+                             "got": got.hex().upper(),
+                             "expected": expected.hex().upper()}
+    return size, None
+
+
+# ===========================
+# MINIMIZATION
+# ===========================
+
+def minimize(failure):
+    """Shrink a failing multi-block case to one single-block ECB call
+    Multi-block ECB reduces to its first differing block. CBC reduces to
+    plain ECB of that block: for encryption the input is the plaintext
+    XOR the (correct) previous ciphertext block, for decryption it is the
+    ciphertext block itself."""
+    case = failure["case"]
+    data = bytes.fromhex(case["data"])
+    got = bytes.fromhex(failure["got"])
+    expected = bytes.fromhex(failure["expected"])
+
+    index = next(i for i in range(0, len(expected), 8)
+                 if got[i:i + 8] != expected[i:i + 8])
+    block = data[index:index + 8]
+    direction = case["op"].split("_")[1]
+    if case["op"] == "cbc_encrypt":
+        chain = bytes.fromhex(case["iv"]) if index == 0 else expected[index - 8:index]
+        block = bytes(a ^ b for a, b in zip(block, chain))
+
+    reduced = {"op": "ecb_" + direction, "key": case["key"], "iv": "0" * 16,
+               "data": block.hex().upper(), "string": False}
+    engine = failure["engine"]
+    reduced_got = run_custom(reduced, engine)
+    reduced_expected = run_reference(reduced)
+    if reduced_got == reduced_expected:
+        return None  # Only reproduces with the full case
+    outcome = (f"  # got {reduced_got.hex().upper()}, "
+               f"expected {reduced_expected.hex().upper()}")
+    if len(case["key"]) > 16:  # Triple DES only has the bytes API
+        return (f"CustomDES.{direction}_ecb_bytes(bytes.fromhex(\"{reduced['data']}\"), "
+                f"bytes.fromhex(\"{case['key']}\"), padding=False)" + outcome)
+    impl = "StringDES" if engine == "string" else "IntDES"
+    return f"{impl}.{direction}_ecb(\"{reduced['data']}\", \"{case['key']}\")" + outcome
+
+
+def report_failure(failure, seed):
+    """Print the first divergence and its minimized reproducer"""
+    case = failure["case"]
+    print("\n❌ DIVERGENCE FOUND")
+    print("-" * 70)
+    print(f"  Seed/batch: {seed}/{failure['batch']}")
+    print(f"  Engine:     {failure['engine']}")
+    print(f"  Operation:  {case['op']}")
+    print(f"  Key:        {case['key']}")
+    print(f"  IV:         {case['iv']}")
+    print(f"  Input:      {case['data'][:64]}{'...' if len(case['data']) > 64 else ''}")
+    reproducer = minimize(failure)
+    if reproducer:
+        print(f"  Reproducer: {reproducer}")
+    else:
+        print("  Reproducer: (does not shrink below the full case above)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Randomized differential test of CustomDES against PyCryptodome")
+    parser.add_argument("--cases", type=int, default=1_000_000,
+                        help="number of random cases (default: 1,000,000)")
+    parser.add_argument("--batch-size", type=int, default=2000,
+                        help="cases per worker task (default: 2000)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for reproducible runs (default: random)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if not des.PYCRYPTODOME_AVAILABLE:
+        print("SKIPPED: PyCryptodome is not installed (pip install pycryptodome)")
+        return 0
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    batches = -(-args.cases // args.batch_size)
+    sizes = [min(args.batch_size, args.cases - b * args.batch_size) for b in range(batches)]
+    print(f"Checking {args.cases:,} cases (seed {seed}, {args.workers} workers)...")
+
+    checked = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for count, failure in pool.map(run_batch, [(seed, b, sizes[b]) for b in range(batches)]):
+            checked += count
+            if failure:
+                # Batches come back in order, so this is the first divergence
+                pool.shutdown(wait=False, cancel_futures=True)
+                report_failure(failure, seed)
+                return 1
+    elapsed = time.perf_counter() - start
+    print(f"✅ {checked:,} cases identical ({checked / elapsed:,.0f} cases/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""
+Import helper for "DES (bonus).py"
+
+The DES tool's file name has spaces and brackets, so it cannot be imported
+with a plain import statement. Scripts next to it use load_des() instead.
+"""
+
+import importlib.util
+import os
+import sys
+
+DES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DES (bonus).py")
+MODULE_NAME = "des_bonus"
+
+
+def load_des():
+    """Import "DES (bonus).py" once and return the module
+    The module is registered in sys.modules so process-pool workers can
+    unpickle the functions it defines."""
+    if MODULE_NAME in sys.modules:
+        return sys.modules[MODULE_NAME]
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, DES_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,771 @@
+"""
+Hot-Path Instrumentation
+Per-stage timers and counters for the DES and Enigma engines, on demand
+
+Nothing in "DES (bonus).py" or enigma.py checks a flag: while
+instrumentation is off they run exactly as they always do. Switching it
+on (enabled() or instrumented_call()) swaps timed twins in for the hot
+functions for the length of one with-block and puts the originals back
+afterwards:
+
+  DES      key schedule, IP, rounds and FP of the integer engine and of
+           the NumPy pass; permute (by table), xor, sbox_substitution,
+           left_shift, hex_to_bin and bin_to_hex of the string engine;
+           ECB/CBC bulk calls with the bytes they processed
+  Enigma   rotor stepping, plugboard and scrambler (rotors and reflector)
+           of the character loop; unknown-character screening; table builds of
+           CachedEnigma; encrypt_batch calls with their messages
+
+Stages never contain each other, so their times add up; "calls" are
+whole API calls and include the stages below them. Every interval costs
+one clock read, which is measured once and taken off the stage times
+(timer_overhead_ns in the snapshot). The twins of the hot loops (the
+integer DES core and Enigma's character loop) are copies with clock
+reads added, not the loops that run in production: they do the same work
+in the same way, and enabled() checks them against the originals on one
+input before swapping them in, but their stage times describe the copy.
+They are several times slower, so read the shares, not the absolute
+times; the snapshot says as much under "note". Worker
+processes (ParallelDES, ParallelEnigma, the cipher server's pool) are not
+covered.
+
+For a single call there are two profiling hooks as well, neither of which
+touches the cipher modules: profile_call() runs it under cProfile and
+sample_call() samples its stack from a background thread.
+
+Usage:
+  python instrument.py des --engine int --mode cbc --size 64K
+  python instrument.py des --engine string --size 2K -o des_string.json
+  python instrument.py enigma --size 200000 --cached
+  python instrument.py enigma --batch 500 --size 64
+  python instrument.py des --engine numpy --profile cprofile
+  python instrument.py enigma --profile sample
+"""
+
+import argparse
+import collections
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+from des_loader import load_des
+
+ENIGMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "Adjusted Wiring Example")
+sys.path.insert(0, ENIGMA_DIR)
+import enigma  # noqa: E402  (needs ENIGMA_DIR on the path)
+
+des = load_des()
+
+clock = time.perf_counter_ns
+
+PROFILE_TOP = 25          # Functions listed by the profiling hooks
+SAMPLE_INTERVAL = 0.001   # Seconds between stack samples
+UNITS = {"K": 1024, "M": 1024 * 1024}
+
+SNAPSHOT_NOTE = ("Stage times and shares are measured on instrumented copies of the "
+                 "hot loops, with a clock read between stages; they describe those "
+                 "copies, not the production loops. Compare shares, not seconds.")
+
+_active = None  # The Probe while instrumentation is on
+
+
+# ===========================
+# PROBE
+# ===========================
+
+def timer_overhead(reads=20000):
+    """Nanoseconds one clock read adds to a measured interval"""
+    best = None
+    for _ in range(5):
+        start = clock()
+        for _ in range(reads):
+            clock()
+        took = (clock() - start) / reads
+        best = took if best is None else min(best, took)
+    return best
+
+
+class Probe:
+    """Stage timers and counters collected while instrumentation is on
+    stages and calls map a name to [intervals, nanoseconds]; counters
+    count blocks, bytes, rounds and the like."""
+
+    def __init__(self, overhead=None):
+        self.stages = collections.defaultdict(lambda: [0, 0])
+        self.calls = collections.defaultdict(lambda: [0, 0])
+        self.counters = collections.Counter()
+        self.overhead = timer_overhead() if overhead is None else overhead
+        self.started = self.stopped = None
+
+    def stage(self, name, ns, intervals=1):
+        timer = self.stages[name]
+        timer[0] += intervals
+        timer[1] += ns
+
+    def call(self, name, ns):
+        timer = self.calls[name]
+        timer[0] += 1
+        timer[1] += ns
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def snapshot(self):
+        """Everything collected so far as a JSON-ready dict"""
+        end = self.stopped or clock()
+        elapsed = (end - self.started) / 1e9 if self.started else 0.0
+
+        def timers(table, overhead):
+            rows = [(name, n, max(ns - n * overhead, 0) / 1e9)
+                    for name, (n, ns) in table.items()]
+            return {name: {"calls": n, "seconds": round(seconds, 6),
+                           "share": round(seconds / elapsed, 4) if elapsed else None}
+                    for name, n, seconds in sorted(rows, key=lambda row: -row[2])}
+
+        return {
+            "note": SNAPSHOT_NOTE,
+            "elapsed": round(elapsed, 6),
+            "timer_overhead_ns": round(self.overhead, 1),
+            "stages": timers(self.stages, self.overhead),
+            "calls": timers(self.calls, 0),
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write("\n")
+
+
+def _timed_stage(probe, name, fn):
+    """fn with its time added to stage name"""
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            probe.stage(name, clock() - start)
+    return timed
+
+
+def _timed_call(probe, name, fn, counter=None, size=len):
+    """fn timed as a whole call, with size(first argument) added to counter"""
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        if counter:
+            probe.count(counter, size(args[0]))
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            probe.call(name, clock() - start)
+    return timed
+
+
+def _timed_method(probe, name, fn, counter=None, size=len):
+    """_timed_call for a method: the size comes from the argument after self"""
+    @functools.wraps(fn)
+    def timed(self, *args, **kwargs):
+        if counter:
+            probe.count(counter, size(args[0]))
+        start = clock()
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            probe.call(name, clock() - start)
+    return timed
+
+
+# ===========================
+# DES TWINS
+# ===========================
+# Same results as the originals, with a clock read between stages. The
+# integer engine's IP is its inlined byte-table lookup, which permute_int
+# does with the same tables; its written-out rounds are a loop here.
+# enabled() runs one block through each twin and its original first
+# (check_des_twins), so a twin that falls behind its engine is caught.
+
+def des_patches(probe):
+    """(owner, attribute, replacement) for the DES module"""
+    permutations = {id(des.IP): "ip", id(des.FP): "fp", id(des.E): "e",
+                    id(des.P): "p", id(des.PC1): "pc1", id(des.PC2): "pc2"}
+    permute = des.permute
+
+    def staged_permute(bits, table):
+        start = clock()
+        out = permute(bits, table)
+        probe.stage("des.string.permute." + permutations.get(id(table), "other"),
+                    clock() - start)
+        if table is des.IP:
+            probe.count("des.string.blocks")
+        return out
+
+    generate = des.generate_round_keys_int
+
+    def staged_round_keys(key_int):
+        start = clock()
+        keys = generate(key_int)
+        probe.stage("des.key_schedule", clock() - start)
+        probe.count("des.key_schedules")
+        return keys
+
+    patches = [
+        (des, "permute", staged_permute),
+        (des, "generate_round_keys_int", staged_round_keys),
+        (des, "des_process_int", _staged_des_int(probe)),
+        (des, "des3_process_int", _staged_des_int(probe)),
+        (des, "ecb_process_bytes", _timed_call(probe, "des.ecb", des.ecb_process_bytes,
+                                               "des.bytes")),
+        (des, "cbc_encrypt_bytes", _timed_call(probe, "des.cbc_encrypt",
+                                               des.cbc_encrypt_bytes, "des.bytes")),
+        (des, "cbc_decrypt_bytes", _timed_call(probe, "des.cbc_decrypt",
+                                               des.cbc_decrypt_bytes, "des.bytes")),
+    ]
+    for name, stage in (("xor", "xor"), ("sbox_substitution", "sbox"),
+                        ("left_shift", "left_shift"), ("hex_to_bin", "hex_to_bin"),
+                        ("bin_to_hex", "bin_to_hex")):
+        patches.append((des, name, _timed_stage(probe, "des.string." + stage,
+                                                getattr(des, name))))
+    if des.NUMPY_AVAILABLE:
+        patches.append((des, "des_process_numpy", _staged_des_numpy(probe)))
+    return patches
+
+
+def _staged_des_int(probe):
+    """des_process_int (and des3_process_int) with IP, rounds and FP timed"""
+    ip_tables = des.IP_E_TABLES
+    fr0, fr1, fr2, fr3, fl0, fl1, fl2, fl3 = des.FP_E_TABLES
+    s0, s1, s2 = des.SP_E_TABLES
+    permute_int = des.permute_int
+
+    def des_process_int(block, keys):
+        t0 = clock()
+        L = permute_int(block, ip_tables)
+        L, R = L >> 48, L & 0xFFFFFFFFFFFF
+        t1 = clock()
+        for i, key in enumerate(keys):
+            if i and not i % 16:
+                L, R = R, L  # Fused FP + IP between triple DES passes
+            x = R ^ key
+            L, R = R, L ^ (s0[x >> 30] | s1[(x >> 12) & 0x3FFFF] | s2[x & 0xFFF])
+        t2 = clock()
+        out = (fr0[R >> 36] | fr1[(R >> 24) & 0xFFF] | fr2[(R >> 12) & 0xFFF] |
+               fr3[R & 0xFFF] | fl0[L >> 36] | fl1[(L >> 24) & 0xFFF] |
+               fl2[(L >> 12) & 0xFFF] | fl3[L & 0xFFF])
+        t3 = clock()
+        probe.stage("des.ip", t1 - t0)
+        probe.stage("des.rounds", t2 - t1)
+        probe.stage("des.fp", t3 - t2)
+        probe.count("des.blocks")
+        probe.count("des.rounds", len(keys))
+        return out
+
+    return des_process_int
+
+
+def _staged_des_numpy(probe):
+    """des_process_numpy with the IP gathers, rounds and FP gathers timed"""
+    np = des.np
+    u = np.uint64
+
+    def des_process_numpy(blocks, keys):
+        t0 = clock()
+        shifts = des.NP_BYTE_SHIFTS
+        data = des.NP_IP[0][blocks >> shifts[0]]
+        for k in range(1, 8):
+            data |= des.NP_IP[k][(blocks >> shifts[k]) & u(0xFF)]
+        L = (data >> u(32)).astype(np.uint32)
+        R = (data & u(0xFFFFFFFF)).astype(np.uint32)
+        t1 = clock()
+
+        s0, s1, s2, s3 = des.NP_SP
+        rounds = 0
+        for i, key in enumerate(keys):
+            if i and not i % 16:
+                L, R = R, L
+            x = (des.NP_E_HI[R >> 16] | des.NP_E_LO[R & 0xFFFF]) ^ u(key)
+            f = s0[x >> u(36)]
+            f |= s1[(x >> u(24)) & u(0xFFF)]
+            f |= s2[(x >> u(12)) & u(0xFFF)]
+            f |= s3[x & u(0xFFF)]
+            L, R = R, L ^ f
+            rounds += 1
+        t2 = clock()
+
+        out = des.NP_FP[0][R >> 24]
+        for k in range(1, 4):
+            out |= des.NP_FP[k][(R >> (24 - 8 * k)) & 0xFF]
+        for k in range(4):
+            out |= des.NP_FP[4 + k][(L >> (24 - 8 * k)) & 0xFF]
+        t3 = clock()
+        probe.stage("des.numpy.ip", t1 - t0)
+        probe.stage("des.numpy.rounds", t2 - t1)
+        probe.stage("des.numpy.fp", t3 - t2)
+        probe.count("des.numpy.blocks", len(blocks))
+        probe.count("des.numpy.passes")
+        probe.count("des.rounds", rounds * len(blocks))
+        return out
+
+    return des_process_numpy
+
+
+def check_des_twins():
+    """Run one block through each DES twin and its original, raising
+    RuntimeError if they differ"""
+    probe = Probe(overhead=0)
+    block = 0x0123456789ABCDEF
+    single = des.DESCipher(bytes.fromhex("133457799BBCDFF1"))
+    triple = des.TripleDESCipher(bytes.fromhex("0123456789ABCDEF23456789ABCDEF01"))
+    twin = _staged_des_int(probe)
+    cases = [("des_process_int", des.des_process_int, single.encrypt_keys),
+             ("des_process_int", des.des_process_int, single.decrypt_keys),
+             ("des3_process_int", des.des3_process_int, triple.encrypt_keys)]
+    for name, original, keys in cases:
+        if twin(block, keys) != original(block, keys):
+            raise RuntimeError(f"The instrumented {name} disagrees with the original")
+    if des.NUMPY_AVAILABLE:
+        twin = _staged_des_numpy(probe)
+        blocks = des.np.array([block], dtype=des.np.uint64)
+        for keys in (single.encrypt_keys, triple.encrypt_keys):
+            if twin(blocks, keys)[0] != des.des_process_numpy(blocks, keys)[0]:
+                raise RuntimeError("The instrumented des_process_numpy disagrees "
+                                   "with the original")
+
+
+# ===========================
+# ENIGMA TWINS
+# ===========================
+
+def enigma_patches(probe):
+    """(owner, attribute, replacement) for the Enigma module"""
+    screen = enigma.Alphabet.screen
+
+    def staged_screen(self, data):
+        start = clock()
+        out = screen(self, data)
+        probe.stage("enigma.screen", clock() - start)
+        probe.count("enigma.bytes", len(data))
+        return out
+
+    build = enigma.CachedEnigma.build_state_table
+
+    def staged_build(self, state, inner_table=None):
+        start = clock()
+        out = build(self, state, inner_table)
+        probe.stage("enigma.cached.state_table", clock() - start)
+        probe.count("enigma.cached.tables")
+        return out
+
+    patches = [
+        (enigma.Alphabet, "screen", staged_screen),
+        (enigma.Enigma, "_encrypt_codes", _staged_encrypt_codes(probe)),
+        (enigma.CachedEnigma, "build_state_table", staged_build),
+        (enigma.CachedEnigma, "_inner_table", _timed_stage(
+            probe, "enigma.cached.inner_table", enigma.CachedEnigma._inner_table)),
+        (enigma.Enigma, "_encrypt_run", _timed_method(
+            probe, "enigma.run", enigma.Enigma._encrypt_run, "enigma.chars")),
+        (enigma.CachedEnigma, "_encrypt_run", _timed_method(
+            probe, "enigma.cached_run", enigma.CachedEnigma._encrypt_run, "enigma.chars")),
+    ]
+    if enigma.NUMPY_AVAILABLE:
+        patches.append((enigma, "encrypt_batch", _timed_call(
+            probe, "enigma.batch", enigma.encrypt_batch, "enigma.batch.messages")))
+    return patches
+
+
+def _staged_encrypt_codes(probe):
+    """Enigma._encrypt_codes with stepping, plugboard and scrambler timed
+    The same inlined stepping and nested table lookups as the original,
+    with a clock read between them; the plugboard lookups on the way in
+    and out are pulled out of the nesting to be timed on their own, and
+    rotors and reflector stay one expression (the scrambler), as they
+    are in the original."""
+    original = enigma.Enigma._encrypt_codes
+
+    def _encrypt_codes(self, data, lookup, output, out):
+        rotors = self.rotors
+        m = len(rotors)
+        if not 1 <= m <= 4:
+            return original(self, data, lookup, output, out)
+
+        plug, reflect = self.plug, self.reflect
+        fwd = [r.forward for r in rotors] + [None] * (4 - m)
+        bwd = [r.backward for r in rotors] + [None] * (4 - m)
+        notch = list(self.notches) + [None] * (4 - m)
+        p1, p2, p3, p4 = self.positions + [0] * (4 - m)
+        f1, f2, f3, f4 = fwd
+        b1, b2, b3, b4 = bwd
+        n1, n2, n3, n4 = notch
+        N = self.alphabet.size
+        stepping = plugboard = scrambling = 0
+        for i, b in enumerate(data):
+            t0 = clock()
+            at2 = p2 == n2
+            step3 = m > 2 and at2
+            step4 = m > 3 and p3 == n3
+            if m > 1 and (at2 or p1 == n1):
+                p2 = (p2 + 1) % N
+            if step3:
+                p3 = (p3 + 1) % N
+            if step4:
+                p4 = (p4 + 1) % N
+            p1 = (p1 + 1) % N
+            t1 = clock()
+            n = plug[lookup[b]]
+            t2 = clock()
+            n = f1[p1][n]
+            if m == 1:
+                n = b1[p1][reflect[n]]
+            elif m == 2:
+                n = b1[p1][b2[p2][reflect[f2[p2][n]]]]
+            elif m == 3:
+                n = b1[p1][b2[p2][b3[p3][reflect[f3[p3][f2[p2][n]]]]]]
+            else:
+                n = b1[p1][b2[p2][b3[p3][b4[p4][reflect[f4[p4][f3[p3][f2[p2][n]]]]]]]]
+            t3 = clock()
+            out[i] = output[plug[n]]
+            t4 = clock()
+            stepping += t1 - t0
+            plugboard += t2 - t1 + t4 - t3
+            scrambling += t3 - t2
+        self.positions = [p1, p2, p3, p4][:m]
+        count = len(data)
+        probe.stage("enigma.stepping", stepping, count)
+        probe.stage("enigma.plugboard", plugboard, 2 * count)
+        probe.stage("enigma.scrambler", scrambling, count)
+        probe.count("enigma.rotor_passes", 2 * count * m)
+        return out
+
+    return _encrypt_codes
+
+
+def check_enigma_twins():
+    """Run a message through the staged _encrypt_codes and the original
+    with one to four rotors, raising RuntimeError if the output or the
+    rotor positions after it differ"""
+    twin = _staged_encrypt_codes(Probe(overhead=0))
+    alphabet = enigma.DEFAULT_WIRING.alphabet
+    # Long enough to carry every rotor past its notch at least once
+    data = bytes(random.Random(1).choices(enigma.ALPHABET.encode(), k=5000))
+    for rotors in ((3,), (1, 2), (1, 2, 3), (4, 2, 7, 5)):
+        results = []
+        for codes in (twin, enigma.Enigma._encrypt_codes):
+            machine = enigma.Enigma(rotors, "a" * len(rotors), 1, "ab1(")
+            out = codes(machine, data, alphabet.byte_index, alphabet.output,
+                        bytearray(len(data)))
+            results.append((bytes(out), machine.positions))
+        if results[0] != results[1]:
+            raise RuntimeError(f"The instrumented Enigma._encrypt_codes disagrees with "
+                               f"the original for rotors {rotors}")
+
+
+# ===========================
+# SWITCHES
+# ===========================
+
+@contextlib.contextmanager
+def enabled(probe=None, ciphers=("des", "enigma")):
+    """Instrument the ciphers for the length of a with-block, yielding the
+    Probe; not thread-safe, and only one block may be active at a time"""
+    global _active
+    if _active is not None:
+        raise RuntimeError("Instrumentation is already on")
+    probe = probe or Probe()
+    patches = []
+    if "des" in ciphers:
+        check_des_twins()
+        patches += des_patches(probe)
+    if "enigma" in ciphers:
+        check_enigma_twins()
+        patches += enigma_patches(probe)
+    saved = [(owner, name, vars(owner)[name]) for owner, name, _ in patches]
+    for owner, name, replacement in patches:
+        setattr(owner, name, replacement)
+    _active = probe
+    probe.started = clock()
+    try:
+        yield probe
+    finally:
+        probe.stopped = clock()
+        for owner, name, original in saved:
+            setattr(owner, name, original)
+        _active = None
+
+
+def instrumented_call(fn, *args, **kwargs):
+    """Run one call instrumented; returns (result, snapshot)"""
+    with enabled() as probe:
+        result = fn(*args, **kwargs)
+    return result, probe.snapshot()
+
+
+def profile_call(fn, *args, limit=PROFILE_TOP, **kwargs):
+    """Run one call under cProfile; returns (result, report)
+    The report lists the limit functions with the most time of their own."""
+    profiler = cProfile.Profile()
+    start = clock()
+    result = profiler.runcall(fn, *args, **kwargs)
+    elapsed = (clock() - start) / 1e9
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:limit]
+    functions = [{"function": f"{os.path.basename(path)}:{line}({name})",
+                  "calls": calls, "self": round(own, 6), "cumulative": round(total, 6)}
+                 for (path, line, name), (_, calls, own, total, _) in rows]
+    return result, {"profiler": "cprofile", "elapsed": round(elapsed, 6),
+                    "functions": functions}
+
+
+def sample_call(fn, *args, interval=SAMPLE_INTERVAL, limit=PROFILE_TOP, **kwargs):
+    """Run one call while a thread samples its stack; returns (result, report)
+    Far less overhead than cProfile, at the cost of being statistical:
+    "self" counts samples with a function on top of the stack, "total"
+    samples with it anywhere on the stack."""
+    target = threading.get_ident()
+    own, total = collections.Counter(), collections.Counter()
+    samples = 0
+    done = threading.Event()
+
+    def sampler():
+        nonlocal samples
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            samples += 1
+            code = frame.f_code
+            own[f"{os.path.basename(code.co_filename)}:{code.co_name}"] += 1
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                if key not in seen:
+                    seen.add(key)
+                    total[key] += 1
+                frame = frame.f_back
+
+    # The sampler needs the GIL at least once per interval
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(min(switch, interval / 2))
+    thread = threading.Thread(target=sampler, daemon=True)
+    start = clock()
+    thread.start()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        done.set()
+        thread.join()
+        sys.setswitchinterval(switch)
+    elapsed = (clock() - start) / 1e9
+    functions = [{"function": name, "self": n, "total": total[name],
+                  "share": round(n / samples, 4)} for name, n in own.most_common(limit)]
+    return result, {"profiler": "sample", "elapsed": round(elapsed, 6),
+                    "interval": interval, "samples": samples, "functions": functions}
+
+
+# ===========================
+# COMMAND LINE
+# ===========================
+
+def parse_size(text):
+    """Bytes from '4096', '64K' or '1M'"""
+    text = text.strip().upper()
+    if text[-1:] in UNITS:
+        return int(text[:-1]) * UNITS[text[-1]]
+    return int(text)
+
+
+def des_workload(args):
+    """(description, zero-argument function) for the des command"""
+    key = bytes.fromhex(args.key)
+    iv = bytes.fromhex("0011223344556677")
+    data = random.Random(1).randbytes(args.size - args.size % des.BLOCK_SIZE)
+    op = "decrypt" if args.decrypt else "encrypt"
+    what = f"DES {args.engine} engine, {args.mode.upper()} {op}, {len(data):,} bytes"
+
+    if args.engine == "string":
+        impl, key_hex = des.StringDES, args.key
+        if len(key) != 8:
+            raise ValueError("The string engine only does single DES")
+
+        def run():
+            # Block by block through the hex API, the only way this engine
+            # handles more than one block
+            prev = iv.hex()
+            for start in range(0, len(data), des.BLOCK_SIZE):
+                block = data[start:start + des.BLOCK_SIZE].hex()
+                if args.mode == "ecb":
+                    (impl.decrypt_ecb if args.decrypt else impl.encrypt_ecb)(block, key_hex)
+                elif args.decrypt:
+                    impl.decrypt_cbc(block, key_hex, prev)
+                    prev = block
+                else:
+                    prev = impl.encrypt_cbc(block, key_hex, prev)
+        return what, run
+
+    def run():
+        # A new cipher each time, so the key schedule is part of the run
+        cipher = des.new_cipher(key)
+        if args.mode == "ecb":
+            fn = cipher.decrypt_ecb if args.decrypt else cipher.encrypt_ecb
+            return fn(data, padding=False)
+        fn = cipher.decrypt_cbc if args.decrypt else cipher.encrypt_cbc
+        return fn(data, iv, padding=False)
+
+    if args.engine == "int" and des.NUMPY_AVAILABLE:
+        def without_numpy(run=run):
+            des.NUMPY_AVAILABLE = False
+            try:
+                return run()
+            finally:
+                des.NUMPY_AVAILABLE = True
+        return what, without_numpy
+    if args.engine == "numpy":
+        if not des.NUMPY_AVAILABLE:
+            raise ValueError("The numpy engine needs NumPy")
+        # CBC encryption chains every block on the one before, so the bulk
+        # helpers run it through the int engine whatever is installed
+        if args.mode == "cbc" and not args.decrypt:
+            raise ValueError("CBC encryption is sequential and never reaches the "
+                             "numpy engine; use --mode ecb or --decrypt")
+        if len(data) < des.NUMPY_MIN_BYTES:
+            raise ValueError(f"The numpy engine only takes {des.NUMPY_MIN_BYTES:,} "
+                             f"bytes or more")
+    return what, run
+
+
+def enigma_workload(args):
+    """(description, zero-argument function) for the enigma command"""
+    wiring = enigma.load_machine(args.machine) if args.machine else None
+    machine_class = enigma.CachedEnigma if args.cached else enigma.Enigma
+
+    def machine():
+        if args.setup and os.path.exists(args.setup):
+            return machine_class.from_setup_file(args.setup, wiring)
+        return machine_class(wiring=wiring)
+
+    rng = random.Random(1)
+    chars = enigma.ALPHABET.encode()
+    if args.batch:
+        if not enigma.NUMPY_AVAILABLE:
+            raise ValueError("--batch needs NumPy")
+        messages = [bytes(rng.choices(chars, k=args.size)) for _ in range(args.batch)]
+        what = f"Enigma batch of {args.batch:,} messages of {args.size:,} characters"
+
+        def run():
+            return enigma.encrypt_batch([machine() for _ in messages], messages)
+        return what, run
+
+    data = bytes(rng.choices(chars, k=args.size))
+    what = (f"Enigma{' (cached tables)' if args.cached else ''}, "
+            f"{len(data):,} characters")
+    return what, lambda: machine().encrypt_bytes(data)
+
+
+def print_snapshot(snapshot):
+    print(f"{'Stage':<30} {'calls':>11} {'seconds':>10} {'share':>7}")
+    for name, timer in snapshot["stages"].items():
+        print(f"{name:<30} {timer['calls']:>11,} {timer['seconds']:>10.4f} "
+              f"{timer['share']:>7.1%}")
+    if snapshot["calls"]:
+        print(f"\n{'Call (includes its stages)':<30} {'calls':>11} {'seconds':>10}")
+        for name, timer in snapshot["calls"].items():
+            print(f"{name:<30} {timer['calls']:>11,} {timer['seconds']:>10.4f}")
+    print()
+    for name, n in snapshot["counters"].items():
+        print(f"{name:<30} {n:>11,}")
+    print(f"\n(one clock read costs {snapshot['timer_overhead_ns']} ns; "
+          f"taken off every stage interval)")
+    print(f"({snapshot['note']})")
+
+
+def print_profile(report):
+    if report["profiler"] == "cprofile":
+        print(f"{'Function':<50} {'calls':>10} {'self s':>9} {'cumul s':>9}")
+        for row in report["functions"]:
+            print(f"{row['function']:<50} {row['calls']:>10,} {row['self']:>9.4f} "
+                  f"{row['cumulative']:>9.4f}")
+    else:
+        print(f"{report['samples']:,} samples every {report['interval'] * 1000:g} ms")
+        print(f"{'Function':<50} {'self':>7} {'total':>7} {'share':>7}")
+        for row in report["functions"]:
+            print(f"{row['function']:<50} {row['self']:>7,} {row['total']:>7,} "
+                  f"{row['share']:>7.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Where the time goes in DES and Enigma, stage by stage")
+    parser.add_argument("cipher", choices=["des", "enigma"])
+    parser.add_argument("--size", type=parse_size, default=None,
+                        help="bytes to process (default: 64K for DES, 16K for the "
+                             "string engine, 200K for Enigma, 64 per batch message)")
+    parser.add_argument("--profile", choices=["cprofile", "sample"],
+                        help="profile the run instead of timing its stages")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="also write the snapshot or profile as JSON")
+    des_opts = parser.add_argument_group("des")
+    des_opts.add_argument("--engine", choices=["int", "numpy", "string"], default="int",
+                          help="int is pure Python, numpy the vectorized bulk path")
+    des_opts.add_argument("-m", "--mode", choices=["ecb", "cbc"],
+                          help="default: cbc, ecb for the numpy engine")
+    des_opts.add_argument("--decrypt", action="store_true")
+    des_opts.add_argument("-k", "--key", default="133457799BBCDFF1",
+                          help="16 hex digits, or 32/48 for triple DES")
+    enigma_opts = parser.add_argument_group("enigma")
+    enigma_opts.add_argument("--setup", default="esetup",
+                             help="esetup file, used if it exists (default: esetup)")
+    enigma_opts.add_argument("--machine", metavar="FILE",
+                             help="wirings from a machine file")
+    enigma_opts.add_argument("--cached", action="store_true",
+                             help="CachedEnigma (per-state tables)")
+    enigma_opts.add_argument("--batch", type=int, default=0, metavar="N",
+                             help="encrypt_batch over N messages of --size characters")
+    args = parser.parse_args(argv)
+    if args.size is None:
+        if args.cipher == "enigma":
+            args.size = 64 if args.batch else 200 * 1024
+        else:
+            args.size = 16 * 1024 if args.engine == "string" else 64 * 1024
+    if args.mode is None:
+        args.mode = "ecb" if args.engine == "numpy" else "cbc"
+    if args.size < 1 or args.batch < 0:
+        parser.error("--size must be at least 1 and --batch not negative")
+    if not any(des.validate_hex(args.key, n) for n in (16, 32, 48)):
+        parser.error("key must be 16, 32 or 48 hexadecimal characters")
+
+    try:
+        what, run = des_workload(args) if args.cipher == "des" else enigma_workload(args)
+        print(what)
+        if args.profile:
+            hook = profile_call if args.profile == "cprofile" else sample_call
+            _, report = hook(run)
+            print(f"{report['elapsed']:.3f} s under {args.profile}\n")
+            print_profile(report)
+        else:
+            start = clock()
+            run()
+            plain = (clock() - start) / 1e9
+            _, report = instrumented_call(run)
+            print(f"{plain:.3f} s as is, {report['elapsed']:.3f} s instrumented\n")
+            print_snapshot(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(dict(report, workload=what), f, indent=2)
+                f.write("\n")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())